@@ -0,0 +1,121 @@
+# bench_constraints.py
+"""
+Micro-benchmark del solver de restricciones: resolución completa de una
+cadena de rectángulos conectada y re-resolución de una sola componente
+al mover un vértice. Antes comprueba el BlockSolver contra una resolución
+densa con paralelas y perpendiculares.
+
+Uso: python benchmarks/bench_constraints.py
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import constraints as cs
+from sketch import Sketch
+
+SIZES = (1_000, 10_000, 50_000)  # Restricciones aproximadas
+CONSTRAINTS_PER_RECTANGLE = 8
+NOISE = 0.05
+REPEATS = 20
+DENSE_CHECKS = 100
+
+
+def rectangles(count, linked, noise, rng):
+    """
+    Sketch con `count` rectángulos de 1x0.5 en fila, cada uno con sus
+    lados horizontales/verticales y sus medidas; si `linked` cada uno
+    cuelga del anterior (una sola componente), si no cada uno tiene una
+    esquina fija. Los vértices empiezan desplazados `noise` al azar.
+    """
+    corners = np.array([[0, 0], [1, 0], [1, 0.5], [0, 0.5]])
+    offsets = np.repeat(np.arange(count) * 1.5, 4)
+    points = np.tile(corners, (count, 1)) + np.column_stack([offsets, np.zeros(len(offsets))])
+    points += rng.uniform(-noise, noise, points.shape)
+    base = 4 * np.arange(count)[:, None]
+    edges = (base[:, :, None] + np.array([[0, 1], [1, 2], [2, 3], [3, 0]])).reshape(-1, 2)
+
+    sketch = Sketch()
+    sketch.load_arrays(points, edges)
+    constraints = sketch.constraints
+    for index in range(count):
+        a, b, c, d = 4 * index + np.arange(4)
+        constraints.horizontal(a, b)
+        constraints.vertical(b, c)
+        constraints.horizontal(c, d)
+        constraints.vertical(d, a)
+        constraints.distance(a, b, 1.0)
+        constraints.distance(b, c, 0.5)
+        if linked and index:
+            constraints.horizontal(a - 3, a)
+            constraints.distance(a - 3, a, 0.5)
+        else:
+            constraints.fixed(a, (1.5 * index, 0.0))
+    return sketch
+
+
+def check_dense(rng):
+    """
+    El paso del BlockSolver coincide con resolver J^T J + lambda I denso
+    en conjuntos al azar de restricciones sobre vértices consecutivos:
+    paralelas y perpendiculares acoplan cuatro vértices, que no deben
+    quedar fuera de la banda tridiagonal por bloques. Retorna el mayor
+    error relativo.
+    """
+    worst = 0.0
+    choices = [cs.HORIZONTAL, cs.VERTICAL, cs.PARALLEL, cs.PERPENDICULAR, cs.DISTANCE]
+    for _ in range(DENSE_CHECKS):
+        n_vertices = int(rng.integers(8, 120))
+        count = int(rng.integers(n_vertices // 2, 2 * n_vertices))
+        kinds = rng.choice(choices, count)
+        vertices = rng.integers(0, n_vertices - 4, count)[:, None] + np.arange(4)
+        vertices[cs.ARITY[kinds] == 2, 2:] = -1
+        values = np.column_stack([rng.uniform(0.5, 2.0, count), np.zeros(count)])
+        points = rng.uniform(-5, 5, (n_vertices, 2))
+        _, jacobian = cs.evaluate(points, kinds, vertices, values, n_vertices)
+        b = rng.normal(size=2 * n_vertices)
+        step = cs.BlockSolver(n_vertices, vertices, block_size=8).solve(jacobian, b, 1e-3)
+        dense = jacobian.toarray()
+        expected = np.linalg.solve(dense.T @ dense + 1e-3 * np.identity(2 * n_vertices), b)
+        error = np.abs(step - expected).max() / np.abs(expected).max()
+        assert error < 1e-8, error
+        worst = max(worst, error)
+    return worst
+
+
+def bench(size, rng):
+    count = size // CONSTRAINTS_PER_RECTANGLE
+    sketch = rectangles(count, True, NOISE, rng)
+    start = time.perf_counter()
+    result = sketch.solve_constraints()
+    full_ms = (time.perf_counter() - start) * 1000
+    assert result.converged, result
+
+    # Componentes independientes: mover un vértice re-resuelve un rectángulo
+    sketch = rectangles(count, False, 0.0, rng)
+    sketch.solve_constraints()
+    sketch.constraints.components()
+    vertices = rng.integers(0, sketch.store.n_vertices, REPEATS)
+    start = time.perf_counter()
+    for vertex in vertices.tolist():
+        x, y = sketch.store.vertex(vertex)
+        sketch.store.set_vertex(vertex, (x + 0.01, y + 0.01))
+        sketch.solve_constraints([vertex], pinned=[vertex])
+    drag_ms = (time.perf_counter() - start) * 1000 / REPEATS
+    return len(sketch.constraints), result.iterations, full_ms, drag_ms
+
+
+def main():
+    rng = np.random.default_rng(0)
+    print(f"BlockSolver frente a solve denso: error relativo máximo {check_dense(rng):.1e}")
+    print(f"{'restricciones':>13} | {'iteraciones':>11} | {'completa (ms)':>13} | {'una componente (ms)':>19}")
+    for size in SIZES:
+        count, iterations, full_ms, drag_ms = bench(size, rng)
+        print(f"{count:>13} | {iterations:>11} | {full_ms:>13.1f} | {drag_ms:>19.2f}")
+
+
+if __name__ == "__main__":
+    main()
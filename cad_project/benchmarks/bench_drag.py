@@ -0,0 +1,107 @@
+# bench_drag.py
+"""
+Micro-benchmark de arrastre: latencia por cuadro al arrastrar un vértice
+restringido en sketches de tamaño creciente, frente a resolver todas las
+restricciones en cada cuadro
+
+Uso: python benchmarks/bench_drag.py
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from sketch import Sketch
+
+SIZES = (1_000, 10_000, 100_000)  # Rectángulos independientes
+FRAMES = 60
+FULL_FRAMES = 3  # La resolución completa es lenta: pocos cuadros
+
+
+def rectangles(count, constrained=True):
+    """
+    Sketch con `count` rectángulos de 1x0.5 en fila con lados
+    horizontales/verticales y ancho fijo: el alto queda libre, así que
+    arrastrar una esquina de arriba en vertical siempre tiene solución. Sin
+    `constrained` solo las líneas.
+    """
+    corners = np.array([[0, 0], [1, 0], [1, 0.5], [0, 0.5]])
+    offsets = np.repeat(np.arange(count) * 1.5, 4)
+    points = np.tile(corners, (count, 1)) + np.column_stack([offsets, np.zeros(len(offsets))])
+    base = 4 * np.arange(count)[:, None]
+    edges = (base[:, :, None] + np.array([[0, 1], [1, 2], [2, 3], [3, 0]])).reshape(-1, 2)
+
+    sketch = Sketch()
+    sketch.load_arrays(points, edges)
+    constraints = sketch.constraints
+    for index in range(count if constrained else 0):
+        a, b, c, d = 4 * index + np.arange(4)
+        constraints.horizontal(a, b)
+        constraints.vertical(b, c)
+        constraints.horizontal(c, d)
+        constraints.vertical(d, a)
+        constraints.distance(a, b, 1.0)
+    return sketch
+
+
+def drag(sketch, vertex, frames):
+    """
+    Arrastre incremental: solo el cluster del vértice. Retorna (ms al
+    empezar, ms por cuadro).
+    """
+    x, y = sketch.store.vertex(vertex)
+    start = time.perf_counter()
+    sketch.start_line((x, y), drag=True)
+    start_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    for frame in range(1, frames + 1):
+        point = (x, y + 0.01 * frame)
+        sketch.update_current_line(point)
+        sketch.find_snap(point)
+    frame_ms = (time.perf_counter() - start) * 1000 / frames
+    sketch.end_line((x, y + 0.01 * frames))
+    # El vértice arrastrado queda fijo bajo el cursor
+    assert np.allclose(sketch.store.vertex(vertex), (x, y + 0.01 * frames))
+    return start_ms, frame_ms
+
+
+def full_drag(sketch, vertex, frames):
+    # Referencia: mover el vértice y resolver todo el sketch en cada cuadro
+    x, y = sketch.store.vertex(vertex)
+    start = time.perf_counter()
+    for frame in range(1, frames + 1):
+        point = (x, y + 0.01 * frame)
+        sketch.store.set_vertex(vertex, point)
+        sketch.solve_constraints(pinned=[vertex])
+        sketch.find_snap(point)
+    return (time.perf_counter() - start) * 1000 / frames
+
+
+def bench(count, constrained=True):
+    sketch = rectangles(count, constrained)
+    # Índices construidos antes de medir
+    sketch.find_snap((0.0, 0.0))
+    sketch.pick((0.0, 0.0), 0.1)
+    vertex = 4 * (count // 2) + 2  # Esquina de arriba
+    start_ms, frame_ms = drag(sketch, vertex, FRAMES)
+    residuals = sketch.constraints.residuals()
+    residual = float(np.abs(residuals).max()) if len(residuals) else 0.0
+    full_ms = full_drag(sketch, vertex, FULL_FRAMES)
+    return len(sketch.constraints), start_ms, frame_ms, full_ms, residual
+
+
+def main():
+    print(f"{'restricciones':>13} | {'inicio (ms)':>11} | {'arrastre (ms/cuadro)':>20} | "
+          f"{'todo el sketch (ms/cuadro)':>26} | {'residuo':>8}")
+    # Primero un sketch sin restricciones: solo se mueve el vértice
+    cases = [(SIZES[0], False)] + [(count, True) for count in SIZES]
+    for count, constrained in cases:
+        constraints, start_ms, frame_ms, full_ms, residual = bench(count, constrained)
+        print(f"{constraints:>13} | {start_ms:>11.1f} | {frame_ms:>20.3f} | "
+              f"{full_ms:>26.1f} | {residual:>8.1e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+# bench_export.py
+"""
+Benchmark de exportación a STL binario y OBJ de una extrusión de ~1M de
+triángulos
+
+Uso: python benchmarks/bench_export.py [directorio temporal]
+"""
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from extrusion import extrude_geometry
+from mesh_export import write_obj, write_stl
+
+
+def circle_mesh(n):
+    angles = np.linspace(0, 2 * np.pi, n, endpoint=False)
+    geometry = {'points': np.column_stack([np.cos(angles), np.sin(angles)]),
+                'edges': np.column_stack([np.arange(n), (np.arange(n) + 1) % n])}
+    return extrude_geometry(geometry, 1.0)
+
+
+def main():
+    directory = sys.argv[1] if len(sys.argv) > 1 else tempfile.gettempdir()
+    mesh = circle_mesh(250_000)
+    parts = [(mesh, None, "cilindro")]
+    print(f"{mesh.triangle_count} triángulos, {mesh.vertex_count} vértices")
+    for writer, extension in ((write_stl, "stl"), (write_obj, "obj")):
+        path = os.path.join(directory, f"bench_export.{extension}")
+        start = time.perf_counter()
+        count = writer(path, parts)
+        elapsed = time.perf_counter() - start
+        size_mb = os.path.getsize(path) / 1e6
+        print(f"{extension}: {elapsed:.2f} s, {count / elapsed / 1e6:.2f} M triángulos/s, {size_mb:.0f} MB")
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
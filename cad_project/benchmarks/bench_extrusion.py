@@ -0,0 +1,35 @@
+# bench_extrusion.py
+"""
+Benchmark de extrude_geometry con perfiles de tamaño creciente
+
+Uso: python benchmarks/bench_extrusion.py
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from extrusion import extrude_geometry
+
+
+def circle_geometry(n):
+    angles = np.linspace(0, 2 * np.pi, n, endpoint=False)
+    points = np.column_stack([np.cos(angles), np.sin(angles)])
+    edges = np.column_stack([np.arange(n), (np.arange(n) + 1) % n])
+    return {'points': points, 'edges': edges}
+
+
+def main():
+    print(f"{'aristas':>10} | {'tiempo (ms)':>12} | {'triángulos':>12}")
+    for n in (1_000, 10_000, 100_000, 1_000_000):
+        geometry = circle_geometry(n)
+        start = time.perf_counter()
+        mesh = extrude_geometry(geometry, 1.0)
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"{n:>10} | {elapsed:>12.1f} | {mesh.triangle_count:>12}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+# bench_frames.py
+"""
+Benchmark de tiempos por cuadro de CADSystem sin ventana (EGL u OSMesa):
+se reproducen eventos sintéticos en modo sketch y en modo 3D con geometría
+creciente y se guardan los percentiles en JSON para comparar entre
+versiones
+
+Uso: python benchmarks/bench_frames.py [salida.json] [--compare base.json]
+                                       [--frames N] [--size AxB]
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import headless  # Antes que OpenGL
+import numpy as np
+import pygame
+from cad_system import CADSystem
+from camera import translation_matrix
+from extrusion import extrude_geometry
+from scene import Body
+
+SKETCH_SIZES = (1_000, 10_000, 100_000)  # Aristas del sketch
+SOLID_SIZES = (10_000, 100_000, 1_000_000)  # Triángulos de la escena
+BODY_TRIANGLES = 25_000  # Malla compartida por los cuerpos de la escena 3D
+FRAMES = 240
+WARMUP_FRAMES = 5  # Subida de buffers y primeras listas de OpenGL
+PERCENTILES = (50, 90, 99)
+REGRESSION_RATIO = 1.15
+
+
+def sketch_geometry(count, rng):
+    """
+    Un segmento corto de dirección al azar por celda de una rejilla que
+    cubre la vista inicial del sketch: sin cruces entre ellos
+    """
+    side = int(math.ceil(math.sqrt(count)))
+    cell = 6.0 / side
+    rows, columns = np.divmod(np.arange(count), side)
+    centers = np.column_stack([columns, rows]) * cell - 3.0 + cell / 2
+    angles = rng.uniform(0, np.pi, count)
+    offsets = 0.4 * cell * np.column_stack([np.cos(angles), np.sin(angles)])
+    points = np.vstack([centers - offsets, centers + offsets])
+    edges = np.column_stack([np.arange(count), np.arange(count) + count])
+    return points, edges
+
+
+def cylinder(triangles):
+    n = max(triangles // 4, 3)
+    angles = np.linspace(0, 2 * np.pi, n, endpoint=False)
+    geometry = {'points': 0.5 * np.column_stack([np.cos(angles), np.sin(angles)]),
+                'edges': np.column_stack([np.arange(n), (np.arange(n) + 1) % n])}
+    return extrude_geometry(geometry, 1.0)
+
+
+def key(type_, code):
+    return pygame.event.Event(type_, key=code, mod=0, unicode='', scancode=0)
+
+
+def mouse(type_, pos, button=1):
+    if type_ == pygame.MOUSEMOTION:
+        return pygame.event.Event(type_, pos=pos, rel=(0, 0), buttons=(1, 0, 0))
+    return pygame.event.Event(type_, pos=pos, button=button)
+
+
+def sketch_events(frames, display):
+    """
+    Entra en modo sketch y dibuja líneas: pulsar, arrastrar varios cuadros
+    y soltar; a mitad de la prueba se aleja el zoom manteniendo 's'
+    """
+    width, height = display
+    script = [[key(pygame.KEYDOWN, pygame.K_TAB)]]
+    angle = 0.0
+    while len(script) < frames:
+        center = (width / 2 + width / 3 * math.cos(angle), height / 2 + height / 3 * math.sin(angle))
+        angle += 0.7
+        script.append([mouse(pygame.MOUSEBUTTONDOWN, (int(center[0]), int(center[1])))])
+        for step in range(1, 9):
+            position = (int(center[0] + 8 * step), int(center[1] + 5 * step))
+            script.append([mouse(pygame.MOUSEMOTION, position)])
+        script.append([mouse(pygame.MOUSEBUTTONUP, position)])
+    middle = frames // 2
+    script[middle].append(key(pygame.KEYDOWN, pygame.K_s))
+    script[middle + 10].append(key(pygame.KEYUP, pygame.K_s))
+    return script[:frames]
+
+
+def solid_events(frames, display):
+    """
+    Modo 3D: una vuelta completa de la cámara con el ratón mientras se
+    avanza y retrocede con 'w' y 's'
+    """
+    center = (display[0] // 2, display[1] // 2)
+    # mouse_speed = 0.2 grados por píxel
+    step = int(round(360 / 0.2 / frames))
+    script = [[mouse(pygame.MOUSEMOTION, (center[0] + step, center[1]))] for _ in range(frames)]
+    script[0].append(key(pygame.KEYDOWN, pygame.K_w))
+    script[frames // 4].append(key(pygame.KEYUP, pygame.K_w))
+    script[frames // 2].append(key(pygame.KEYDOWN, pygame.K_s))
+    script[3 * frames // 4].append(key(pygame.KEYUP, pygame.K_s))
+    return script
+
+
+def summarize(values):
+    values = np.asarray(values, dtype=np.float64)
+    if not len(values):
+        return {}
+    result = {f"p{p}": float(np.percentile(values, p)) for p in PERCENTILES}
+    result.update(mean=float(values.mean()), max=float(values.max()))
+    return result
+
+
+def run_case(mode, size, frames, display):
+    cad = CADSystem(display, headless=True)
+    cad.debug = False
+    # Sin límite de FPS y renderizando todos los cuadros
+    cad.frame_scheduler.target_fps = 0
+    cad.frame_scheduler.on_demand = False
+    renderer = cad.gl_context.renderer
+
+    rng = np.random.default_rng(0)
+    if mode == 'sketch':
+        cad.current_sketch.load_arrays(*sketch_geometry(size, rng))
+        script = sketch_events(frames, display)
+    else:
+        # Anillo de cuerpos alrededor de la cámara con una malla compartida
+        # (sus niveles de detalle se calculan una vez, antes de medir)
+        mesh = cylinder(min(size, BODY_TRIANGLES))
+        count = max(1, size // mesh.triangle_count)
+        for index in range(count):
+            angle = 2 * math.pi * index / count
+            height = 1.2 * (index % 5) - 2.4
+            body = Body(mesh, translation_matrix(4 * math.sin(angle), height, 5 - 4 * math.cos(angle)))
+            body.build_lods()
+            cad.scene.add(body)
+        script = solid_events(frames, display)
+
+    cad.replay_events(script)
+    history = cad.frame_scheduler.history = []
+    start = time.perf_counter()
+    cad.run()
+    elapsed = time.perf_counter() - start
+
+    measured = history[WARMUP_FRAMES:]
+    rendered = [stats for stats in measured if stats['rendered']]
+    return {
+        'mode': mode,
+        'size': size,
+        'frames': len(history),
+        'seconds': elapsed,
+        'first_frame_ms': history[0]['frame_ms'] if history else None,
+        'frame_ms': summarize([stats['frame_ms'] for stats in measured]),
+        'input_ms': summarize([stats['input_ms'] for stats in measured]),
+        'render_ms': summarize([stats['render_ms'] for stats in rendered]),
+    }, renderer
+
+
+def compare(results, baseline):
+    """
+    Cociente frente a la base por caso; True si algún p50 o p99 empeora
+    más de REGRESSION_RATIO
+    """
+    previous = {(case['mode'], case['size']): case for case in baseline['results']}
+    regressed = False
+    print(f"\n{'caso':>18} | {'p50 actual/base':>16} | {'p99 actual/base':>16}")
+    for case in results:
+        old = previous.get((case['mode'], case['size']))
+        if old is None:
+            continue
+        ratios = [case['frame_ms'][key] / max(old['frame_ms'][key], 1e-9) for key in ('p50', 'p99')]
+        flag = " <- regresión" if max(ratios) > REGRESSION_RATIO else ""
+        regressed |= bool(flag)
+        print(f"{case['mode'] + ' ' + str(case['size']):>18} | {ratios[0]:>16.2f} | {ratios[1]:>16.2f}{flag}")
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('output', nargs='?', default='bench_frames.json')
+    parser.add_argument('--compare', metavar='BASE', help="JSON de una ejecución anterior")
+    parser.add_argument('--frames', type=int, default=FRAMES)
+    parser.add_argument('--size', default='1280x800', help="resolución del framebuffer")
+    args = parser.parse_args()
+    display = tuple(int(value) for value in args.size.lower().split('x'))
+
+    results = []
+    renderer = None
+    print(f"{'modo':>7} | {'tamaño':>9} | {'p50 (ms)':>9} | {'p90 (ms)':>9} | {'p99 (ms)':>9} | {'render p50':>10}")
+    cases = [('sketch', size) for size in SKETCH_SIZES] + [('3d', size) for size in SOLID_SIZES]
+    for mode, size in cases:
+        case, renderer = run_case(mode, size, args.frames, display)
+        results.append(case)
+        frame, render = case['frame_ms'], case['render_ms']
+        print(f"{mode:>7} | {size:>9} | {frame['p50']:>9.2f} | {frame['p90']:>9.2f} | "
+              f"{frame['p99']:>9.2f} | {render.get('p50', 0.0):>10.2f}")
+
+    report = {
+        'benchmark': 'frames',
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'display': list(display),
+        'gl_renderer': renderer,
+        'backend': os.environ.get('PYOPENGL_PLATFORM'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'results': results,
+    }
+    with open(args.output, 'w', encoding='utf-8') as file:
+        json.dump(report, file, indent=2)
+    print(f"Resultados en {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as file:
+            if compare(results, json.load(file)):
+                sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
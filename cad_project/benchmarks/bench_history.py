@@ -0,0 +1,75 @@
+# bench_history.py
+"""
+Micro-benchmark de deshacer/rehacer: coste de deshacer y rehacer una línea
+en sketches de tamaño creciente y memoria del historial
+
+Uso: python benchmarks/bench_history.py
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from sketch import Sketch
+
+SIZES = (1_000, 100_000, 1_000_000)
+LINES = 50
+
+
+def lattice(count):
+    # Un segmento horizontal por celda de una rejilla de 6x6: sin cortes
+    side = int(np.ceil(np.sqrt(count)))
+    cell = 6.0 / side
+    rows, columns = np.divmod(np.arange(count), side)
+    centers = np.column_stack([columns, rows]) * cell - 3.0
+    offset = np.array([0.4 * cell, 0.0])
+    points = np.vstack([centers - offset, centers + offset])
+    return points, np.column_stack([np.arange(count), np.arange(count) + count])
+
+
+def bench(count, lines=LINES):
+    sketch = Sketch()
+    sketch.load_arrays(*lattice(count))
+    sketch.history.reset()
+
+    # Índices de snap y de aristas construidos antes de medir
+    start = time.perf_counter()
+    sketch.find_snap((10.0, 10.0))
+    index_ms = (time.perf_counter() - start) * 1000
+
+    # Líneas fuera de la rejilla: sin cortes ni snap
+    start = time.perf_counter()
+    for i in range(lines):
+        sketch.start_line((10.0 + i, 10.0))
+        sketch.end_line((10.0 + i, 11.0))
+    draw_ms = (time.perf_counter() - start) * 1000 / lines
+
+    start = time.perf_counter()
+    for _ in range(lines):
+        sketch.undo()
+        sketch.find_snap((10.0, 10.0))
+    undo_ms = (time.perf_counter() - start) * 1000 / lines
+    # Las filas de un añadido se copian al deshacerlo
+    history_bytes = sketch.history.nbytes
+
+    start = time.perf_counter()
+    for _ in range(lines):
+        sketch.redo()
+        sketch.find_snap((10.0, 10.0))
+    redo_ms = (time.perf_counter() - start) * 1000 / lines
+    return index_ms, draw_ms, undo_ms, redo_ms, history_bytes / lines
+
+
+def main():
+    print(f"{'aristas':>10} | {'índices (ms)':>12} | {'línea (ms)':>10} | "
+          f"{'deshacer (ms)':>13} | {'rehacer (ms)':>12} | {'bytes/paso':>10}")
+    for count in SIZES:
+        index_ms, draw_ms, undo_ms, redo_ms, step_bytes = bench(count)
+        print(f"{count:>10} | {index_ms:>12.1f} | {draw_ms:>10.3f} | "
+              f"{undo_ms:>13.3f} | {redo_ms:>12.3f} | {step_bytes:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
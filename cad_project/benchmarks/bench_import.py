@@ -0,0 +1,79 @@
+# bench_import.py
+"""
+Benchmark de importación de un DXF y un SVG de 500k segmentos al Sketch
+
+Uso: python benchmarks/bench_import.py [directorio temporal]
+"""
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from importers import import_drawing, read_dxf, read_svg, weld_segments
+from sketch import Sketch
+
+SEGMENTS = 500_000
+POLYLINE_VERTICES = 10
+
+
+def grid_polylines(count, rng):
+    """
+    Polilíneas abiertas de POLYLINE_VERTICES vértices sobre una rejilla,
+    para que los extremos se compartan al unir
+    """
+    polylines = count // (POLYLINE_VERTICES - 1)
+    steps = rng.integers(-1, 2, size=(polylines, POLYLINE_VERTICES, 2))
+    origins = rng.integers(0, 1000, size=(polylines, 1, 2))
+    return (origins + np.cumsum(steps, axis=1)).astype(np.float64) * 0.5
+
+
+def write_dxf(path, polylines):
+    with open(path, 'w') as file:
+        file.write("0\nSECTION\n2\nENTITIES\n")
+        half = len(polylines) // 2
+        # La mitad como LINE y la otra mitad como LWPOLYLINE
+        for points in polylines[:half]:
+            for (x1, y1), (x2, y2) in zip(points[:-1], points[1:]):
+                file.write(f"0\nLINE\n8\n0\n10\n{x1}\n20\n{y1}\n11\n{x2}\n21\n{y2}\n")
+        for points in polylines[half:]:
+            file.write(f"0\nLWPOLYLINE\n8\n0\n90\n{len(points)}\n70\n0\n")
+            file.write("".join(f"10\n{x}\n20\n{y}\n" for x, y in points))
+        file.write("0\nENDSEC\n0\nEOF\n")
+
+
+def write_svg(path, polylines):
+    with open(path, 'w') as file:
+        file.write('<svg xmlns="http://www.w3.org/2000/svg">\n')
+        for points in polylines:
+            d = " L ".join(f"{x} {-y}" for x, y in points)
+            file.write(f'<path d="M {d}"/>\n')
+        file.write('</svg>\n')
+
+
+def timed(label, function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    print(f"{label}: {(time.perf_counter() - start) * 1000:.0f} ms")
+    return result
+
+
+def main():
+    directory = sys.argv[1] if len(sys.argv) > 1 else tempfile.gettempdir()
+    polylines = grid_polylines(SEGMENTS, np.random.default_rng(0))
+    for extension, writer, reader in (("dxf", write_dxf, read_dxf), ("svg", write_svg, read_svg)):
+        path = os.path.join(directory, f"bench_import.{extension}")
+        writer(path, polylines)
+        print(f"{extension}: {os.path.getsize(path) / 1e6:.0f} MB")
+        starts, ends = timed(f"  lectura ({len(polylines) * (POLYLINE_VERTICES - 1)} segmentos)", reader, path)
+        vertices, edges = timed("  unión de extremos", weld_segments, starts, ends)
+        print(f"  {len(vertices)} vértices, {len(edges)} aristas")
+        sketch = Sketch()
+        timed("  import_drawing total", import_drawing, sketch, path)
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
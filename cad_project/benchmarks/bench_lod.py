@@ -0,0 +1,50 @@
+# bench_lod.py
+"""
+Benchmark de la generación de niveles de detalle para sólidos extruidos:
+tiempo total y, con el cálculo en un hilo (lod.LodBuilder), el cuadro más
+lento de un bucle principal que hace FRAME_WORK_MS de trabajo por cuadro
+
+Uso: python benchmarks/bench_lod.py
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from extrusion import extrude_geometry
+from lod import build_lods, LodBuilder
+
+FRAME_WORK_MS = 2.0  # Trabajo en Python de cada cuadro simulado
+
+
+def circle_geometry(n):
+    angles = np.linspace(0, 2 * np.pi, n, endpoint=False)
+    points = np.column_stack([np.cos(angles), np.sin(angles)])
+    edges = np.column_stack([np.arange(n), (np.arange(n) + 1) % n])
+    return {'points': points, 'edges': edges}
+
+
+def main():
+    print(f"{'triángulos':>11} | {'tiempo (ms)':>12} | {'cuadros':>7} | {'cuadro máx (ms)':>15} | "
+          f"niveles (triángulos, error)")
+    for n in (1_000, 5_000, 20_000):
+        mesh = extrude_geometry(circle_geometry(n), 1.0)
+        start = time.perf_counter()
+        levels = build_lods(mesh)
+        elapsed = (time.perf_counter() - start) * 1000
+
+        builder = LodBuilder(mesh)
+        frames = []
+        while builder.run() is None:
+            start = time.perf_counter()
+            while time.perf_counter() - start < FRAME_WORK_MS / 1000.0:
+                pass
+            frames.append((time.perf_counter() - start) * 1000)
+        summary = ", ".join(f"({level.mesh.triangle_count}, {level.error:.2g})" for level in levels)
+        print(f"{mesh.triangle_count:>11} | {elapsed:>12.1f} | {len(frames):>7} | {max(frames):>15.1f} | {summary}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+# bench_pick.py
+"""
+Benchmark de la selección con rayos: cuerpos con ~1M de triángulos en
+total y un sketch de 100k aristas (solo CPU)
+
+Uso: python benchmarks/bench_pick.py
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from camera import translation_matrix
+from lod import flat_mesh
+from scene import Scene, Body
+from sketch import Sketch
+
+
+def wavy_surface(n):
+    """
+    Superficie ondulada de 2 (n - 1)^2 triángulos sobre [-1, 1]^2
+    """
+    x, y = np.meshgrid(np.linspace(-1, 1, n), np.linspace(-1, 1, n))
+    z = 0.2 * np.sin(3 * x) * np.cos(3 * y)
+    positions = np.column_stack([x.ravel(), y.ravel(), z.ravel()])
+    row, col = np.meshgrid(np.arange(n - 1), np.arange(n - 1))
+    corner = (row * n + col).ravel()
+    faces = np.vstack([np.column_stack([corner, corner + 1, corner + n]),
+                       np.column_stack([corner + 1, corner + n + 1, corner + n])])
+    return flat_mesh(positions, faces)
+
+
+def bench_scene(rng, rays=1000):
+    mesh = wavy_surface(317)
+    scene = Scene()
+    for index in range(5):
+        scene.add(Body(mesh, translation_matrix(3 * index, 0, 0)))
+    total = mesh.triangle_count * len(scene)
+
+    start = time.perf_counter()
+    scene.pick([0, 0, 5], [0, 0, -1])
+    build_ms = (time.perf_counter() - start) * 1000
+
+    origins = np.column_stack([rng.uniform(-1, 13, rays), rng.uniform(-1.2, 1.2, rays), np.full(rays, 3.0)])
+    directions = np.column_stack([rng.normal(0, 0.1, (rays, 2)), -np.ones(rays)])
+    directions /= np.linalg.norm(directions, axis=1, keepdims=True)
+    start = time.perf_counter()
+    hits = sum(scene.pick(origin, direction) is not None for origin, direction in zip(origins, directions))
+    pick_ms = (time.perf_counter() - start) * 1000 / rays
+    print(f"escena: {total} triángulos, BVH {build_ms:.0f} ms, "
+          f"{pick_ms:.3f} ms por rayo ({hits}/{rays} aciertos)")
+
+
+def bench_sketch(rng, edges=100_000, queries=1000):
+    sketch = Sketch()
+    starts = rng.uniform(-500, 500, (edges, 2))
+    ends = starts + rng.uniform(-2, 2, (edges, 2))
+    base = sketch.store.extend_vertices(np.vstack([starts, ends]))
+    sketch.store.extend_edges(np.column_stack([np.arange(edges), np.arange(edges, 2 * edges)]) + base)
+
+    start = time.perf_counter()
+    sketch.pick((0.0, 0.0), 0.5)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    points = rng.uniform(-500, 500, (queries, 2))
+    start = time.perf_counter()
+    hits = sum(sketch.pick(tuple(point), 0.5) is not None for point in points)
+    pick_ms = (time.perf_counter() - start) * 1000 / queries
+    print(f"sketch: {edges} aristas, BVH {build_ms:.0f} ms, "
+          f"{pick_ms:.3f} ms por consulta ({hits}/{queries} aciertos)")
+
+
+def main():
+    rng = np.random.default_rng(0)
+    bench_scene(rng)
+    bench_sketch(rng)
+
+
+if __name__ == "__main__":
+    main()
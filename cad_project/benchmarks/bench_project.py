@@ -0,0 +1,64 @@
+# bench_project.py
+"""
+Benchmark de guardado y apertura de proyectos .cadp grandes
+
+Uso: python benchmarks/bench_project.py [ruta temporal]
+"""
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from camera import translation_matrix
+from mesh import Mesh
+from project_file import ProjectFile, save_project
+from scene import Scene, Body
+from sketch import Sketch
+
+
+def build_scene(bodies, vertices, rng):
+    scene = Scene()
+    for index in range(bodies):
+        positions = rng.normal(size=(vertices, 3)).astype(np.float32)
+        normals = positions / np.linalg.norm(positions, axis=1, keepdims=True)
+        triangles = rng.integers(0, vertices, (vertices, 3)).astype(np.uint32)
+        scene.add(Body(Mesh(positions, normals, triangles), translation_matrix(2 * index, 0, 0)))
+    return scene
+
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(tempfile.gettempdir(), "bench.cadp")
+    rng = np.random.default_rng(0)
+    sketch = Sketch()
+    points = rng.uniform(-100, 100, (200_000, 2))
+    sketch.load_arrays(points, np.arange(200_000).reshape(-1, 2))
+    scene = build_scene(40, 300_000, rng)
+
+    start = time.perf_counter()
+    save_project(path, sketch.store, scene.bodies)
+    save_s = time.perf_counter() - start
+    size_mb = os.path.getsize(path) / 1e6
+
+    start = time.perf_counter()
+    project = ProjectFile(path)
+    loaded = Sketch()
+    loaded.load_arrays(*project.sketch_arrays())
+    bodies = [Body(record.mesh(), record.transform, record.color, record.name, bounds=record.bounds)
+              for record in project.bodies]
+    open_s = time.perf_counter() - start
+
+    # Leer un cuerpo completo: solo sus páginas pasan a memoria
+    start = time.perf_counter()
+    checksum = float(bodies[0].mesh.vertices.sum())
+    touch_ms = (time.perf_counter() - start) * 1000
+    print(f"{size_mb:.0f} MB: guardar {save_s:.2f} s, abrir {open_s * 1000:.1f} ms, "
+          f"leer un cuerpo {touch_ms:.1f} ms ({checksum:.1f})")
+    del bodies, project
+    os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
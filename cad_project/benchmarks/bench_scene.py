@@ -0,0 +1,49 @@
+# bench_scene.py
+"""
+Benchmark del recorte contra el frustum con escenas de miles de cuerpos
+(solo CPU, no necesita contexto de OpenGL)
+
+Uso: python benchmarks/bench_scene.py
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from camera import Camera, translation_matrix
+from extrusion import extrude_geometry
+from scene import Scene, Body
+
+
+def unit_box():
+    geometry = {'points': np.array([[0, 0], [1, 0], [1, 1], [0, 1]], dtype=np.float64),
+                'edges': np.array([[0, 1], [1, 2], [2, 3], [3, 0]])}
+    return extrude_geometry(geometry, 1.0)
+
+
+def main():
+    rng = np.random.default_rng(0)
+    mesh = unit_box()
+    camera = Camera((1600, 1000))
+    camera.set_fly_view([0, 0], [0, 0, 5])
+
+    print(f"{'cuerpos':>8} | {'cajas (ms)':>10} | {'recorte (ms)':>12} | {'visibles':>9}")
+    for count in (1_000, 10_000, 50_000):
+        scene = Scene()
+        for position in rng.uniform(-40, 40, (count, 3)):
+            scene.add(Body(mesh, translation_matrix(*position)))
+
+        start = time.perf_counter()
+        scene.world_bounds()
+        bounds_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        visible = scene.visible_bodies(camera)
+        cull_ms = (time.perf_counter() - start) * 1000
+        print(f"{count:>8} | {bounds_ms:>10.1f} | {cull_ms:>12.2f} | {len(visible):>9}")
+
+
+if __name__ == "__main__":
+    main()
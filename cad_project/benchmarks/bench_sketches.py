@@ -0,0 +1,68 @@
+# bench_sketches.py
+"""
+Benchmark de proyectos con muchos sketches en planos distintos: apertura
+sin materializar la geometría y coste de materializar solo los que caen en
+el frustum de la cámara, frente a cargarlos todos
+
+Uso: python benchmarks/bench_sketches.py [ruta temporal]
+"""
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from camera import Camera
+from project_file import ProjectFile, save_project
+from sketches import SketchCollection
+from workplane import Workplane
+
+SKETCHES = 40
+EDGES = 50_000  # Por sketch
+SPACING = 10.0  # Distancia entre planos paralelos a XZ
+
+
+def build(rng):
+    collection = SketchCollection()
+    for index in range(SKETCHES):
+        entry = collection.active if index == 0 else collection.add(Workplane.xz(-SPACING * index))
+        points = rng.uniform(-2, 2, (2 * EDGES, 2))
+        entry.sketch.load_arrays(points, np.arange(2 * EDGES).reshape(-1, 2))
+    return collection
+
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(tempfile.gettempdir(), "bench_sketches.cadp")
+    rng = np.random.default_rng(0)
+    save_project(path, build(rng), [])
+    size_mb = os.path.getsize(path) / 1e6
+
+    start = time.perf_counter()
+    collection = SketchCollection()
+    collection.load(ProjectFile(path))
+    open_ms = (time.perf_counter() - start) * 1000
+
+    # Cámara delante de los primeros planos mirando a lo largo de -y: el
+    # plano lejano (far) deja fuera al resto
+    camera = Camera((1280, 800), far=50.0)
+    camera.set_fly_view((90.0, 0.0), (0.0, 5.0, 0.0))
+    start = time.perf_counter()
+    visible = collection.visible_entries(camera)
+    for entry in visible:
+        entry.materialize()
+    visible_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    for entry in collection:
+        entry.materialize()
+    all_ms = (time.perf_counter() - start) * 1000
+    print(f"{size_mb:.0f} MB, {SKETCHES} sketches: abrir {open_ms:.1f} ms, "
+          f"{len(visible)} visibles {visible_ms:.1f} ms, todos {all_ms:.1f} ms")
+    del collection
+    os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+# bench_snap.py
+"""
+Micro-benchmark de la latencia de snap de Sketch.add_point, del snap a
+aristas (SnapEngine) y del cálculo masivo de cortes
+
+Uso: python benchmarks/bench_snap.py
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from sketch import Sketch
+from snapping import split_at_intersections
+
+
+def fill_sketch(sketch, n, rng):
+    # Densidad aproximada de un punto por celda de snap
+    side = np.sqrt(n) * sketch.snap_distance
+    coords = rng.uniform(-side / 2, side / 2, size=(n, 2))
+    sketch.store.extend_vertices(coords)
+    for i, point in enumerate(coords.tolist()):
+        sketch.point_index.insert(i, point)
+    return side
+
+
+def bench(n, queries=2000, seed=0):
+    rng = np.random.default_rng(seed)
+    sketch = Sketch()
+    side = fill_sketch(sketch, n, rng)
+    probes = rng.uniform(-side / 2, side / 2, size=(queries, 2)).tolist()
+
+    start = time.perf_counter()
+    for x, y in probes:
+        sketch.find_snap_point((x, y))
+    elapsed = time.perf_counter() - start
+    return elapsed / queries * 1e6
+
+
+def fill_segments(sketch, n, rng):
+    # Segmentos cortos al azar, con unos pocos cortes cada uno
+    side = np.sqrt(n) * 3.0
+    starts = rng.uniform(-side / 2, side / 2, size=(n, 2))
+    ends = starts + rng.uniform(-2, 2, size=(n, 2))
+    base = sketch.store.extend_vertices(np.vstack([starts, ends]))
+    sketch.store.extend_edges(np.column_stack([np.arange(n), np.arange(n, 2 * n)]) + base)
+    return side
+
+
+def bench_segments(n, queries=2000, seed=0):
+    rng = np.random.default_rng(seed)
+    sketch = Sketch()
+    side = fill_segments(sketch, n, rng)
+    probes = rng.uniform(-side / 2, side / 2, size=(queries, 2)).tolist()
+
+    start = time.perf_counter()
+    sketch.find_snap(probes[0])
+    index_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    for x, y in probes:
+        sketch.find_snap((x, y))
+    snap_us = (time.perf_counter() - start) / queries * 1e6
+
+    start = time.perf_counter()
+    _, edges = split_at_intersections(sketch.store.points, sketch.store.edges)
+    split_ms = (time.perf_counter() - start) * 1000
+    return index_ms, snap_us, split_ms, len(edges)
+
+
+def main():
+    print(f"{'puntos':>10} | {'snap (us)':>10}")
+    for n in (1_000, 100_000, 1_000_000):
+        print(f"{n:>10} | {bench(n):>10.2f}")
+
+    print()
+    print(f"{'aristas':>10} | {'índices (ms)':>12} | {'snap (us)':>10} | {'partir (ms)':>11} | {'tramos':>8}")
+    for n in (1_000, 100_000, 500_000):
+        index_ms, snap_us, split_ms, pieces = bench_segments(n)
+        print(f"{n:>10} | {index_ms:>12.1f} | {snap_us:>10.2f} | {split_ms:>11.1f} | {pieces:>8}")
+
+
+if __name__ == "__main__":
+    main()
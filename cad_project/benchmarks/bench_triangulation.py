@@ -0,0 +1,82 @@
+# bench_triangulation.py
+"""
+Benchmark de triangulate_polygon con perfiles de 100k vértices: convexo,
+cóncavo (estrella y zigzag) y con agujeros
+
+Uso: python benchmarks/bench_triangulation.py
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from triangulation import triangulate_polygon
+
+
+def ring(points, offset=0):
+    return np.arange(offset, offset + len(points))
+
+
+def circle(n, radius=1.0, center=(0.0, 0.0)):
+    angles = np.linspace(0, 2 * np.pi, n, endpoint=False)
+    return np.column_stack([center[0] + radius * np.cos(angles),
+                            center[1] + radius * np.sin(angles)])
+
+
+def star(n):
+    points = circle(n)
+    points[1::2] *= 0.5
+    return points
+
+
+def noisy_circle(n, seed=0):
+    rng = np.random.default_rng(seed)
+    points = circle(n)
+    return points * rng.uniform(0.9, 1.1, n)[:, None]
+
+
+def zigzag(n):
+    teeth = n // 2
+    x = np.linspace(0, 1, teeth)
+    top = np.column_stack([x, 1 + 0.5 * (np.arange(teeth) % 2)])[::-1]
+    bottom = np.column_stack([x, -0.5 * (np.arange(teeth) % 2)])
+    return np.concatenate([bottom, top])
+
+
+def with_holes(n, holes_per_side=20):
+    outer = circle(n // 2, radius=10.0)
+    hole_size = (n - len(outer)) // holes_per_side ** 2
+    parts, hole_rings = [outer], []
+    offset = len(outer)
+    for cx in np.linspace(-5, 5, holes_per_side):
+        for cy in np.linspace(-5, 5, holes_per_side):
+            hole = circle(hole_size, radius=0.1, center=(cx, cy))[::-1]
+            parts.append(hole)
+            hole_rings.append(ring(hole, offset))
+            offset += len(hole)
+    return np.concatenate(parts), ring(outer), hole_rings
+
+
+def main():
+    n = 100_000
+    cases = {
+        'circulo': (circle(n), None, ()),
+        'circulo con ruido': (noisy_circle(n), None, ()),
+        'estrella': (star(n), None, ()),
+        'zigzag': (zigzag(n), None, ()),
+        'con agujeros': with_holes(n),
+    }
+    print(f"{'perfil':>18} | {'vértices':>9} | {'tiempo (ms)':>12} | {'triángulos':>11}")
+    for name, (points, outer, holes) in cases.items():
+        if outer is None:
+            outer = ring(points)
+        start = time.perf_counter()
+        triangles = triangulate_polygon(points, outer, holes)
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"{name:>18} | {len(points):>9} | {elapsed:>12.1f} | {len(triangles):>11}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,267 @@
+# bvh.py
+"""
+Jerarquía de volúmenes envolventes (BVH) para consultas de rayos y de
+proximidad sobre segmentos 2D y triángulos 3D
+"""
+import numpy as np
+
+LEAF_SIZE = 8
+
+
+def _spread_bits(values, bits, dims):
+    """
+    Intercala ceros entre los bits de `values` para los códigos de Morton
+    """
+    result = np.zeros_like(values)
+    for bit in range(bits):
+        result |= ((values >> bit) & 1) << (bit * dims)
+    return result
+
+
+def morton_codes(points):
+    """
+    Código de Morton de cada punto (N, 2) o (N, 3) dentro de su caja
+    """
+    dims = points.shape[1]
+    bits = 21 if dims == 3 else 31
+    low = points.min(axis=0)
+    extent = np.maximum(points.max(axis=0) - low, 1e-300)
+    scaled = ((points - low) / extent * ((1 << bits) - 1)).astype(np.int64)
+    codes = np.zeros(len(points), dtype=np.int64)
+    for axis in range(dims):
+        codes |= _spread_bits(scaled[:, axis], bits, dims) << axis
+    return codes
+
+
+class BVH:
+    """
+    BVH lineal: las primitivas se ordenan por código de Morton, se agrupan
+    en hojas de `leaf_size` y cada nivel superior une pares de nodos del
+    nivel inferior. El árbol queda implícito en arreglos por nivel (los
+    hijos del nodo j son 2j y 2j + 1), así que construirlo y recorrerlo
+    son operaciones vectorizadas.
+    """
+
+    def __init__(self, mins, maxs, leaf_size=LEAF_SIZE):
+        mins = np.asarray(mins, dtype=np.float64)
+        maxs = np.asarray(maxs, dtype=np.float64)
+        self.count = len(mins)
+        self.leaf_size = leaf_size
+        self.levels = []  # (mins, maxs) de la raíz a las hojas
+        self._rank = None  # Posición de cada primitiva en `order`
+        if not self.count:
+            self.order = np.zeros(0, dtype=np.int64)
+            return
+
+        self.order = np.argsort(morton_codes(0.5 * (mins + maxs)), kind='stable')
+        starts = np.arange(0, self.count, leaf_size)
+        level = (np.minimum.reduceat(mins[self.order], starts),
+                 np.maximum.reduceat(maxs[self.order], starts))
+        self.levels.append(level)
+        while len(level[0]) > 1:
+            low, high = level
+            if len(low) % 2:
+                low = np.vstack([low, low[-1:]])
+                high = np.vstack([high, high[-1:]])
+            level = (np.minimum(low[0::2], low[1::2]), np.maximum(high[0::2], high[1::2]))
+            self.levels.append(level)
+        self.levels.reverse()
+
+    def candidates(self, box_test):
+        """
+        Primitivas cuyas hojas pasan `box_test(mins, maxs) -> máscara` en
+        todos los niveles; se visitan solo los hijos de los nodos aceptados
+        """
+        if not self.count:
+            return self.order
+        frontier = np.zeros(1, dtype=np.int64)
+        for depth, (low, high) in enumerate(self.levels):
+            if depth:
+                frontier = np.concatenate([2 * frontier, 2 * frontier + 1])
+                frontier = frontier[frontier < len(low)]
+            frontier = frontier[box_test(low[frontier], high[frontier])]
+            if not len(frontier):
+                return frontier
+
+        # Hojas aceptadas -> primitivas
+        starts = frontier * self.leaf_size
+        sizes = np.minimum(starts + self.leaf_size, self.count) - starts
+        offsets = np.arange(sizes.sum()) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+        return self.order[np.repeat(starts, sizes) + offsets]
+
+    def expand(self, primitives, mins, maxs):
+        """
+        Agranda las cajas de las hojas de `primitives` y de sus ancestros
+        para que contengan las cajas (mins, maxs). Las consultas siguen
+        siendo correctas, aunque con más candidatos, sin reconstruir.
+        """
+        if not self.count or not len(primitives):
+            return
+        if self._rank is None:
+            self._rank = np.empty(self.count, dtype=np.int64)
+            self._rank[self.order] = np.arange(self.count)
+        nodes = self._rank[primitives] // self.leaf_size
+        low, high = mins, maxs
+        for level_low, level_high in reversed(self.levels):
+            np.minimum.at(level_low, nodes, low)
+            np.maximum.at(level_high, nodes, high)
+            low, high = level_low[nodes], level_high[nodes]
+            nodes = nodes // 2
+
+    def ray_candidates(self, origin, direction, t_max=np.inf):
+        origin = np.asarray(origin, dtype=np.float64)
+        direction = np.asarray(direction, dtype=np.float64)
+        return self.candidates(lambda low, high: ray_box_mask(origin, direction, low, high, t_max))
+
+    def point_candidates(self, point, radius=0.0):
+        point = np.asarray(point, dtype=np.float64)
+        return self.candidates(
+            lambda low, high: ((low - radius <= point) & (point <= high + radius)).all(axis=1))
+
+
+class IncrementalBVH:
+    """
+    BVH sobre primitivas que se añaden al final (aristas del sketch). Las
+    añadidas desde la última construcción quedan en una lista pendiente que
+    se revisa por fuerza bruta; cuando crece más de `rebuild_fraction` del
+    árbol se reconstruye todo. sync() recibe cuántas primitivas del
+    principio siguen igual (GeometryStore.retained_since): el árbol solo
+    confía en sus primeras `valid_count` y el resto va a la lista
+    pendiente. Las que se mueven (expand) agrandan sus cajas hasta que son
+    demasiadas y toca reconstruir.
+    """
+
+    def __init__(self, bounds_fn, rebuild_fraction=0.25, min_pending=1024):
+        self.bounds_fn = bounds_fn  # (inicio, fin) -> (mins, maxs)
+        self.rebuild_fraction = rebuild_fraction
+        self.min_pending = min_pending
+        self.tree = BVH(np.zeros((0, 2)), np.zeros((0, 2)))
+        self.built_count = 0
+        self.valid_count = 0  # Primitivas del árbol que siguen vigentes
+        self.count = 0
+        self.topology = None  # Del almacenamiento en el último sync
+        self.stale = False  # Cajas demasiado holgadas tras expand()
+        self.pending = (np.zeros((0, 2)), np.zeros((0, 2)))
+        self.expanded = 0  # Primitivas movidas desde la última construcción
+        self.rebuilds = 0
+
+    def sync(self, count, retained, topology):
+        """
+        Pone el árbol al día con `count` primitivas de las que las primeras
+        `retained` no cambiaron desde el sync anterior
+        """
+        if topology == self.topology and count == self.count and not self.stale:
+            return
+        self.valid_count = min(self.valid_count, retained, count)
+        if self.stale or count - self.valid_count > max(self.min_pending,
+                                                        self.rebuild_fraction * self.valid_count):
+            self._rebuild(count)
+        else:
+            self.pending = self.bounds_fn(self.valid_count, count)
+            self.count = count
+        self.topology = topology
+
+    def _rebuild(self, count):
+        self.tree = BVH(*self.bounds_fn(0, count))
+        self.built_count = self.valid_count = self.count = count
+        self.pending = self.bounds_fn(count, count)
+        self.expanded = 0
+        self.stale = False
+        self.rebuilds += 1
+
+    def expand(self, indices, mins, maxs):
+        """
+        Primitivas `indices` con cajas nuevas (mins, maxs)
+        """
+        indices = np.asarray(indices, dtype=np.int64)
+        in_tree = indices < self.valid_count
+        self.tree.expand(indices[in_tree], mins[in_tree], maxs[in_tree])
+        pending = indices[~in_tree] - self.valid_count
+        self.pending[0][pending] = mins[~in_tree]
+        self.pending[1][pending] = maxs[~in_tree]
+        self.expanded += int(in_tree.sum())
+        if self.expanded > max(self.min_pending, self.rebuild_fraction * self.valid_count):
+            self.stale = True  # Reconstruir en el próximo sync
+
+    def candidates(self, box_test):
+        found = self.tree.candidates(box_test)
+        if self.valid_count < self.built_count:
+            found = found[found < self.valid_count]
+        low, high = self.pending
+        if len(low):
+            extra = self.valid_count + np.flatnonzero(box_test(low, high))
+            found = np.concatenate([found, extra])
+        return found
+
+    def point_candidates(self, point, radius=0.0):
+        point = np.asarray(point, dtype=np.float64)
+        return self.candidates(
+            lambda low, high: ((low - radius <= point) & (point <= high + radius)).all(axis=1))
+
+
+def ray_box_mask(origin, direction, mins, maxs, t_max=np.inf):
+    """
+    Prueba de losas: cajas (N, D) que el rayo corta con 0 <= t <= t_max
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        inverse = 1.0 / direction
+        t1 = (mins - origin) * inverse
+        t2 = (maxs - origin) * inverse
+    # Componentes nulas de la dirección: el origen debe estar en la losa
+    t_near = np.where(np.isnan(t1), -np.inf, np.minimum(t1, t2)).max(axis=1)
+    t_far = np.where(np.isnan(t2), np.inf, np.maximum(t1, t2)).min(axis=1)
+    return (t_near <= t_far) & (t_far >= 0.0) & (t_near <= t_max)
+
+
+def ray_triangles(origin, direction, v0, v1, v2, epsilon=1e-12):
+    """
+    Möller-Trumbore vectorizado: parámetro t del corte con cada triángulo
+    (inf si no lo corta)
+    """
+    edge1 = v1 - v0
+    edge2 = v2 - v0
+    p = np.cross(direction, edge2)
+    determinant = np.einsum('ij,ij->i', edge1, p)
+    valid = np.abs(determinant) > epsilon
+    inverse = np.where(valid, 1.0 / np.where(valid, determinant, 1.0), 0.0)
+    s = origin - v0
+    u = np.einsum('ij,ij->i', s, p) * inverse
+    q = np.cross(s, edge1)
+    v = (q @ direction) * inverse
+    t = np.einsum('ij,ij->i', edge2, q) * inverse
+    hit = valid & (u >= 0) & (v >= 0) & (u + v <= 1) & (t >= 0)
+    return np.where(hit, t, np.inf)
+
+
+def point_segment_distance(point, starts, ends):
+    """
+    Distancia de `point` a cada segmento y el parámetro [0, 1] del punto
+    más cercano
+    """
+    direction = ends - starts
+    length2 = np.einsum('ij,ij->i', direction, direction)
+    t = np.einsum('ij,ij->i', point - starts, direction) / np.where(length2 > 0, length2, 1.0)
+    t = np.clip(t, 0.0, 1.0)
+    closest = starts + t[:, None] * direction
+    return np.linalg.norm(closest - point, axis=1), t
+
+
+class Pick:
+    """
+    Resultado de CADSystem.pick: qué hay bajo el cursor
+    kind: 'vertex' o 'segment' del sketch, o 'face' de un cuerpo
+    index: índice del vértice, arista o triángulo
+    point: punto de mundo (x, y, z) del acierto
+    distance: distancia desde la cámara a lo largo del rayo
+    """
+
+    def __init__(self, kind, index, point, distance, body=None):
+        self.kind = kind
+        self.index = int(index)
+        self.point = tuple(float(value) for value in point)
+        self.distance = float(distance)
+        self.body = body
+
+    def __repr__(self):
+        owner = f", body={self.body.name!r}" if self.body is not None else ""
+        return f"Pick({self.kind!r}, {self.index}{owner}, distance={self.distance:.3f})"
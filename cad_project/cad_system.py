@@ -3,20 +3,58 @@ import pygame
 from OpenGL.GL import *
 from OpenGL.GLUT import *
 from OpenGL.GLU import *
-from sketch import Sketch
+from sketches import SketchCollection
+from workplane import Workplane
+from grid import SketchPlaneGrid
+from camera import Camera
+from input_stage import InputStage, ReplayInputStage, save_event_log
+from frame_scheduler import FrameScheduler
+from extrusion import extrude_geometry
+from scene import Scene, Body
+from bvh import Pick
+from lod import pixels_per_unit
+from project_file import ProjectFile, save_project
+from mesh_export import export_mesh_file
+from importers import import_drawing
+from profiler import get_profiler
 from ui.cad_ui import CADUserInterface
+from ui.overlay import UIOverlay
+from ui.fonts import clear_fonts
+from ui.hud import PerformanceHUD
 import math
+import os
+import sys
 import numpy as np
 
+DEFAULT_PROJECT_PATH = "proyecto.cadp"
+DEFAULT_PROFILE_PATH = "perfil.csv"
+# Módulos cuyas llamadas a OpenGL cuenta el profiler
+PROFILED_GL_MODULES = ('cad_system', 'renderer', 'scene', 'grid', 'sketch', 'sketches', 'ui.overlay')
+# Teclas que mueven la cámara o el zoom mientras se mantienen pulsadas
+CAMERA_KEYS = (pygame.K_w, pygame.K_s, pygame.K_a, pygame.K_d,
+               pygame.K_PLUS, pygame.K_KP_PLUS, pygame.K_MINUS, pygame.K_KP_MINUS)
+# Ctrl+1/2/3: sketch nuevo en el plano XY, XZ o YZ
+NEW_SKETCH_KEYS = {pygame.K_1: Workplane.xy, pygame.K_2: Workplane.xz, pygame.K_3: Workplane.yz}
+
 
 class CADSystem:
-    def __init__(self, display_size=(1600, 1000)):
+    def __init__(self, display_size=(1600, 1000), headless=False):
         # Inicialización de pygame y OpenGL
         pygame.init()
         self.display = display_size
-        # Create both OpenGL and standard surfaces
-        pygame.display.set_mode(display_size, pygame.OPENGL | pygame.DOUBLEBUF)
-        self.ui_surface = pygame.Surface(display_size, pygame.SRCALPHA)
+        self.headless = headless
+        if headless:
+            # Contexto fuera de pantalla; el módulo headless debe haberse
+            # importado antes que OpenGL
+            from headless import OffscreenContext
+            self.gl_context = OffscreenContext(*display_size)
+        else:
+            self.gl_context = None
+            # Create both OpenGL and standard surfaces
+            pygame.display.set_mode(display_size, pygame.OPENGL | pygame.DOUBLEBUF)
+        # La UI se dibuja en una superficie que se sube a una textura
+        self.ui_overlay = UIOverlay(*display_size)
+        self.ui_surface = self.ui_overlay.surface
 
         #self.screen = pygame.display.set_mode(display_size, pygame.OPENGL | pygame.DOUBLEBUF)
 
@@ -31,21 +69,42 @@ class CADSystem:
         self.mouse_speed = 0.2
         self.sketch_zoom = 5.0
         self.sketch_zoom_speed = 0.3
+        # Matrices de vista y proyección mantenidas en CPU
+        self.camera = Camera(display_size)
 
         # Configuración inicial de OpenGL
         self.setup_opengl()
 
         # Estado del sistema
         self.sketch_mode = False
-        self.current_sketch = Sketch()
+        # Sketches, cada uno en su plano de trabajo; se edita el activo
+        self.sketches = SketchCollection()
+        self.last_extrusion = None  # Última malla generada por perform_extrusion
+        self.scene = Scene()  # Sólidos resultantes de las extrusiones
+        self.sketch_grid = SketchPlaneGrid()
+        self.project_path = None  # Archivo .cadp abierto o guardado por última vez
+        self.project = None  # ProjectFile abierto (mmap), si lo hay
+        self.pick_tolerance = 6  # Píxeles de holgura al seleccionar entidades del sketch
         self.last_mouse_pos = (display_size[0] // 2, display_size[1] // 2)
         self.drawing = False  # Add flag for line drawing
+        # Recoge los eventos de cada cuadro fusionando movimientos de ratón
+        self.input_stage = InputStage()
+        self.event_log_path = None  # Destino de los eventos grabados
+        # Ritmo de cuadros y renderizado solo cuando algo cambia
+        self.frame_scheduler = FrameScheduler(target_fps=60, on_demand=True)
+        self.log_frame_stats = False  # Imprimir tiempos por cuadro cada segundo
+        # Instrumentación: tiempos por bloque y recuentos en un búfer circular
+        self.profiler = get_profiler()
+        self.profile_path = None  # Volcado al salir, si se pidió
+        self.hud = PerformanceHUD(display_size)
+        self.show_hud = False
 
         # Inicializar UI
         self.ui = CADUserInterface(self, display_size)
 
         # Variables de debug
         self.debug = True
+        self.debug_input = False  # Traza de coordenadas en screen_to_world
         self.last_world_pos = None
 
         # Ajustar valores iniciales para mejor control de zoom
@@ -54,6 +113,35 @@ class CADSystem:
         self.min_zoom = 2.0  # Zoom mínimo (más cerca)
         self.max_zoom = 200.0  # Zoom máximo (más lejos)
 
+    @property
+    def current_sketch(self):
+        """
+        Sketch activo (se materializa si venía de un proyecto)
+        """
+        return self.sketches.active_sketch
+
+    @property
+    def active_workplane(self):
+        return self.sketches.active.workplane
+
+    def new_sketch(self, workplane=None, name=None):
+        """
+        Crea un sketch vacío sobre `workplane` (por defecto z = 0) y lo
+        activa. Retorna su SketchEntry.
+        """
+        self.drawing = False
+        entry = self.sketches.add(workplane, name)
+        self.update_sketch_camera()
+        return entry
+
+    def activate_sketch(self, index):
+        self.drawing = False
+        entry = self.sketches.activate(index)
+        self.update_sketch_camera()
+        if self.debug:
+            print(f"Active sketch: {entry.name}")
+        return entry
+
     def setup_opengl(self):
         glEnable(GL_DEPTH_TEST)
         glEnable(GL_LIGHTING)
@@ -70,50 +158,73 @@ class CADSystem:
         self.setup_perspective()
 
     def setup_perspective(self):
-        glMatrixMode(GL_PROJECTION)
-        glLoadIdentity()
-        gluPerspective(45, (self.display[0] / self.display[1]), 0.1, 50.0)
-        glMatrixMode(GL_MODELVIEW)
+        self.camera.set_perspective(45, (self.display[0] / self.display[1]), 0.1, 50.0)
+        self.camera.load_projection()
 
     def screen_to_world(self, screen_x, screen_y):
-        # Añadir print para debug
-        print(f"Screen coordinates: {screen_x}, {screen_y}")
-        viewport = glGetIntegerv(GL_VIEWPORT)
-        modelview = glGetDoublev(GL_MODELVIEW_MATRIX)
-        projection = glGetDoublev(GL_PROJECTION_MATRIX)
+        if self.debug_input:
+            print(f"Screen coordinates: {screen_x}, {screen_y}")
 
-        win_y = viewport[3] - screen_y
-
-        try:
-            near_point = gluUnProject(float(screen_x), float(win_y), 0.0,
-                                modelview, projection, viewport)
-            far_point = gluUnProject(float(screen_x), float(win_y), 1.0,
-                                modelview, projection, viewport)
-
-            ray_direction = np.array(far_point) - np.array(near_point)
-            ray_direction = ray_direction / np.linalg.norm(ray_direction)
-
-            # Calculate intersection with sketch plane (z = 0)
-            if abs(ray_direction[2]) > 1e-6:  # Avoid division by zero
-                t = -near_point[2] / ray_direction[2]
-                intersection = np.array(near_point) + t * ray_direction
-                return (float(intersection[0]), float(intersection[1]))
+        # Desproyección con las matrices de la cámara, sin consultas a
+        # OpenGL, al plano del sketch activo (en sus coordenadas)
+        intersection = self.camera.unproject_to_plane(screen_x, screen_y, self.active_workplane)[0]
+        if np.isnan(intersection[0]):
             return None
+        return (float(intersection[0]), float(intersection[1]))
 
-        except Exception as e:
-            print(f"Error in screen_to_world: {e}")
-            return None
+    def screen_to_world_batch(self, screen_points):
+        """
+        Desproyecta un lote (N, 2) de puntos de pantalla al plano del
+        sketch activo
+        """
+        screen_points = np.asarray(screen_points, dtype=np.float64).reshape(-1, 2)
+        return self.camera.unproject_to_plane(screen_points[:, 0], screen_points[:, 1],
+                                              self.active_workplane)
+
+    def pick(self, screen_x, screen_y):
+        """
+        Entidad bajo el punto de pantalla: vértice o arista del sketch
+        activo (en su plano) o triángulo de un cuerpo de la escena, el más
+        cercano a la cámara. Retorna un bvh.Pick o None.
+        """
+        origin, direction = self.camera.screen_rays(screen_x, screen_y)
+        origin, direction = origin[0], direction[0]
+        best = None
+        if not self.sketch_mode:
+            hit = self.scene.pick(origin, direction)
+            if hit is not None:
+                t, body, triangle = hit
+                best = Pick('face', triangle, origin + t * direction, t, body)
+
+        workplane = self.active_workplane
+        t, local = workplane.intersect(origin, direction)
+        t = t[0]
+        if t >= 0 and (best is None or t < best.distance):
+            point = origin + t * direction
+            # Holgura en unidades de mundo a la distancia del plano
+            depth = np.linalg.norm(point - self.camera.eye)
+            radius = self.pick_tolerance * depth / pixels_per_unit(self.camera.fovy, self.camera.viewport[1])
+            found = self.current_sketch.pick(local[0], radius)
+            if found is not None:
+                kind, index, position = found
+                best = Pick(kind, index, tuple(workplane.to_world(position)[0].tolist()), t)
+        return best
 
     def handle_sketch_input(self, event):
+        """
+        Procesa eventos de dibujo; run() ya los pasó antes por la UI
+        """
         if not self.sketch_mode:
             return
         if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
-            if not self.ui.handle_event(event):  # Only draw if not interacting with UI
-                world_pos = self.screen_to_world(*event.pos)
-                if world_pos:
-                    self.drawing = True
-                    self.current_sketch.start_line(world_pos)
-                    self.last_world_pos = world_pos
+            world_pos = self.screen_to_world(*event.pos)
+            if world_pos:
+                self.drawing = True
+                # Con Shift pulsado sobre un vértice se arrastra el vértice
+                keys = self.input_stage.key_state()
+                drag = keys[pygame.K_LSHIFT] or keys[pygame.K_RSHIFT]
+                self.current_sketch.start_line(world_pos, drag=drag)
+                self.last_world_pos = world_pos
 
         elif event.type == pygame.MOUSEBUTTONUP and event.button == 1:
             if self.drawing:
@@ -129,7 +240,7 @@ class CADSystem:
                 self.current_sketch.update_current_line(world_pos)
 
     def handle_keyboard(self):
-        keys = pygame.key.get_pressed()
+        keys = self.input_stage.key_state()
 
         if self.sketch_mode:
             # Manejar zoom en modo sketch
@@ -167,74 +278,36 @@ class CADSystem:
         self.camera_pos[2] += direction[2] * self.move_speed
 
     def handle_mouse_motion(self):
-        if not self.sketch_mode and pygame.mouse.get_focused():
-            current_pos = pygame.mouse.get_pos()
+        if not self.sketch_mode and self.input_stage.mouse_focused():
+            current_pos = self.input_stage.mouse_position()
             dx = current_pos[0] - self.last_mouse_pos[0]
             dy = current_pos[1] - self.last_mouse_pos[1]
 
             self.camera_rot[0] = (self.camera_rot[0] + dy * self.mouse_speed) % 360
             self.camera_rot[1] = (self.camera_rot[1] + dx * self.mouse_speed) % 360
 
-            pygame.mouse.set_pos(self.last_mouse_pos)
+            self.input_stage.warp_mouse(self.last_mouse_pos)
 
     def draw_sketch_plane(self):
+        with self.profiler.scope('sketch_plane'):
+            self._draw_sketch_plane()
+
+    def _draw_sketch_plane(self):
         glDisable(GL_LIGHTING)
 
          # Dibujar el plano base con transparencia
         glEnable(GL_BLEND)
         glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
 
-        if self.sketch_mode:
-            # En modo sketch, hacer el plano más sutil
-            glColor4f(0.3, 0.3, 0.3, 0.1)
-        else:
-            # En modo normal, plano más visible
-            glColor4f(0.2, 0.2, 0.2, 0.3)
-
-
-        # Plano base
-
-        glBegin(GL_QUADS)
-        glColor4f(0.2, 0.2, 0.2, 0.3)
-        size = 10
-        glVertex3f(-size, -size, 0)
-        glVertex3f(size, -size, 0)
-        glVertex3f(size, size, 0)
-        glVertex3f(-size, size, 0)
-        glEnd()
-
-        # Cuadrícula
-
-        glLineWidth(1.0)
-        glBegin(GL_LINES)
-
-        if self.sketch_mode:
-            glColor3f(0.4, 0.4, 0.4)  # Gris más claro para modo sketch
-        else:
-            glColor3f(0.3, 0.3, 0.3)  # Gris normal para modo 3D
-
-        for i in range(-size, size + 1):
-            # Vertical
-            glVertex3f(float(i), float(-size), 0.01)
-            glVertex3f(float(i), float(size), 0.01)
-            # Horizontal
-            glVertex3f(float(-size), float(i), 0.01)
-            glVertex3f(float(size), float(i), 0.01)
-        glEnd()
-
-         # Ejes principales
-        glLineWidth(2.0)
-        glBegin(GL_LINES)
-
-        # Eje X en rojo
-        glColor3f(1.0, 0.0, 0.0)
-        glVertex3f(-size, 0, 0.02)
-        glVertex3f(size, 0, 0.02)
-        # Eje Y en verde
-        glColor3f(0.0, 1.0, 0.0)
-        glVertex3f(0, -size, 0.02)
-        glVertex3f(0, size, 0.02)
-        glEnd()
+        # Plano base, cuadrícula y ejes desde la display list cacheada,
+        # sobre el plano de trabajo del sketch activo
+        workplane = self.active_workplane
+        if not workplane.is_identity:
+            glPushMatrix()
+            glMultMatrixd(np.ascontiguousarray(workplane.matrix.T))
+        self.sketch_grid.draw(self.sketch_mode, self.sketch_zoom)
+        if not workplane.is_identity:
+            glPopMatrix()
 
         glDisable(GL_BLEND)
 
@@ -256,70 +329,140 @@ class CADSystem:
 
         if self.sketch_mode:
             # Configurar para modo sketch
-            pygame.mouse.set_visible(True)
-            pygame.event.set_grab(False)
+            self.input_stage.capture_mouse(False)
             glDisable(GL_LIGHTING)
             self.update_sketch_camera()
         else:
             # Configurar para modo 3D
-            pygame.mouse.set_visible(False)
-            pygame.event.set_grab(True)
+            self.input_stage.capture_mouse(True)
             glEnable(GL_LIGHTING)
-            pygame.mouse.set_pos(self.last_mouse_pos)
+            self.input_stage.warp_mouse(self.last_mouse_pos)
+            self.camera.set_fly_view(self.camera_rot, self.camera_pos)
 
         # Resetear la matriz de proyección
-        glMatrixMode(GL_PROJECTION)
-        glLoadIdentity()
-        gluPerspective(45, (self.display[0] / self.display[1]), 0.1, 50.0)
-        glMatrixMode(GL_MODELVIEW)
+        self.setup_perspective()
 
 
+    def view_state(self):
+        """
+        Estado que, si cambia, obliga a redibujar la escena
+        """
+        return (self.sketch_mode,) + self.camera_state() + (
+            self.sketches.version, self.current_sketch.store.version,
+            self.current_sketch.is_drawing, self.scene.version)
+
+    def camera_state(self):
+        return self.sketch_zoom, tuple(self.camera_pos), tuple(self.camera_rot)
+
+    def camera_keys_held(self):
+        keys = self.input_stage.key_state()
+        return any(keys[key] for key in CAMERA_KEYS)
+
     def run(self):
         try:
             running = True
+            scheduler = self.frame_scheduler
+            last_log = pygame.time.get_ticks()
+            camera_moved = False
 
             while running:
-
-                for event in pygame.event.get():
-                    if event.type == pygame.QUIT:
-                        running = False
-                    elif event.type == pygame.KEYDOWN:
-                        if event.key == pygame.K_ESCAPE:
+                scheduler.begin_frame()
+                self.profiler.begin_frame()
+
+                with scheduler.section('input'):
+                    previous_state = self.view_state()
+                    previous_camera = self.camera_state()
+
+                    # Eventos del cuadro con los movimientos de ratón ya fusionados;
+                    # sin cambios pendientes se bloquea esperando el siguiente,
+                    # salvo si la cámara se está moviendo
+                    active = camera_moved or self.camera_keys_held()
+                    with self.profiler.scope('idle'):
+                        events = self.input_stage.poll(scheduler.idle_wait_ms(active))
+                    for event in events:
+                        # En modo 3D la cámara se lee por sondeo: el movimiento
+                        # del ratón solo cuenta si cambia la vista
+                        if self.sketch_mode or event.type != pygame.MOUSEMOTION:
+                            scheduler.mark_dirty()
+
+                        if event.type == pygame.QUIT:
                             running = False
-                        elif event.key == pygame.K_TAB:
-                            self.toggle_sketch_mode()
-
-                            # Forzar actualización de la vista después del cambio de modo
-                            if self.sketch_mode:
-                                self.update_sketch_camera()
-                                glMatrixMode(GL_PROJECTION)
-                                glLoadIdentity()
-                                gluPerspective(45, (self.display[0] / self.display[1]), 0.1, 50.0)
-                                glMatrixMode(GL_MODELVIEW)
-
-                    # Manejar eventos UI solo en modo sketch
-                    if self.sketch_mode:
-                        if event.type in [pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP, pygame.MOUSEMOTION]:
-                            if self.ui.handle_event(event):
-                                continue
-                            self.handle_sketch_input(event)
-
-                    # Actualizar estado
-                if not self.sketch_mode:
-                    self.handle_keyboard()
-                    self.handle_mouse_motion()
-                else:
-                    # En modo sketch, solo manejar zoom y movimientos específicos
-                    self.handle_keyboard()
-
-                # Renderizado
-                self.render_scene()
-
-                # Forzar actualización de pantalla
-                pygame.display.flip()
-
-                # Pequeña espera para estabilizar el renderizado
-                pygame.time.wait(10)
+                        elif event.type == pygame.KEYDOWN:
+                            if event.key == pygame.K_ESCAPE:
+                                running = False
+                            elif event.key == pygame.K_s and event.mod & pygame.KMOD_CTRL:
+                                try:
+                                    self.save_project(self.project_path or DEFAULT_PROJECT_PATH)
+                                except OSError as e:
+                                    print(f"Error saving project: {e}")
+                            elif event.key == pygame.K_z and event.mod & pygame.KMOD_CTRL:
+                                if event.mod & pygame.KMOD_SHIFT:
+                                    self.current_sketch.redo()
+                                else:
+                                    self.current_sketch.undo()
+                            elif event.key == pygame.K_y and event.mod & pygame.KMOD_CTRL:
+                                self.current_sketch.redo()
+                            elif event.key in NEW_SKETCH_KEYS and event.mod & pygame.KMOD_CTRL:
+                                self.new_sketch(NEW_SKETCH_KEYS[event.key]())
+                            elif event.key == pygame.K_PAGEUP:
+                                self.activate_sketch(self.sketches.active_index - 1)
+                            elif event.key == pygame.K_PAGEDOWN:
+                                self.activate_sketch(self.sketches.active_index + 1)
+                            elif event.key == pygame.K_F3:
+                                self.toggle_hud()
+                            elif event.key == pygame.K_F4:
+                                self.dump_profile(self.profile_path or DEFAULT_PROFILE_PATH)
+                            elif event.key == pygame.K_TAB:
+                                self.toggle_sketch_mode()
+
+                                # Forzar actualización de la vista después del cambio de modo
+                                if self.sketch_mode:
+                                    self.update_sketch_camera()
+                                    self.setup_perspective()
+
+                        # Manejar eventos UI solo en modo sketch
+                        if self.sketch_mode:
+                            if event.type in [pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP, pygame.MOUSEMOTION]:
+                                if self.ui.handle_event(event):
+                                    continue
+                                self.handle_sketch_input(event)
+
+                        # Actualizar estado
+                    if not self.sketch_mode:
+                        self.handle_keyboard()
+                        self.handle_mouse_motion()
+                    else:
+                        # En modo sketch, solo manejar zoom y movimientos específicos
+                        self.handle_keyboard()
+
+                    if self.view_state() != previous_state:
+                        scheduler.mark_dirty()
+                    camera_moved = self.camera_state() != previous_camera
+                    if self.show_hud and self.hud.due():
+                        scheduler.mark_dirty()
+
+                # Renderizado solo si algo cambió
+                rendered = scheduler.should_render()
+                if rendered:
+                    with scheduler.section('render'):
+                        with self.profiler.scope('render_scene'):
+                            self.render_scene()
+
+                        # Forzar actualización de pantalla
+                        with self.profiler.scope('flip'):
+                            self.present()
+
+                scheduler.end_frame(rendered)
+                if self.profiler.enabled:
+                    self.record_frame_counts(rendered)
+                self.profiler.end_frame()
+                # Quedan niveles de detalle por calcular: otro cuadro
+                if not self.sketch_mode and self.scene.pending_lod_count:
+                    scheduler.mark_dirty()
+
+                if self.log_frame_stats and pygame.time.get_ticks() - last_log >= 1000:
+                    last_log = pygame.time.get_ticks()
+                    print(scheduler.format_stats())
 
 
         except Exception as e:
@@ -327,8 +470,108 @@ class CADSystem:
             import traceback
             traceback.print_exc()
         finally:
+            if self.profile_path and self.profiler.enabled:
+                self.dump_profile(self.profile_path)
+            if self.event_log_path and self.input_stage.recording is not None:
+                save_event_log(self.event_log_path, self.input_stage.recording)
+            if self.gl_context is not None:
+                self.gl_context.release()
+            # Las fuentes compartidas no sobreviven a pygame.quit()
+            clear_fonts()
             pygame.quit()
 
+    def enable_profiling(self, path=None):
+        """
+        Activa el registro de tiempos por cuadro; con `path` se vuelca a
+        CSV o JSON al salir de run()
+        """
+        self.profile_path = path
+        modules = [sys.modules[name] for name in PROFILED_GL_MODULES if name in sys.modules]
+        self.profiler.enable(modules)
+
+    def toggle_hud(self):
+        """
+        Muestra u oculta el panel de rendimiento (F3). Mostrarlo activa el
+        profiler; ocultarlo lo desactiva salvo que se pidiera un volcado.
+        """
+        self.show_hud = not self.show_hud
+        if self.show_hud:
+            self.enable_profiling(self.profile_path)
+        elif not self.profile_path:
+            self.profiler.disable()
+        self.frame_scheduler.mark_dirty()
+
+    def dump_profile(self, path):
+        """
+        Guarda los cuadros registrados (F4) en CSV o JSON
+        """
+        count = self.profiler.dump(path)
+        if self.debug:
+            print(f"Profile: {count} frames written to {path}")
+        return count
+
+    def record_frame_counts(self, rendered):
+        profiler = self.profiler
+        store = self.current_sketch.store
+        profiler.set('rendered', int(rendered))
+        profiler.set('vertices', store.n_vertices)
+        profiler.set('segments', store.n_edges)
+        profiler.set('sketches_loaded', self.sketches.loaded_count)
+        if rendered and not self.sketch_mode:
+            profiler.set('triangles', self.scene.triangle_count)
+            profiler.set('bodies_drawn', self.scene.drawn_count)
+        profiler.set('input_events', self.input_stage.last_received)
+
+    def hud_lines(self):
+        profiler = self.profiler
+        rendered = profiler.values('rendered') > 0
+        if not rendered.any():
+            rendered = np.ones(max(len(rendered), 1), dtype=bool)
+
+        def column(name):
+            values = profiler.values(name)
+            return values[rendered] if len(values) else np.zeros(1)
+
+        # Tiempo de trabajo: sin la espera de eventos de los cuadros ociosos
+        busy = column('frame') - column('idle')
+        render = column('render')
+        gl_calls, draw_calls = column('gl_calls'), column('draw_calls')
+        store = self.current_sketch.store
+        return [
+            f"FPS {self.frame_scheduler.stats['fps']:.0f}   cuadro p50 {np.percentile(busy, 50):.1f} ms"
+            f"  p99 {np.percentile(busy, 99):.1f} ms",
+            f"render p50 {np.percentile(render, 50):.1f} ms  p99 {np.percentile(render, 99):.1f} ms",
+            f"vértices {store.n_vertices}   aristas {store.n_edges}   sketches "
+            f"{self.sketches.drawn_count}/{len(self.sketches)} ({self.sketches.loaded_count} cargados)",
+            f"triángulos {self.scene.triangle_count}   cuerpos {self.scene.drawn_count}/{len(self.scene)}",
+            f"llamadas GL {gl_calls[-1]:.0f}   de dibujo {draw_calls[-1]:.0f}",
+        ]
+
+    def present(self):
+        """
+        Muestra el cuadro: intercambio de buffers de la ventana o, sin
+        ventana, espera a que la GPU termine
+        """
+        if self.gl_context is not None:
+            self.gl_context.swap()
+        else:
+            pygame.display.flip()
+
+    def record_events(self, path):
+        """
+        Graba los eventos de cada cuadro de run() y los guarda en `path`
+        (JSON) al salir, para reproducirlos con replay_events
+        """
+        self.input_stage.start_recording()
+        self.event_log_path = path
+
+    def replay_events(self, frames):
+        """
+        run() procesará los cuadros de eventos dados (input_stage.load_event_log)
+        en lugar de la cola de pygame y terminará al acabarse
+        """
+        self.input_stage = ReplayInputStage(frames)
+
     def render_scene(self):
         # Limpiar el buffer
         glClearColor(0.2, 0.2, 0.2, 1.0)
@@ -336,15 +579,16 @@ class CADSystem:
 
         if self.sketch_mode:
             # Configuración para modo sketch
-            glLoadIdentity()
-            glTranslatef(0, 0, -self.sketch_zoom)
+            self.camera.set_sketch_view(self.sketch_zoom, self.active_workplane)
+            self.camera.load_modelview()
 
             # Deshabilitar iluminación para el modo sketch
             glDisable(GL_LIGHTING)
 
-            # Dibujar elementos del sketch
+            # Dibujar elementos del sketch activo
             self.draw_sketch_plane()
-            self.current_sketch.draw()
+            self.sketches.active.draw()
+            self.sketches.drawn_count = 1
 
             # Configurar vista 2D para UI
             glMatrixMode(GL_PROJECTION)
@@ -355,15 +599,10 @@ class CADSystem:
             glPushMatrix()
             glLoadIdentity()
 
-            # Dibujar UI
-            self.ui_surface.fill((0, 0, 0, 0))
-            self.ui.draw(self.ui_surface)
-            surface_string = pygame.image.tostring(self.ui_surface, 'RGBA')
-
-            glEnable(GL_BLEND)
-            glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
-            glDrawPixels(self.display[0], self.display[1], GL_RGBA, GL_UNSIGNED_BYTE, surface_string)
-            glDisable(GL_BLEND)
+            # Dibujar UI: solo se suben a la textura las regiones modificadas
+            with self.frame_scheduler.section('ui'):
+                self.ui_overlay.update(self.ui)
+                self.ui_overlay.draw()
 
             # Restaurar vista 3D
             glMatrixMode(GL_PROJECTION)
@@ -372,24 +611,92 @@ class CADSystem:
             glPopMatrix()
         else:
             # Modo 3D normal
-            glLoadIdentity()
-            glRotatef(self.camera_rot[0], 1, 0, 0)
-            glRotatef(self.camera_rot[1], 0, 1, 0)
-            glTranslatef(-self.camera_pos[0], -self.camera_pos[1], -self.camera_pos[2])
+            self.camera.set_fly_view(self.camera_rot, self.camera_pos)
+            self.camera.load_modelview()
 
             glEnable(GL_LIGHTING)
+            # Sólidos recortados contra el frustum, con nivel de detalle
+            # según su error proyectado en pantalla
+            self.scene.draw(self.camera)
             self.draw_sketch_plane()
-            self.current_sketch.draw()
+            # Sketches visibles en el frustum, cada uno en su plano
+            self.sketches.draw(self.camera)
+
+        if self.show_hud:
+            if self.hud.due():
+                self.hud.update(self.hud_lines())
+            self.hud.draw()
 
 
     def perform_extrusion(self, height):
 
         """
-        Método para realizar la extrusión del sketch actual
+        Método para realizar la extrusión del sketch actual, a lo largo de
+        la normal de su plano
         """
-        # Aquí irá la implementación de la extrusión
         print(f"Performing extrusion with height: {height}")
-        self.current_sketch.extrude(height)
+        try:
+            mesh = extrude_geometry(self.current_sketch.get_geometry(), height,
+                                    self.current_sketch.get_profiles())
+        except ValueError as e:
+            print(f"Error in extrusion: {e}")
+            return None
+        self.last_extrusion = mesh
+        self.scene.add(Body(mesh, self.active_workplane.matrix, name=f"Extrusión {len(self.scene) + 1}"))
+        if self.debug:
+            print(f"Extrusion: {mesh.vertex_count} vertices, {mesh.triangle_count} triangles")
+        return mesh
+
+    def save_project(self, path):
+        """
+        Guarda los sketches y los cuerpos de la escena en un archivo .cadp
+        """
+        # En Windows no se puede reemplazar un archivo mapeado: lo que aún
+        # se lee del proyecto abierto pasa a memoria antes
+        if self.project is not None and os.path.abspath(self.project.path) == os.path.abspath(path):
+            self.project.close()
+            self.project = None
+        save_project(path, self.sketches, self.scene.bodies)
+        self.project_path = path
+        if self.debug:
+            print(f"Project saved: {path}")
+
+    def load_project(self, path):
+        """
+        Abre un archivo .cadp. Las mallas y la geometría de los sketches
+        quedan mapeadas en memoria y solo se leen del disco las de los
+        cuerpos y sketches que se dibujan (o el sketch que se activa).
+        """
+        project = ProjectFile(path)
+        self.drawing = False
+        self.sketches.load(project)
+        self.scene.clear()
+        for record in project.bodies:
+            self.scene.add(Body(record.mesh(), record.transform, record.color,
+                                record.name, bounds=record.bounds))
+        self.last_extrusion = None
+        self.project = project
+        self.project_path = path
+        return project
+
+    def import_drawing(self, path):
+        """
+        Añade al sketch las líneas de un archivo DXF o SVG
+        """
+        count = import_drawing(self.current_sketch, path)
+        if self.debug:
+            print(f"Imported {count} edges from {path}")
+        return count
+
+    def export_bodies(self, path):
+        """
+        Exporta los cuerpos de la escena a STL u OBJ según la extensión
+        """
+        count = export_mesh_file(path, [(body.mesh, body.transform, body.name)
+                                        for body in self.scene.bodies])
+        if self.debug:
+            print(f"Exported {count} triangles to {path}")
+        return count
 
     def update_sketch_camera(self):
         # Actualizar la posición de la cámara manteniendo la vista frontal
@@ -399,6 +706,7 @@ class CADSystem:
             self.camera_pos[0] = 0
             self.camera_pos[1] = 0
             self.camera_rot = [0, 0]
+            self.camera.set_sketch_view(self.sketch_zoom, self.active_workplane)
 
     def handle_mouse_wheel(self, event):
     # Maneja el zoom con la rueda del mouse
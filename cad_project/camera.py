@@ -0,0 +1,165 @@
+# camera.py
+"""
+Cámara con las matrices de vista y proyección guardadas en CPU, para poder
+desproyectar puntos de pantalla sin consultar el estado de OpenGL
+"""
+import math
+from OpenGL.GL import *
+import numpy as np
+
+
+def perspective_matrix(fovy, aspect, near, far):
+    """
+    Equivalente a gluPerspective
+    """
+    f = 1.0 / math.tan(math.radians(fovy) / 2.0)
+    matrix = np.zeros((4, 4))
+    matrix[0, 0] = f / aspect
+    matrix[1, 1] = f
+    matrix[2, 2] = (far + near) / (near - far)
+    matrix[2, 3] = 2.0 * far * near / (near - far)
+    matrix[3, 2] = -1.0
+    return matrix
+
+
+def translation_matrix(x, y, z):
+    matrix = np.identity(4)
+    matrix[:3, 3] = (x, y, z)
+    return matrix
+
+
+def rotation_matrix(angle, x, y, z):
+    """
+    Equivalente a glRotatef (ángulo en grados, eje normalizado)
+    """
+    axis = np.array([x, y, z], dtype=np.float64)
+    axis /= np.linalg.norm(axis)
+    x, y, z = axis
+    c = math.cos(math.radians(angle))
+    s = math.sin(math.radians(angle))
+    matrix = np.identity(4)
+    matrix[:3, :3] = [
+        [x * x * (1 - c) + c, x * y * (1 - c) - z * s, x * z * (1 - c) + y * s],
+        [y * x * (1 - c) + z * s, y * y * (1 - c) + c, y * z * (1 - c) - x * s],
+        [x * z * (1 - c) - y * s, y * z * (1 - c) + x * s, z * z * (1 - c) + c],
+    ]
+    return matrix
+
+
+class Camera:
+    """
+    Guarda las matrices modelview y projection (convención de filas de
+    NumPy) y las carga en OpenGL con glLoadMatrixd. La desproyección usa la
+    inversa cacheada de projection @ modelview.
+    """
+
+    def __init__(self, viewport_size, fovy=45.0, near=0.1, far=50.0):
+        self.viewport = (int(viewport_size[0]), int(viewport_size[1]))
+        self.fovy = fovy
+        self.near = near
+        self.far = far
+        self.projection = np.identity(4)
+        self.modelview = np.identity(4)
+        self._inverse = None
+        self.set_perspective(fovy, self.viewport[0] / self.viewport[1], near, far)
+
+    # --- Actualización de matrices --------------------------------------
+
+    def set_perspective(self, fovy, aspect, near, far):
+        self.fovy, self.near, self.far = fovy, near, far
+        self.projection = perspective_matrix(fovy, aspect, near, far)
+        self._inverse = None
+
+    def set_sketch_view(self, zoom, workplane=None):
+        """
+        Vista frontal del plano z = 0 (o del plano de trabajo `workplane`,
+        mirando contra su normal y con sus ejes en pantalla) a distancia
+        `zoom`
+        """
+        if workplane is None or workplane.is_identity:
+            self.modelview = translation_matrix(0, 0, -zoom)
+        else:
+            rotation = np.identity(4)
+            rotation[:3, :3] = [workplane.x_axis, workplane.y_axis, workplane.normal]
+            eye = workplane.origin + zoom * workplane.normal
+            self.modelview = rotation @ translation_matrix(*(-eye))
+        self._inverse = None
+
+    def set_fly_view(self, rotation, position):
+        """
+        Vista libre: rotación (pitch, yaw) en grados y posición de la cámara
+        """
+        self.modelview = (rotation_matrix(rotation[0], 1, 0, 0)
+                          @ rotation_matrix(rotation[1], 0, 1, 0)
+                          @ translation_matrix(-position[0], -position[1], -position[2]))
+        self._inverse = None
+
+    def load_projection(self):
+        glMatrixMode(GL_PROJECTION)
+        glLoadMatrixd(np.ascontiguousarray(self.projection.T))
+        glMatrixMode(GL_MODELVIEW)
+
+    def load_modelview(self):
+        glMatrixMode(GL_MODELVIEW)
+        glLoadMatrixd(np.ascontiguousarray(self.modelview.T))
+
+    # --- Desproyección --------------------------------------------------
+
+    @property
+    def eye(self):
+        """
+        Posición de la cámara en coordenadas de mundo
+        """
+        rotation = self.modelview[:3, :3]
+        return -rotation.T @ self.modelview[:3, 3]
+
+    @property
+    def view_projection(self):
+        return self.projection @ self.modelview
+
+    @property
+    def inverse(self):
+        if self._inverse is None:
+            self._inverse = np.linalg.inv(self.view_projection)
+        return self._inverse
+
+    def unproject(self, screen_x, screen_y, depth):
+        """
+        Convierte lotes de coordenadas de pantalla (origen arriba a la
+        izquierda) y profundidad [0, 1] a coordenadas de mundo (N, 3)
+        """
+        screen_x = np.asarray(screen_x, dtype=np.float64).ravel()
+        screen_y = np.asarray(screen_y, dtype=np.float64).ravel()
+        width, height = self.viewport
+        ndc = np.empty((len(screen_x), 4))
+        ndc[:, 0] = 2.0 * screen_x / width - 1.0
+        ndc[:, 1] = 1.0 - 2.0 * screen_y / height
+        ndc[:, 2] = 2.0 * np.asarray(depth, dtype=np.float64) - 1.0
+        ndc[:, 3] = 1.0
+        world = ndc @ self.inverse.T
+        return world[:, :3] / world[:, 3:4]
+
+    def screen_rays(self, screen_x, screen_y):
+        """
+        Retorna (origen, dirección normalizada) de los rayos por cada punto
+        """
+        near = self.unproject(screen_x, screen_y, 0.0)
+        far = self.unproject(screen_x, screen_y, 1.0)
+        direction = far - near
+        direction /= np.linalg.norm(direction, axis=1, keepdims=True)
+        return near, direction
+
+    def unproject_to_plane(self, screen_x, screen_y, workplane=None):
+        """
+        Intersecta los rayos de los puntos de pantalla con el plano z = 0, o
+        con `workplane` dando coordenadas del sketch. Retorna un arreglo
+        (N, 2); las filas sin intersección quedan en NaN.
+        """
+        origin, direction = self.screen_rays(screen_x, screen_y)
+        if workplane is not None:
+            return workplane.intersect(origin, direction)[1]
+        result = np.full((len(origin), 2), np.nan)
+        valid = np.abs(direction[:, 2]) > 1e-6
+        t = -origin[valid, 2] / direction[valid, 2]
+        result[valid] = origin[valid, :2] + t[:, None] * direction[valid, :2]
+        return result
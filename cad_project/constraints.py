@@ -0,0 +1,675 @@
+# constraints.py
+"""
+Restricciones geométricas entre vértices del sketch y su resolución por
+mínimos cuadrados: Levenberg-Marquardt con jacobiano disperso (CSR propio)
+y gradiente conjugado, por componentes conexas
+"""
+import numpy as np
+from profiles import connected_components
+
+# Tipos de restricción
+COINCIDENT = 0  # (a, b): mismo punto
+HORIZONTAL = 1  # (a, b): misma y
+VERTICAL = 2  # (a, b): misma x
+PARALLEL = 3  # (a, b, c, d): ab paralela a cd
+PERPENDICULAR = 4  # (a, b, c, d): ab perpendicular a cd
+DISTANCE = 5  # (a, b), valor: |ab| = valor
+FIXED = 6  # (a,), valor (x, y): a en ese punto
+
+CONSTRAINT_NAMES = ('coincidente', 'horizontal', 'vertical', 'paralela',
+                    'perpendicular', 'distancia', 'fija')
+ARITY = np.array([2, 2, 2, 4, 4, 2, 1])  # Vértices de cada tipo
+EQUATIONS = np.array([2, 1, 1, 1, 1, 1, 2])  # Ecuaciones de cada tipo
+
+SOLVE_TOLERANCE = 1e-9  # Residuo máximo aceptado
+MAX_ITERATIONS = 50
+COST_TOLERANCE = 1e-8  # Mejora relativa mínima antes de darse por vencido
+LENGTH_EPSILON = 1e-12
+BLOCK_SIZE = 32  # Variables por bloque de la factorización
+MAX_BLOCK_SIZE = 2048  # Con bloques mayores se usa gradiente conjugado
+
+
+class CSRMatrix:
+    """
+    Matriz dispersa en formato CSR (indptr, indices, data) con lo que pide
+    el solver: productos J x y J^T y, y normas de columna
+    """
+
+    def __init__(self, indptr, indices, data, shape):
+        self.indptr = indptr
+        self.indices = indices
+        self.data = data
+        self.shape = shape
+        # Fila de cada elemento, para los productos con bincount
+        self._rows = np.repeat(np.arange(shape[0]), np.diff(indptr))
+
+    @classmethod
+    def from_triplets(cls, rows, columns, values, shape):
+        """
+        Construye la matriz a partir de (fila, columna, valor); los
+        elementos repetidos se suman
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        columns = np.asarray(columns, dtype=np.int64)
+        values = np.asarray(values, dtype=np.float64)
+        order = np.lexsort((columns, rows))
+        rows, columns, values = rows[order], columns[order], values[order]
+        if len(rows):
+            first = np.ones(len(rows), dtype=bool)
+            first[1:] = (rows[1:] != rows[:-1]) | (columns[1:] != columns[:-1])
+            values = np.add.reduceat(values, np.flatnonzero(first))
+            rows, columns = rows[first], columns[first]
+        indptr = np.zeros(shape[0] + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=shape[0]), out=indptr[1:])
+        return cls(indptr, columns, values, shape)
+
+    @property
+    def nnz(self):
+        return len(self.data)
+
+    def dot(self, x):
+        return np.bincount(self._rows, self.data * x[self.indices], minlength=self.shape[0])
+
+    def tdot(self, y):
+        return np.bincount(self.indices, self.data * y[self._rows], minlength=self.shape[1])
+
+    def column_norms2(self):
+        return np.bincount(self.indices, self.data ** 2, minlength=self.shape[1])
+
+    def toarray(self):
+        dense = np.zeros(self.shape)
+        np.add.at(dense, (self._rows, self.indices), self.data)
+        return dense
+
+
+def conjugate_gradient(apply, b, preconditioner, tolerance=1e-10, max_iterations=None):
+    """
+    Gradiente conjugado con precondicionador diagonal para A x = b, A
+    simétrica semidefinida positiva dada por `apply`. Partiendo de cero y
+    con b en la imagen de A converge a la solución de norma mínima.
+    """
+    x = np.zeros_like(b)
+    r = b.copy()
+    z = r / preconditioner
+    p = z.copy()
+    rz = r @ z
+    limit = tolerance * np.sqrt(b @ b)
+    for _ in range(max_iterations or 2 * len(b)):
+        if np.sqrt(r @ r) <= limit:
+            break
+        ap = apply(p)
+        curvature = p @ ap
+        if curvature <= 0:
+            break
+        alpha = rz / curvature
+        x += alpha * p
+        r -= alpha * ap
+        z = r / preconditioner
+        rz_next = r @ z
+        p = z + (rz_next / rz) * p
+        rz = rz_next
+    return x
+
+
+def vertex_levels(n_vertices, pairs):
+    """
+    Nivel de cada vértice en un recorrido en anchura desde el vértice de
+    menor grado de cada componente (todas a la vez). Los vértices de una
+    arista del grafo `pairs` están en el mismo nivel o en niveles vecinos.
+    """
+    labels = connected_components(n_vertices, pairs)
+    ends = np.concatenate([pairs[:, 0], pairs[:, 1]])
+    others = np.concatenate([pairs[:, 1], pairs[:, 0]])
+    order = np.argsort(ends, kind='stable')
+    neighbors = others[order]
+    degree = np.bincount(ends, minlength=n_vertices)
+    indptr = np.zeros(n_vertices + 1, dtype=np.int64)
+    np.cumsum(degree, out=indptr[1:])
+
+    by_component = np.lexsort((degree, labels))
+    first = np.ones(n_vertices, dtype=bool)
+    first[1:] = labels[by_component[1:]] != labels[by_component[:-1]]
+    frontier = by_component[first]
+    levels = np.full(n_vertices, -1, dtype=np.int64)
+    levels[frontier] = 0
+    seen = np.zeros(n_vertices, dtype=np.int64)
+    depth = 0
+    while len(frontier):
+        counts = degree[frontier]
+        offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        found = neighbors[np.repeat(indptr[frontier], counts) + offsets]
+        found = found[levels[found] < 0]
+        # Sin repetidos: se queda la última aparición de cada vértice
+        seen[found] = np.arange(len(found))
+        frontier = found[seen[found] == np.arange(len(found))]
+        depth += 1
+        levels[frontier] = depth
+    return levels
+
+
+class BlockSolver:
+    """
+    Resuelve (J^T J + lambda I) x = b para el jacobiano de un conjunto fijo
+    de restricciones. Los vértices se ordenan por niveles (vertex_levels) y
+    los niveles seguidos se agrupan en bloques de unas `block_size`
+    variables: cada restricción solo une un bloque consigo mismo o con el
+    siguiente, así que J^T J es tridiagonal por bloques y se factoriza con
+    Cholesky denso bloque a bloque. Una cadena larga, mal condicionada para
+    el gradiente conjugado, cuesta lo mismo que cualquier otra.
+    """
+
+    def __init__(self, n_free, vertices, block_size=BLOCK_SIZE):
+        # Grafo de los vértices libres que comparten restricción: todos los
+        # pares de cada una, no solo el primero con los demás (una paralela
+        # también acopla b, c y d entre sí y sus términos de J^T J deben
+        # caer en bloques vecinos)
+        slot_a, slot_b = np.triu_indices(vertices.shape[1], 1)
+        first = vertices[:, slot_a].ravel()
+        second = vertices[:, slot_b].ravel()
+        linked = ((first >= 0) & (second >= 0) & (first < n_free) & (second < n_free)
+                  & (first != second))
+        pairs = np.column_stack([first[linked], second[linked]])
+        levels = vertex_levels(n_free, pairs)
+
+        sizes = 2 * np.bincount(levels)
+        level_block = np.unique((np.cumsum(sizes) - sizes) // block_size, return_inverse=True)[1]
+        vertex_block = level_block.reshape(-1)[levels]
+        order = np.argsort(vertex_block, kind='stable')
+        # Posición de cada variable en el orden por bloques
+        self.position = np.empty(2 * n_free, dtype=np.int64)
+        self.position[2 * order] = 2 * np.arange(n_free)
+        self.position[2 * order + 1] = 2 * np.arange(n_free) + 1
+        self.block_sizes = 2 * np.bincount(vertex_block)
+        self.block_starts = np.cumsum(self.block_sizes) - self.block_sizes
+        self.dense = not len(self.block_sizes) or self.block_sizes.max() <= MAX_BLOCK_SIZE
+        self._pattern = None  # (estructura de J, pares y destino de cada producto)
+
+    def solve(self, jacobian, b, damping):
+        if not self.dense:
+            def normal(x):
+                return jacobian.tdot(jacobian.dot(x)) + damping * x
+            return conjugate_gradient(normal, b, jacobian.column_norms2() + damping)
+        diagonal, lower = self._blocks(jacobian, damping)
+        rhs = np.empty_like(b)
+        rhs[self.position] = b
+        x = self._cholesky_solve(diagonal, lower, rhs)
+        return x[self.position]
+
+    def _blocks(self, jacobian, damping):
+        if (self._pattern is None or not np.array_equal(self._pattern[0], jacobian.indptr)
+                or not np.array_equal(self._pattern[1], jacobian.indices)):
+            self._pattern = (jacobian.indptr, jacobian.indices) + self._block_pattern(jacobian)
+        left, right, flat_index, diagonal_offsets, lower_offsets = self._pattern[2:]
+        flat = np.bincount(flat_index, jacobian.data[left] * jacobian.data[right],
+                           minlength=lower_offsets[-1])
+        sizes = self.block_sizes
+        diagonal = [flat[diagonal_offsets[k]:diagonal_offsets[k + 1]].reshape(size, size)
+                    for k, size in enumerate(sizes.tolist())]
+        lower = [flat[lower_offsets[k]:lower_offsets[k + 1]].reshape(sizes[k + 1], sizes[k])
+                 for k in range(len(sizes) - 1)]
+        for block in diagonal:
+            block[np.diag_indices(len(block))] += damping
+        return diagonal, lower
+
+    def _block_pattern(self, jacobian):
+        # Elementos de J^T J: pares de elementos de cada fila de J, solo los
+        # que caen en un bloque diagonal o subdiagonal
+        row_counts = np.diff(jacobian.indptr)
+        element_row = jacobian._rows
+        repeat = row_counts[element_row]
+        left = np.repeat(np.arange(jacobian.nnz), repeat)
+        offsets = np.arange(len(left)) - np.repeat(np.cumsum(repeat) - repeat, repeat)
+        right = jacobian.indptr[element_row[left]] + offsets
+        i = self.position[jacobian.indices[left]]
+        j = self.position[jacobian.indices[right]]
+
+        starts, sizes = self.block_starts, self.block_sizes
+        block_i = np.searchsorted(starts, i, side='right') - 1
+        block_j = np.searchsorted(starts, j, side='right') - 1
+        keep = (block_i == block_j) | (block_i == block_j + 1)
+        left, right, i, j, block_i, block_j = (array[keep] for array in (left, right, i, j, block_i, block_j))
+        # Bloques diagonales y subdiagonales en un solo arreglo plano
+        diagonal_offsets = np.concatenate([[0], np.cumsum(sizes ** 2)])
+        lower_offsets = diagonal_offsets[-1] + np.concatenate([[0], np.cumsum(sizes[1:] * sizes[:-1])])
+        flat_index = np.where(
+            block_i == block_j,
+            diagonal_offsets[block_i] + (i - starts[block_i]) * sizes[block_i],
+            lower_offsets[np.minimum(block_j, len(sizes) - 2)] + (i - starts[block_i]) * sizes[block_j])
+        flat_index += j - starts[block_j]
+        return left, right, flat_index, diagonal_offsets, lower_offsets
+
+    def _cholesky_solve(self, diagonal, lower, b):
+        # L_kk L_kk^T = A_kk - L_k,k-1 L_k,k-1^T ;  L_k+1,k = A_k+1,k L_kk^-T
+        # Con bloques pequeños sale más barato invertir L_kk una vez que
+        # resolver con ella tres veces
+        inverses, links = [], []
+        for k, block in enumerate(diagonal):
+            if k:
+                block = block - links[-1] @ links[-1].T
+            inverse = np.linalg.inv(np.linalg.cholesky(block))
+            inverses.append(inverse)
+            if k < len(lower):
+                links.append(lower[k] @ inverse.T)
+        # Sustitución hacia delante y hacia atrás
+        starts = self.block_starts.tolist()
+        y = []
+        for k, inverse in enumerate(inverses):
+            rhs = b[starts[k]:starts[k] + len(inverse)]
+            if k:
+                rhs = rhs - links[k - 1] @ y[-1]
+            y.append(inverse @ rhs)
+        x = np.empty_like(b)
+        following = None
+        for k in range(len(inverses) - 1, -1, -1):
+            rhs = y[k] if following is None else y[k] - links[k].T @ following
+            following = inverses[k].T @ rhs
+            x[starts[k]:starts[k] + len(following)] = following
+        return x
+
+
+def evaluate(points, kinds, vertices, values, n_free=None):
+    """
+    Residuos de las restricciones y, si `n_free` no es None, su jacobiano
+    respecto a las coordenadas de los vértices 0..n_free-1 (los demás se
+    toman como fijos). `vertices` (K, 4) indexa `points`.
+    Retorna (residuos, jacobiano o None).
+    """
+    counts = EQUATIONS[kinds]
+    start = np.cumsum(counts) - counts
+    residual = np.zeros(int(counts.sum()))
+    rows, columns, derivatives = [], [], []
+
+    def term(mask, equation, slot, axis, derivative):
+        if n_free is not None:
+            rows.append(start[mask] + equation)
+            columns.append(2 * vertices[mask, slot] + axis)
+            derivatives.append(derivative)
+
+    for kind in np.unique(kinds):
+        mask = kinds == kind
+        first = start[mask]
+        a = points[vertices[mask, 0]]
+        ones = np.ones(len(first))
+        if kind in (COINCIDENT, FIXED):
+            target = points[vertices[mask, 1]] if kind == COINCIDENT else values[mask]
+            residual[first] = a[:, 0] - target[:, 0]
+            residual[first + 1] = a[:, 1] - target[:, 1]
+            term(mask, 0, 0, 0, ones)
+            term(mask, 1, 0, 1, ones)
+            if kind == COINCIDENT:
+                term(mask, 0, 1, 0, -ones)
+                term(mask, 1, 1, 1, -ones)
+        elif kind in (HORIZONTAL, VERTICAL):
+            axis = 1 if kind == HORIZONTAL else 0
+            residual[first] = a[:, axis] - points[vertices[mask, 1], axis]
+            term(mask, 0, 0, axis, ones)
+            term(mask, 0, 1, axis, -ones)
+        elif kind == DISTANCE:
+            u = points[vertices[mask, 1]] - a
+            length = np.linalg.norm(u, axis=1)
+            residual[first] = length - values[mask, 0]
+            # En longitud nula la dirección no está definida: derivada cero
+            unit = u / np.maximum(length, LENGTH_EPSILON)[:, None]
+            for axis in (0, 1):
+                term(mask, 0, 1, axis, unit[:, axis])
+                term(mask, 0, 0, axis, -unit[:, axis])
+        else:
+            u = points[vertices[mask, 1]] - a
+            v = points[vertices[mask, 3]] - points[vertices[mask, 2]]
+            if kind == PARALLEL:
+                # u x v
+                residual[first] = u[:, 0] * v[:, 1] - u[:, 1] * v[:, 0]
+                du = np.column_stack([v[:, 1], -v[:, 0]])
+                dv = np.column_stack([-u[:, 1], u[:, 0]])
+            else:
+                # u . v
+                residual[first] = (u * v).sum(axis=1)
+                du, dv = v, u
+            for axis in (0, 1):
+                term(mask, 0, 1, axis, du[:, axis])
+                term(mask, 0, 0, axis, -du[:, axis])
+                term(mask, 0, 3, axis, dv[:, axis])
+                term(mask, 0, 2, axis, -dv[:, axis])
+
+    if n_free is None:
+        return residual, None
+    rows = np.concatenate(rows) if rows else np.zeros(0, dtype=np.int64)
+    columns = np.concatenate(columns) if columns else np.zeros(0, dtype=np.int64)
+    derivatives = np.concatenate(derivatives) if derivatives else np.zeros(0)
+    free = columns < 2 * n_free
+    jacobian = CSRMatrix.from_triplets(rows[free], columns[free], derivatives[free],
+                                       (len(residual), 2 * n_free))
+    return residual, jacobian
+
+
+def levenberg_marquardt(points, kinds, vertices, values, n_free, solver=None,
+                        tolerance=SOLVE_TOLERANCE, max_iterations=MAX_ITERATIONS, damping=None):
+    """
+    Mueve los vértices 0..n_free-1 de `points` (in situ) para anular los
+    residuos. Cada paso resuelve (J^T J + lambda I) dx = -J^T r con el
+    BlockSolver. Si las restricciones no se pueden cumplir a la vez se
+    detiene en el mínimo de la suma de cuadrados. `damping` es el lambda
+    inicial (el final de un solve anterior parecido). Retorna (iteraciones,
+    residuo máximo, lambda final).
+    """
+    if solver is None:
+        solver = BlockSolver(n_free, vertices)
+    residual, jacobian = evaluate(points, kinds, vertices, values, n_free)
+    cost = residual @ residual
+    iterations = 0
+    while iterations < max_iterations:
+        if not n_free or not len(residual) or np.abs(residual).max() <= tolerance:
+            break
+        gradient = jacobian.tdot(residual)
+        if np.abs(gradient).max() <= tolerance * tolerance:
+            break  # Mínimo sin cumplir todas: restricciones en conflicto
+        iterations += 1
+        if damping is None:
+            damping = 1e-9 * max(float(jacobian.column_norms2().max()), 1.0)
+
+        step = solver.solve(jacobian, -gradient, damping)
+        # Mejora que predice el modelo lineal: si es despreciable ya se está
+        # en el mínimo (restricciones en conflicto)
+        predicted = -2.0 * (step @ gradient) - np.sum(jacobian.dot(step) ** 2)
+        if predicted <= COST_TOLERANCE * cost:
+            break
+        trial = points.copy()
+        trial[:n_free] += step.reshape(-1, 2)
+        trial_residual, _ = evaluate(trial, kinds, vertices, values)
+        trial_cost = trial_residual @ trial_residual
+        if trial_cost < cost:
+            points[:n_free] = trial[:n_free]
+            residual, jacobian = evaluate(points, kinds, vertices, values, n_free)
+            converging = cost - trial_cost > COST_TOLERANCE * cost
+            cost = trial_cost
+            damping = max(damping / 3.0, 1e-15)
+            if not converging:
+                break
+        else:
+            damping *= 4.0
+            if damping > 1e12:
+                break
+    return iterations, (float(np.abs(residual).max()) if len(residual) else 0.0), damping
+
+
+class SolveResult:
+    """
+    Resultado de ConstraintSystem.solve: si se cumplieron todas las
+    restricciones, iteraciones, residuo máximo, vértices movidos y sus
+    posiciones nuevas
+    """
+
+    def __init__(self, converged, iterations, residual, vertices, positions):
+        self.converged = converged
+        self.iterations = iterations
+        self.residual = residual
+        self.vertices = vertices
+        self.positions = positions
+
+    def __repr__(self):
+        return (f"SolveResult(converged={self.converged}, iterations={self.iterations}, "
+                f"residual={self.residual:.3g}, vertices={len(self.vertices)})")
+
+
+class Cluster:
+    """
+    Restricciones de unas componentes preparadas para resolverse muchas
+    veces (p. ej. en cada cuadro de un arrastre): numeración local con los
+    vértices libres primero y los fijados después, factorización simbólica
+    y el lambda con el que terminó el último solve
+    """
+
+    def __init__(self, system, selected, pinned):
+        self.version = system.version
+        self.selected = selected
+        self.kinds = system.kinds[selected]
+        self.values = system.values[selected]
+        constraint_vertices = system.vertices[selected]
+        used = np.unique(constraint_vertices[constraint_vertices >= 0])
+        self.pinned = np.intersect1d(pinned, used)
+        self.free = np.setdiff1d(used, self.pinned)
+        self.order = np.concatenate([self.free, self.pinned])
+        local = np.full(system.store.n_vertices + 1, -1, dtype=np.int64)  # -1 -> -1
+        local[self.order] = np.arange(len(self.order))
+        self.vertices = local[constraint_vertices]
+        self.solver = BlockSolver(len(self.free), self.vertices)
+        self.damping = None
+
+    def __len__(self):
+        return len(self.selected)
+
+
+class ConstraintSystem:
+    """
+    Restricciones sobre los vértices de un GeometryStore en arreglos
+    columnares: tipo (K,), vértices (K, 4) con -1 en los huecos y valores
+    (K, 2). Las restricciones que comparten vértices forman componentes
+    conexas que se resuelven por separado, así que mover un punto solo
+    vuelve a resolver la suya.
+
+    Como el GeometryStore, informa de cada cambio a `journal` (un History)
+    para que añadir, quitar o borrar restricciones se deshaga junto con la
+    geometría.
+    """
+
+    def __init__(self, store, capacity=64):
+        capacity = max(1, int(capacity))
+        self.store = store
+        self._kinds = np.zeros(capacity, dtype=np.int8)
+        self._vertices = np.full((capacity, 4), -1, dtype=np.int32)
+        self._values = np.zeros((capacity, 2), dtype=np.float64)
+        self.count = 0
+        self.version = 0
+        self.journal = None
+        self._labels = None  # Componente de cada vértice
+        self._labels_key = None
+        # Último Cluster resuelto, reutilizable mientras no cambien las
+        # restricciones ni los vértices fijados
+        self._cluster = None
+        self._cluster_key = None
+
+    # --- Vistas ---------------------------------------------------------
+
+    @property
+    def kinds(self):
+        return self._kinds[:self.count]
+
+    @property
+    def vertices(self):
+        return self._vertices[:self.count]
+
+    @property
+    def values(self):
+        return self._values[:self.count]
+
+    def __len__(self):
+        return self.count
+
+    # --- Modificación ---------------------------------------------------
+
+    def add(self, kind, vertices, value=(0.0, 0.0)):
+        """
+        Añade una restricción; retorna su índice
+        """
+        vertices = [int(vertex) for vertex in vertices]
+        if len(vertices) != ARITY[kind]:
+            raise ValueError(f"La restricción {CONSTRAINT_NAMES[kind]} usa {ARITY[kind]} vértices")
+        if min(vertices) < 0 or max(vertices) >= self.store.n_vertices:
+            raise IndexError("Vértice fuera del sketch")
+        index = self.count
+        self._reserve(index + 1)
+        self._kinds[index] = kind
+        self._vertices[index] = -1
+        self._vertices[index, :len(vertices)] = vertices
+        self._values[index] = np.broadcast_to(np.asarray(value, dtype=np.float64), 2)
+        self.count += 1
+        self.version += 1
+        if self.journal is not None:
+            self.journal.record_constraint_add(index)
+        return index
+
+    def coincident(self, a, b):
+        return self.add(COINCIDENT, (a, b))
+
+    def horizontal(self, a, b):
+        return self.add(HORIZONTAL, (a, b))
+
+    def vertical(self, a, b):
+        return self.add(VERTICAL, (a, b))
+
+    def parallel(self, a, b, c, d):
+        return self.add(PARALLEL, (a, b, c, d))
+
+    def perpendicular(self, a, b, c, d):
+        return self.add(PERPENDICULAR, (a, b, c, d))
+
+    def distance(self, a, b, length):
+        return self.add(DISTANCE, (a, b), length)
+
+    def fixed(self, a, point=None):
+        """
+        Fija el vértice `a` en `point` (por defecto donde está)
+        """
+        return self.add(FIXED, (a,), self.store.vertex(a) if point is None else point)
+
+    def remove(self, index):
+        if self.journal is not None:
+            self.journal.record_constraint_remove(index)
+        keep = np.arange(self.count) != index
+        count = self.count - 1
+        self._kinds[:count] = self.kinds[keep]
+        self._vertices[:count] = self.vertices[keep]
+        self._values[:count] = self.values[keep]
+        self.count = count
+        self.version += 1
+
+    def clear(self):
+        if self.journal is not None and self.count:
+            self.journal.record_constraint_clear()
+        self.count = 0
+        self.version += 1
+
+    # --- Acceso interno para el historial ---------------------------------
+
+    def _reserve(self, count):
+        capacity = len(self._kinds)
+        if count <= capacity:
+            return
+        while capacity < count:
+            capacity *= 2
+        grow = capacity - len(self._kinds)
+        self._kinds = np.concatenate([self._kinds, np.zeros(grow, dtype=self._kinds.dtype)])
+        self._vertices = np.vstack([self._vertices, np.full((grow, 4), -1, dtype=self._vertices.dtype)])
+        self._values = np.vstack([self._values, np.zeros((grow, 2))])
+
+    def _write_rows(self, start, kinds, vertices, values):
+        """
+        Escribe filas a partir de `start`; el total pasa a ser start + filas
+        """
+        count = start + len(kinds)
+        self._reserve(count)
+        self._kinds[start:count] = kinds
+        self._vertices[start:count] = vertices
+        self._values[start:count] = values
+        self.count = count
+        self.version += 1
+
+    def _insert_row(self, index, kind, vertices, value):
+        tail = slice(index, self.count)
+        self._write_rows(index, np.concatenate([[kind], self.kinds[tail]]),
+                         np.vstack([vertices, self.vertices[tail]]),
+                         np.vstack([value, self.values[tail]]))
+
+    def _truncate(self, count):
+        self.count = count
+        self.version += 1
+
+    # --- Componentes ----------------------------------------------------
+
+    def _active(self):
+        # Restricciones cuyos vértices siguen en el sketch (deshacer puede
+        # haberlos quitado)
+        vertices = self.vertices
+        return np.flatnonzero((vertices < self.store.n_vertices).all(axis=1))
+
+    def components(self):
+        """
+        Etiqueta de componente por vértice: dos vértices comparten etiqueta
+        si los une una cadena de restricciones
+        """
+        key = (self.version, self.store.n_vertices)
+        if self._labels_key != key:
+            vertices = self.vertices[self._active()]
+            # Cada vértice de la restricción se une al primero
+            first = np.repeat(vertices[:, :1], 3, axis=1)
+            pairs = np.column_stack([first.ravel(), vertices[:, 1:].ravel()])
+            pairs = pairs[pairs[:, 1] >= 0]
+            self._labels = connected_components(self.store.n_vertices, pairs)
+            self._labels_key = key
+        return self._labels
+
+    def affected(self, vertices):
+        """
+        Índices de las restricciones de las componentes que contienen
+        `vertices`
+        """
+        active = self._active()
+        labels = self.components()
+        wanted = np.unique(labels[np.asarray(vertices, dtype=np.int64).reshape(-1)])
+        first = labels[self.vertices[active, 0]]
+        return active[np.isin(first, wanted)]
+
+    # --- Resolución -----------------------------------------------------
+
+    def residuals(self):
+        active = self._active()
+        residual, _ = evaluate(self.store.points, self.kinds[active],
+                               self.vertices[active], self.values[active])
+        return residual
+
+    def cluster(self, vertices=None, pinned=()):
+        """
+        Cluster de las componentes que contienen `vertices` (todas si es
+        None) con los vértices `pinned` fijos
+        """
+        selected = self._active() if vertices is None else self.affected(vertices)
+        pinned = np.unique(np.asarray(pinned, dtype=np.int64))
+        key = (self.version, self.store.n_vertices, selected.tobytes(), pinned.tobytes())
+        if self._cluster_key != key:
+            self._cluster = Cluster(self, selected, pinned)
+            self._cluster_key = key
+        return self._cluster
+
+    def solve(self, vertices=None, pinned=(), tolerance=SOLVE_TOLERANCE,
+              max_iterations=MAX_ITERATIONS, apply=True):
+        """
+        Resuelve las componentes que contienen `vertices` (todas si es
+        None). Los vértices `pinned` no se mueven (p. ej. el que se
+        arrastra). Si `apply` escribe las posiciones nuevas en el
+        almacenamiento. Retorna un SolveResult.
+        """
+        return self.solve_cluster(self.cluster(vertices, pinned), tolerance, max_iterations, apply)
+
+    def solve_cluster(self, cluster, tolerance=SOLVE_TOLERANCE, max_iterations=MAX_ITERATIONS,
+                      apply=True, targets=None):
+        """
+        Resuelve un Cluster partiendo de las posiciones actuales y del
+        lambda de su solve anterior. `targets` son las posiciones de los
+        vértices fijados en el orden de cluster.pinned (por defecto las del
+        almacenamiento).
+        """
+        if cluster.version != self.version:
+            raise ValueError("Las restricciones cambiaron desde que se preparó el cluster")
+        free = cluster.free
+        points = self.store.points[cluster.order].copy()
+        if targets is not None:
+            points[len(free):] = np.asarray(targets, dtype=np.float64).reshape(-1, 2)
+        iterations, residual, cluster.damping = levenberg_marquardt(
+            points, cluster.kinds, cluster.vertices, cluster.values, len(free),
+            cluster.solver, tolerance, max_iterations, cluster.damping)
+
+        moved = np.flatnonzero(np.any(points[:len(free)] != self.store.points[free], axis=1))
+        result = SolveResult(residual <= tolerance, iterations, residual, free[moved], points[moved])
+        if apply and len(moved):
+            self.store.move_vertices(free[moved], points[moved])
+        return result
@@ -0,0 +1,72 @@
+# dependencies.py
+"""
+Grafo de dependencias del sketch: qué aristas y qué restricciones cuelgan
+de cada vértice
+"""
+import numpy as np
+
+
+def incidence(n_vertices, items):
+    """
+    Listas de incidencia vértice -> elemento en CSR (indptr, elementos)
+    para `items` (K, A) con índices de vértices (-1 en los huecos)
+    """
+    items = np.asarray(items)
+    items = items.reshape(-1, items.shape[-1] if items.ndim > 1 else 1)
+    owners = np.repeat(np.arange(len(items)), items.shape[1])
+    vertices = items.ravel().astype(np.int64)
+    valid = (vertices >= 0) & (vertices < n_vertices)
+    vertices, owners = vertices[valid], owners[valid]
+    order = np.argsort(vertices, kind='stable')
+    indptr = np.zeros(n_vertices + 1, dtype=np.int64)
+    np.cumsum(np.bincount(vertices, minlength=n_vertices), out=indptr[1:])
+    return indptr, owners[order]
+
+
+def gather(indptr, owners, vertices):
+    """
+    Elementos (sin repetir) incidentes a alguno de `vertices`
+    """
+    vertices = np.asarray(vertices, dtype=np.int64).reshape(-1)
+    vertices = vertices[(vertices >= 0) & (vertices < len(indptr) - 1)]
+    counts = indptr[vertices + 1] - indptr[vertices]
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    return np.unique(owners[np.repeat(indptr[vertices], counts) + offsets])
+
+
+class DependencyGraph:
+    """
+    Qué depende de cada vértice del sketch: sus aristas (cajas del BVH,
+    cortes, buffers de dibujo) y sus restricciones (solver). Las listas de
+    incidencia se rehacen solo cuando cambia la topología; mover vértices
+    no las toca, así que durante un arrastre cada consulta cuesta lo que
+    su resultado.
+    """
+
+    def __init__(self, store, constraints):
+        self.store = store
+        self.constraints = constraints
+        self._edges = None
+        self._edges_key = None
+        self._constraints = None
+        self._constraints_key = None
+
+    def edges_of(self, vertices):
+        """
+        Aristas con algún extremo en `vertices`
+        """
+        store = self.store
+        if self._edges_key != store.topology:
+            self._edges = incidence(store.n_vertices, store.edges)
+            self._edges_key = store.topology
+        return gather(*self._edges, vertices)
+
+    def constraints_of(self, vertices):
+        """
+        Restricciones que usan alguno de `vertices`
+        """
+        key = (self.constraints.version, self.store.n_vertices)
+        if self._constraints_key != key:
+            self._constraints = incidence(self.store.n_vertices, self.constraints.vertices)
+            self._constraints_key = key
+        return gather(*self._constraints, vertices)
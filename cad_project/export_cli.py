@@ -0,0 +1,50 @@
+# export_cli.py
+"""
+Exporta los cuerpos de un proyecto .cadp a STL u OBJ sin abrir ventana
+
+Uso: python export_cli.py proyecto.cadp salida.stl [--body NOMBRE ...]
+"""
+import argparse
+import sys
+import time
+from project_file import ProjectFile
+from mesh_export import export_mesh_file, CHUNK_TRIANGLES
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Exporta los cuerpos de un proyecto a STL u OBJ")
+    parser.add_argument("project", help="archivo de proyecto .cadp")
+    parser.add_argument("output", help="archivo de salida (.stl u .obj)")
+    parser.add_argument("--body", action="append", dest="bodies", metavar="NOMBRE",
+                        help="exportar solo este cuerpo (se puede repetir)")
+    parser.add_argument("--chunk", type=int, default=CHUNK_TRIANGLES,
+                        help="triángulos por bloque escrito (memoria acotada)")
+    args = parser.parse_args(argv)
+
+    try:
+        project = ProjectFile(args.project)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    records = project.bodies
+    if args.bodies:
+        records = [record for record in records if record.name in args.bodies]
+        missing = set(args.bodies) - {record.name for record in records}
+        if missing:
+            print(f"Error: cuerpos no encontrados: {', '.join(sorted(missing))}", file=sys.stderr)
+            return 1
+
+    start = time.perf_counter()
+    try:
+        count = export_mesh_file(args.output, [(record.mesh(), record.transform, record.name)
+                                               for record in records], args.chunk)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    elapsed = time.perf_counter() - start
+    print(f"{args.output}: {len(records)} cuerpos, {count} triángulos en {elapsed:.2f} s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
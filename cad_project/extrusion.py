@@ -0,0 +1,96 @@
+# extrusion.py
+"""
+Extrusión de la geometría del sketch a una malla de triángulos, con
+operaciones vectorizadas de NumPy
+"""
+import numpy as np
+from mesh import Mesh
+from profiles import build_profiles
+from triangulation import triangulate_regions
+
+
+def extrude_segments(points, segments, height):
+    """
+    Caras laterales: un quad (dos triángulos) por segmento orientado, con
+    normal hacia fuera si los ciclos están en sentido antihorario
+    """
+    count = len(segments)
+    start = points[segments[:, 0]]
+    end = points[segments[:, 1]]
+    direction = end - start
+    length = np.linalg.norm(direction, axis=1, keepdims=True)
+    length[length == 0] = 1.0
+    normal = np.column_stack([direction[:, 1], -direction[:, 0]]) / length
+
+    vertices = np.zeros((count, 4, 3))
+    vertices[:, 0, :2] = start
+    vertices[:, 1, :2] = end
+    vertices[:, 2, :2] = end
+    vertices[:, 3, :2] = start
+    vertices[:, 2:, 2] = height
+
+    normals = np.zeros((count, 4, 3))
+    normals[:, :, :2] = normal[:, None, :]
+
+    base = 4 * np.arange(count)[:, None]
+    if height >= 0:
+        quad = np.array([[0, 1, 2], [0, 2, 3]])
+    else:
+        quad = np.array([[0, 2, 1], [0, 3, 2]])
+    triangles = (base[:, None, :] + quad[None, :, :]).reshape(-1, 3)
+    return Mesh(vertices.reshape(-1, 3), normals.reshape(-1, 3), triangles)
+
+
+def extrude_caps(points, cap_triangles, height):
+    """
+    Tapas inferior (z = 0) y superior (z = height) a partir de triángulos
+    antihorarios sobre `points`
+    """
+    # Renumerar solo los vértices usados por las tapas
+    used = np.flatnonzero(np.bincount(cap_triangles.ravel(), minlength=len(points)))
+    remap = np.empty(len(points), dtype=np.int64)
+    remap[used] = np.arange(len(used))
+    local = remap[cap_triangles]
+    count = len(used)
+    up = 1.0 if height >= 0 else -1.0
+
+    vertices = np.zeros((2 * count, 3))
+    vertices[:count, :2] = points[used]
+    vertices[count:, :2] = points[used]
+    vertices[count:, 2] = height
+
+    normals = np.zeros((2 * count, 3))
+    normals[:count, 2] = -up
+    normals[count:, 2] = up
+
+    # La tapa que mira hacia -z invierte el orden de los vértices
+    if up > 0:
+        bottom, top = local[:, ::-1], local + count
+    else:
+        bottom, top = local, local[:, ::-1] + count
+    return Mesh(vertices, normals, np.concatenate([bottom, top]))
+
+
+def extrude_geometry(geometry, height, profiles=None):
+    """
+    Extruye la salida de Sketch.get_geometry() una altura `height` en z.
+    Las regiones sólidas generan tapas triangulizadas (cóncavas y con
+    agujeros); las paredes siguen la frontera entre
+    sólido y vacío, y las aristas sueltas solo generan paredes. Se pueden
+    pasar los perfiles ya calculados (Sketch.get_profiles()).
+    """
+    points = np.asarray(geometry['points'], dtype=np.float64).reshape(-1, 2)
+    edges = np.asarray(geometry['edges'], dtype=np.int64).reshape(-1, 2)
+    if not len(edges):
+        raise ValueError("No hay líneas para extruir.")
+
+    if profiles is None:
+        profiles = build_profiles(points, edges)
+    regions = profiles.solid_regions()
+
+    segments = np.concatenate([profiles.wall_segments(), profiles.loose_edges])
+    parts = [extrude_segments(points, segments, height)]
+    if regions:
+        cap_triangles = triangulate_regions(points, regions)
+        parts.append(extrude_caps(points, cap_triangles, height))
+    return Mesh.concatenate(parts)
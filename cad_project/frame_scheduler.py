@@ -0,0 +1,95 @@
+# frame_scheduler.py
+"""
+Control del ritmo de cuadros: FPS objetivo, renderizado bajo demanda y
+tiempos por etapa de cada cuadro
+"""
+import time
+from contextlib import contextmanager
+import pygame
+from profiler import get_profiler
+
+
+class FrameScheduler:
+    """
+    Limita el bucle principal a `target_fps` y, en modo bajo demanda, solo
+    pide renderizar cuando algo marcó la escena como modificada (entrada,
+    cámara o geometría). Sin cambios, el bucle se bloquea esperando eventos
+    hasta `idle_timeout_ms` en lugar de girar en vacío.
+    """
+
+    # 'ui' se mide dentro de 'render', así que render_ms lo incluye
+    SECTIONS = ('input', 'ui', 'render')
+
+    def __init__(self, target_fps=60, on_demand=True, idle_timeout_ms=100):
+        self.target_fps = target_fps
+        self.on_demand = on_demand
+        self.idle_timeout_ms = idle_timeout_ms
+        self.clock = pygame.time.Clock()
+        self.dirty = True
+        self.frame_count = 0
+        self.rendered_count = 0
+        self._frame_start = 0.0
+        self._current = {}
+        # Tiempos (ms) del último cuadro completo
+        self.stats = {name + '_ms': 0.0 for name in self.SECTIONS}
+        self.stats.update({'frame_ms': 0.0, 'fps': 0.0, 'rendered': False})
+        # Con una lista, se añade una copia de stats por cuadro (benchmarks)
+        self.history = None
+
+    def mark_dirty(self):
+        self.dirty = True
+
+    def idle_wait_ms(self, active=False):
+        """
+        Milisegundos que la etapa de entrada puede bloquearse esperando
+        eventos, o None si debe volver de inmediato. Con `active` (teclas
+        de cámara pulsadas o cámara movida en el cuadro anterior) no se
+        espera: mantener una tecla no genera eventos y el bucle quedaría a
+        1000 / idle_timeout_ms cuadros por segundo.
+        """
+        if self.on_demand and not self.dirty and not active:
+            return self.idle_timeout_ms
+        return None
+
+    def should_render(self):
+        return self.dirty or not self.on_demand
+
+    def begin_frame(self):
+        self._frame_start = time.perf_counter()
+        self._current = dict.fromkeys(self.SECTIONS, 0.0)
+
+    @contextmanager
+    def section(self, name):
+        """
+        Acumula el tiempo del bloque en la etapa `name` del cuadro actual
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = (time.perf_counter() - start) * 1000.0
+            self._current[name] = self._current.get(name, 0.0) + elapsed
+            get_profiler().add_time(name, elapsed)
+
+    def end_frame(self, rendered):
+        if rendered:
+            self.rendered_count += 1
+            self.dirty = False
+        self.frame_count += 1
+
+        for name, elapsed in self._current.items():
+            self.stats[name + '_ms'] = elapsed
+        self.stats['frame_ms'] = (time.perf_counter() - self._frame_start) * 1000.0
+        self.stats['rendered'] = rendered
+
+        # Espera el resto del presupuesto del cuadro
+        self.clock.tick(self.target_fps)
+        self.stats['fps'] = self.clock.get_fps()
+        if self.history is not None:
+            self.history.append(dict(self.stats))
+
+    def format_stats(self):
+        stats = self.stats
+        return (f"fps {stats['fps']:.1f} | frame {stats['frame_ms']:.2f} ms | "
+                f"input {stats['input_ms']:.2f} ms | ui {stats['ui_ms']:.2f} ms | "
+                f"render {stats['render_ms']:.2f} ms")
@@ -0,0 +1,287 @@
+# geometry_store.py
+"""
+Almacenamiento columnar compacto para la geometría del sketch
+"""
+import numpy as np
+
+LOG_SIZE = 256  # Entradas recordadas por moved_since() y retained_since()
+
+
+class GeometryStore:
+    """
+    Vértices en un arreglo float64 (N, 2) y aristas como pares de índices
+    int32 (M, 2). Ambos arreglos crecen duplicando su capacidad, de modo que
+    añadir elementos tiene coste amortizado O(1) y las vistas `points` y
+    `edges` se pueden pasar sin copia a NumPy u OpenGL.
+
+    Si tiene `journal` (un History) le informa de cada cambio para poder
+    deshacerlo.
+    """
+
+    def __init__(self, capacity=64):
+        capacity = max(1, int(capacity))
+        self._vertices = np.zeros((capacity, 2), dtype=np.float64)
+        self._edges = np.zeros((capacity, 2), dtype=np.int32)
+        self.n_vertices = 0
+        self.n_edges = 0
+        # `version` cambia con cualquier modificación; `generation` solo con
+        # las que cambian elementos existentes (mover, truncar, vaciar).
+        # Deshacer un añadido solo baja n_vertices / n_edges: quien guarde
+        # datos por elemento debe descartar los que queden fuera.
+        # `topology` cambia con todo salvo move_vertices, que deja los
+        # índices movidos en un registro (moved_since). Quien guarde datos
+        # por elemento y los ponga al día por el final (añadidos) pregunta
+        # con retained_since() cuántos del principio siguen valiendo: así
+        # un deshacer seguido de un añadido del mismo tamaño no pasa
+        # desapercibido.
+        self.version = 0
+        self.generation = 0
+        self.topology = 0
+        self.journal = None
+        self._moves = []  # (version, índices movidos)
+        self._moves_floor = 0  # Versión hasta la que el registro está incompleto
+        self._retained = []  # (topology, vértices, aristas conservados)
+        self._retained_floor = 0
+
+    # --- Vistas ---------------------------------------------------------
+
+    @property
+    def points(self):
+        return self._vertices[:self.n_vertices]
+
+    @property
+    def edges(self):
+        return self._edges[:self.n_edges]
+
+    def segments(self):
+        """
+        Retorna las aristas como coordenadas (M, 2, 2); esto sí crea una copia
+        """
+        return self.points[self.edges]
+
+    def vertex(self, index):
+        x, y = self._vertices[index]
+        return (float(x), float(y))
+
+    @property
+    def nbytes(self):
+        return self._vertices.nbytes + self._edges.nbytes
+
+    # --- Crecimiento ----------------------------------------------------
+
+    @staticmethod
+    def _grow(array, required):
+        capacity = len(array)
+        if required <= capacity:
+            return array
+        while capacity < required:
+            capacity *= 2
+        grown = np.zeros((capacity,) + array.shape[1:], dtype=array.dtype)
+        grown[:len(array)] = array
+        return grown
+
+    def reserve(self, n_vertices=0, n_edges=0):
+        self._vertices = self._grow(self._vertices, n_vertices)
+        self._edges = self._grow(self._edges, n_edges)
+
+    # --- Modificación ---------------------------------------------------
+
+    def add_vertex(self, point):
+        index = self.n_vertices
+        self._vertices = self._grow(self._vertices, index + 1)
+        self._vertices[index] = point
+        self.n_vertices += 1
+        self._touch()
+        if self.journal is not None:
+            self.journal.record_append(index, self.n_edges)
+        return index
+
+    def add_edge(self, a, b):
+        index = self.n_edges
+        self._edges = self._grow(self._edges, index + 1)
+        self._edges[index] = (a, b)
+        self.n_edges += 1
+        self._touch()
+        if self.journal is not None:
+            self.journal.record_append(self.n_vertices, index)
+        return index
+
+    def extend_vertices(self, points):
+        """
+        Añade un bloque (K, 2) de vértices; retorna el índice del primero
+        """
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        start = self.n_vertices
+        self._vertices = self._grow(self._vertices, start + len(points))
+        self._vertices[start:start + len(points)] = points
+        self.n_vertices += len(points)
+        self._touch()
+        if self.journal is not None:
+            self.journal.record_append(start, self.n_edges)
+        return start
+
+    def extend_edges(self, edges):
+        """
+        Añade un bloque (K, 2) de aristas; retorna el índice de la primera
+        """
+        edges = np.asarray(edges, dtype=np.int32).reshape(-1, 2)
+        start = self.n_edges
+        self._edges = self._grow(self._edges, start + len(edges))
+        self._edges[start:start + len(edges)] = edges
+        self.n_edges += len(edges)
+        self._touch()
+        if self.journal is not None:
+            self.journal.record_append(self.n_vertices, start)
+        return start
+
+    def set_vertex(self, index, point):
+        if self.journal is not None:
+            self.journal.record_set('set_vertex', [index], self._vertices[[index]], [point])
+        self._vertices[index] = point
+        self._touch(structural=True)
+
+    def set_vertices(self, indices, points):
+        """
+        Mueve de una vez los vértices `indices` (K,) a `points` (K, 2)
+        """
+        indices = np.asarray(indices, dtype=np.int64).reshape(-1)
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        if self.journal is not None:
+            self.journal.record_set('set_vertex', indices, self._vertices[indices], points)
+        self._vertices[indices] = points
+        self._touch(structural=True)
+
+    def move_vertices(self, indices, points):
+        """
+        Como set_vertices pero sin cambiar `generation` ni `topology`: para
+        arrastres y restricciones, donde la topología no cambia y los
+        índices que dependen de las posiciones se actualizan por partes
+        """
+        indices = np.asarray(indices, dtype=np.int64).reshape(-1)
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        if self.journal is not None:
+            self.journal.record_set('set_vertex', indices, self._vertices[indices], points)
+        self._vertices[indices] = points
+        self.version += 1
+        self._moves.append((self.version, indices))
+        if len(self._moves) > LOG_SIZE:
+            self._moves_floor = self._moves.pop(0)[0]
+
+    def retained_since(self, topology):
+        """
+        (vértices, aristas) del principio que no han cambiado desde
+        `topology`; añadir al final no cuenta como cambio, deshacer un
+        añadido sí. (0, 0) si `topology` es None o el registro ya no llega
+        tan atrás.
+        """
+        if topology is None or topology < self._retained_floor:
+            return 0, 0
+        n_vertices, n_edges = self.n_vertices, self.n_edges
+        for logged, vertices, edges in reversed(self._retained):
+            if logged <= topology:
+                break
+            n_vertices, n_edges = min(n_vertices, vertices), min(n_edges, edges)
+        return n_vertices, n_edges
+
+    def moved_since(self, version):
+        """
+        Índices de los vértices movidos con move_vertices después de
+        `version`, o None si el registro ya no llega tan atrás (hay que
+        tratarlo como un cambio completo)
+        """
+        if version < self._moves_floor:
+            return None
+        moved = [indices for moved_version, indices in self._moves if moved_version > version]
+        if not moved:
+            return np.zeros(0, dtype=np.int64)
+        return np.unique(np.concatenate(moved))
+
+    def set_edge(self, index, a, b):
+        if self.journal is not None:
+            self.journal.record_set('set_edge', [index], self._edges[[index]], [(a, b)])
+        self._edges[index] = (a, b)
+        self._touch(structural=True)
+
+    def set_edges(self, indices, edges):
+        """
+        Cambia de una vez las aristas `indices` (K,) por `edges` (K, 2)
+        """
+        indices = np.asarray(indices, dtype=np.int64).reshape(-1)
+        edges = np.asarray(edges, dtype=np.int32).reshape(-1, 2)
+        if self.journal is not None:
+            self.journal.record_set('set_edge', indices, self._edges[indices], edges)
+        self._edges[indices] = edges
+        self._touch(structural=True)
+
+    def truncate(self, n_vertices, n_edges):
+        """
+        Descarta los vértices y aristas añadidos después de los tamaños dados
+        """
+        if self.journal is not None:
+            self.journal.record_truncate(n_vertices, n_edges)
+        self.n_vertices = min(self.n_vertices, n_vertices)
+        self.n_edges = min(self.n_edges, n_edges)
+        self._touch(structural=True)
+
+    def clear(self):
+        if self.journal is not None:
+            # El historial se queda con los arreglos actuales sin copiarlos
+            self.journal.record_replace(self._detach())
+            return
+        self.n_vertices = 0
+        self.n_edges = 0
+        self._touch(structural=True)
+
+    # --- Historial ------------------------------------------------------
+    # Sin registro en el journal: los usa History al deshacer y rehacer
+
+    def _touch(self, structural=False):
+        # Todo cambio salvo move_vertices; los estructurales invalidan
+        # todas las filas
+        self.version += 1
+        self.topology += 1
+        if structural:
+            self.generation += 1
+            self._log_retained(0, 0)
+
+    def _log_retained(self, n_vertices, n_edges):
+        self._retained.append((self.topology, n_vertices, n_edges))
+        if len(self._retained) > LOG_SIZE:
+            self._retained_floor = self._retained.pop(0)[0]
+
+    def _set_counts(self, n_vertices, n_edges, structural=False):
+        shrunk = n_vertices < self.n_vertices or n_edges < self.n_edges
+        self.n_vertices = n_vertices
+        self.n_edges = n_edges
+        self._touch(structural)
+        if shrunk and not structural:
+            self._log_retained(n_vertices, n_edges)
+
+    def _write_rows(self, kind, indices, rows, resize=False, structural=True):
+        if not len(indices):
+            return
+        name = '_vertices' if kind == 'vertices' else '_edges'
+        array = getattr(self, name)
+        if resize:
+            array = self._grow(array, int(indices.max()) + 1)
+            setattr(self, name, array)
+        array[indices] = rows
+        self._touch(structural)
+
+    def _detach(self):
+        """
+        Pasa a arreglos nuevos vacíos y retorna el estado anterior
+        """
+        state = (self._vertices, self._edges, self.n_vertices, self.n_edges)
+        capacity = 64
+        self._vertices = np.zeros((capacity, 2), dtype=np.float64)
+        self._edges = np.zeros((capacity, 2), dtype=np.int32)
+        self._set_counts(0, 0, structural=True)
+        return state
+
+    def _attach(self, state):
+        self._vertices, self._edges, n_vertices, n_edges = state
+        self._set_counts(n_vertices, n_edges, structural=True)
+
+    def __len__(self):
+        return self.n_vertices
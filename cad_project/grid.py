@@ -0,0 +1,127 @@
+# grid.py
+"""
+Geometría estática del plano de sketch (plano base, cuadrícula y ejes)
+compilada en display lists
+"""
+from collections import OrderedDict
+import math
+from OpenGL.GL import *
+import numpy as np
+
+
+class SketchPlaneGrid:
+    """
+    Compila el plano, la cuadrícula y los ejes una sola vez por clave
+    (size, spacing, mode) y luego solo llama a glCallList. En modo sketch el
+    espaciado se adapta al zoom con pasos 1-2-5, así que al alejarse la
+    cuadrícula no necesita más líneas.
+    """
+
+    LINES_PER_SIDE = 10  # Líneas a cada lado del eje, como la cuadrícula original
+    MAX_CACHED = 8
+
+    def __init__(self):
+        self.lists = OrderedDict()
+
+    @staticmethod
+    def nice_spacing(target):
+        """
+        Redondea `target` al valor 1, 2 o 5 x 10^k inmediatamente superior
+        """
+        if target <= 1.0:
+            return 1.0
+        exponent = math.floor(math.log10(target))
+        base = 10.0 ** exponent
+        for step in (1.0, 2.0, 5.0, 10.0):
+            if target <= step * base:
+                return step * base
+        return 10.0 * base
+
+    def key_for(self, sketch_mode, zoom):
+        if sketch_mode:
+            # ~20 líneas en el ancho visible a distancia `zoom`
+            spacing = self.nice_spacing(zoom / 5.0)
+        else:
+            spacing = 1.0
+        size = spacing * self.LINES_PER_SIDE
+        return (size, spacing, sketch_mode)
+
+    @staticmethod
+    def build_vertices(size, spacing):
+        """
+        Retorna (quad, grid, axes) como arreglos float32 (K, 3)
+        """
+        quad = np.array([[-size, -size, 0], [size, -size, 0],
+                         [size, size, 0], [-size, size, 0]], dtype=np.float32)
+
+        ticks = np.arange(-size, size + spacing / 2, spacing, dtype=np.float32)
+        n = len(ticks)
+        grid = np.empty((n, 4, 3), dtype=np.float32)
+        grid[:, :, 2] = 0.01
+        # Vertical
+        grid[:, 0, 0] = ticks
+        grid[:, 0, 1] = -size
+        grid[:, 1, 0] = ticks
+        grid[:, 1, 1] = size
+        # Horizontal
+        grid[:, 2, 0] = -size
+        grid[:, 2, 1] = ticks
+        grid[:, 3, 0] = size
+        grid[:, 3, 1] = ticks
+
+        axes = np.array([[-size, 0, 0.02], [size, 0, 0.02],
+                         [0, -size, 0.02], [0, size, 0.02]], dtype=np.float32)
+        return quad, grid.reshape(-1, 3), axes
+
+    def compile(self, key):
+        size, spacing, sketch_mode = key
+        quad, grid, axes = self.build_vertices(size, spacing)
+
+        list_id = glGenLists(1)
+        # Los arreglos de cliente se copian dentro de la display list al compilar
+        glEnableClientState(GL_VERTEX_ARRAY)
+        glNewList(list_id, GL_COMPILE)
+
+        # Plano base
+        glColor4f(0.2, 0.2, 0.2, 0.3)
+        glVertexPointer(3, GL_FLOAT, 0, quad)
+        glDrawArrays(GL_QUADS, 0, len(quad))
+
+        # Cuadrícula
+        glLineWidth(1.0)
+        if sketch_mode:
+            glColor3f(0.4, 0.4, 0.4)  # Gris más claro para modo sketch
+        else:
+            glColor3f(0.3, 0.3, 0.3)  # Gris normal para modo 3D
+        glVertexPointer(3, GL_FLOAT, 0, grid)
+        glDrawArrays(GL_LINES, 0, len(grid))
+
+        # Ejes principales: X en rojo, Y en verde
+        glLineWidth(2.0)
+        glVertexPointer(3, GL_FLOAT, 0, axes)
+        glColor3f(1.0, 0.0, 0.0)
+        glDrawArrays(GL_LINES, 0, 2)
+        glColor3f(0.0, 1.0, 0.0)
+        glDrawArrays(GL_LINES, 2, 2)
+
+        glEndList()
+        glDisableClientState(GL_VERTEX_ARRAY)
+        return list_id
+
+    def draw(self, sketch_mode, zoom):
+        key = self.key_for(sketch_mode, zoom)
+        list_id = self.lists.get(key)
+        if list_id is None:
+            list_id = self.compile(key)
+            self.lists[key] = list_id
+            if len(self.lists) > self.MAX_CACHED:
+                _, oldest = self.lists.popitem(last=False)
+                glDeleteLists(oldest, 1)
+        else:
+            self.lists.move_to_end(key)
+        glCallList(list_id)
+
+    def release(self):
+        for list_id in self.lists.values():
+            glDeleteLists(list_id, 1)
+        self.lists.clear()
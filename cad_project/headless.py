@@ -0,0 +1,106 @@
+# headless.py
+"""
+Modo sin ventana: contexto OpenGL fuera de pantalla para ejecutar
+CADSystem en máquinas sin pantalla (integración continua, benchmarks)
+
+Este módulo debe importarse antes que OpenGL: PyOpenGL elige su plataforma
+al importarse. Se usa EGL por defecto; con PYOPENGL_PLATFORM=osmesa se usa
+OSMesa (render por software). SDL queda con el driver de vídeo 'dummy'.
+"""
+import os
+
+os.environ.setdefault('PYOPENGL_PLATFORM', 'egl')
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+# Mesa: EGL sin servidor gráfico
+os.environ.setdefault('EGL_PLATFORM', 'surfaceless')
+
+import ctypes
+import numpy as np
+import OpenGL.platform
+from OpenGL.GL import *
+
+
+class OffscreenContext:
+    """
+    Contexto OpenGL de compatibilidad sobre un pbuffer (EGL) o un buffer en
+    memoria (OSMesa) de `width` x `height`
+    """
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        platform = type(OpenGL.platform.PLATFORM).__name__
+        if platform.startswith('EGL'):
+            self._create_egl()
+        elif platform.startswith('OSMesa'):
+            self._create_osmesa()
+        else:
+            raise RuntimeError(f"PyOpenGL usa la plataforma {platform}: importa headless antes que OpenGL "
+                               "o define PYOPENGL_PLATFORM=egl u osmesa")
+        glViewport(0, 0, width, height)
+        self.renderer = glGetString(GL_RENDERER).decode(errors='replace')
+        self.version = glGetString(GL_VERSION).decode(errors='replace')
+
+    def _create_egl(self):
+        from OpenGL import EGL
+        self.backend = 'egl'
+        self._egl = EGL
+        display = EGL.eglGetDisplay(EGL.EGL_DEFAULT_DISPLAY)
+        major, minor = EGL.EGLint(), EGL.EGLint()
+        if not EGL.eglInitialize(display, ctypes.pointer(major), ctypes.pointer(minor)):
+            raise RuntimeError("No se pudo inicializar EGL")
+        attributes = (EGL.EGLint * 13)(
+            EGL.EGL_SURFACE_TYPE, EGL.EGL_PBUFFER_BIT,
+            EGL.EGL_RED_SIZE, 8, EGL.EGL_GREEN_SIZE, 8, EGL.EGL_BLUE_SIZE, 8,
+            EGL.EGL_DEPTH_SIZE, 24,
+            EGL.EGL_RENDERABLE_TYPE, EGL.EGL_OPENGL_BIT,
+            EGL.EGL_NONE)
+        config, count = EGL.EGLConfig(), EGL.EGLint()
+        if not EGL.eglChooseConfig(display, attributes, ctypes.pointer(config), 1, ctypes.pointer(count)) \
+                or not count.value:
+            raise RuntimeError("EGL no ofrece una configuración con pbuffer y OpenGL")
+        size = (EGL.EGLint * 5)(EGL.EGL_WIDTH, self.width, EGL.EGL_HEIGHT, self.height, EGL.EGL_NONE)
+        self._surface = EGL.eglCreatePbufferSurface(display, config, size)
+        EGL.eglBindAPI(EGL.EGL_OPENGL_API)
+        self._context = EGL.eglCreateContext(display, config, EGL.EGL_NO_CONTEXT, None)
+        if not EGL.eglMakeCurrent(display, self._surface, self._surface, self._context):
+            raise RuntimeError("No se pudo activar el contexto EGL")
+        self._display = display
+
+    def _create_osmesa(self):
+        from OpenGL import osmesa
+        self.backend = 'osmesa'
+        self._osmesa = osmesa
+        self._context = osmesa.OSMesaCreateContextExt(osmesa.OSMESA_RGBA, 24, 0, 0, None)
+        if not self._context:
+            raise RuntimeError("No se pudo crear el contexto OSMesa")
+        # OSMesa dibuja en memoria nuestra: debe vivir tanto como el contexto
+        self._pixels = np.zeros((self.height, self.width, 4), dtype=np.uint8)
+        if not osmesa.OSMesaMakeCurrent(self._context, self._pixels, GL_UNSIGNED_BYTE,
+                                        self.width, self.height):
+            raise RuntimeError("No se pudo activar el contexto OSMesa")
+
+    def swap(self):
+        """
+        Equivalente a pygame.display.flip(): espera a que la GPU termine el
+        cuadro, así su coste entra en el tiempo medido
+        """
+        glFinish()
+
+    def read_pixels(self):
+        """
+        Imagen (alto, ancho, 4) RGBA del cuadro, con la fila 0 arriba
+        """
+        data = glReadPixels(0, 0, self.width, self.height, GL_RGBA, GL_UNSIGNED_BYTE)
+        pixels = np.frombuffer(data, dtype=np.uint8).reshape(self.height, self.width, 4)
+        return pixels[::-1]
+
+    def release(self):
+        if self.backend == 'egl' and self._context is not None:
+            EGL = self._egl
+            EGL.eglMakeCurrent(self._display, EGL.EGL_NO_SURFACE, EGL.EGL_NO_SURFACE, EGL.EGL_NO_CONTEXT)
+            EGL.eglDestroyContext(self._display, self._context)
+            EGL.eglDestroySurface(self._display, self._surface)
+        elif self.backend == 'osmesa' and self._context is not None:
+            self._osmesa.OSMesaDestroyContext(self._context)
+        self._context = None
@@ -0,0 +1,343 @@
+# history.py
+"""
+Historial de deshacer/rehacer del sketch como registro de operaciones
+"""
+from contextlib import contextmanager
+import numpy as np
+
+DEFAULT_MAX_STEPS = 200
+
+# Tipos de operación del registro
+OP_APPEND = 'append'  # [tipo, nv0, ne0, nv1, ne1, vértices, aristas]
+OP_SET_VERTEX = 'set_vertex'  # [tipo, índices, anteriores, nuevos]
+OP_SET_EDGE = 'set_edge'
+OP_TRUNCATE = 'truncate'  # [tipo, nv0, ne0, nv1, ne1, vértices, aristas]
+OP_REPLACE = 'replace'  # [tipo, estado anterior]
+# Operaciones sobre las restricciones (ConstraintSystem)
+OP_CONSTRAINT_ADD = 'constraint_add'  # [tipo, k0, k1, tipos, vértices, valores]
+OP_CONSTRAINT_REMOVE = 'constraint_remove'  # [tipo, índice, tipo, vértices, valor]
+OP_CONSTRAINT_CLEAR = 'constraint_clear'  # [tipo, tipos, vértices, valores]
+
+
+class Step:
+    """
+    Un paso del historial: las operaciones que hizo sobre el almacenamiento,
+    en orden. Solo guarda lo que cambió (filas añadidas, valores anteriores
+    y nuevos de las modificadas), no una copia del sketch.
+    """
+
+    def __init__(self, label=None):
+        self.label = label
+        self.ops = []
+
+    def compact(self):
+        """
+        Une las modificaciones seguidas del mismo tipo en un solo bloque de
+        arreglos NumPy
+        """
+        merged = []
+        for op in self.ops:
+            previous = merged[-1] if merged else None
+            if (op[0] in (OP_SET_VERTEX, OP_SET_EDGE) and previous is not None
+                    and previous[0] == op[0]):
+                for slot in (1, 2, 3):
+                    previous[slot] = np.concatenate([previous[slot], op[slot]])
+            else:
+                merged.append(op)
+        self.ops = merged
+
+    @property
+    def nbytes(self):
+        total = 0
+        for op in self.ops:
+            if op[0] == OP_REPLACE:
+                continue  # Comparte los arreglos con el almacenamiento
+            total += sum(value.nbytes for value in op[1:] if isinstance(value, np.ndarray))
+        return total
+
+
+class History:
+    """
+    Registro de operaciones de un GeometryStore. El almacenamiento informa
+    de cada cambio (store.journal) y el historial guarda su delta en el paso
+    abierto: para un añadido solo los tamaños antes y después, para una
+    modificación los índices con sus valores anteriores y nuevos, y para
+    clear() los arreglos anteriores tal cual (el almacenamiento pasa a usar
+    otros nuevos, así que no hace falta copiarlos). Deshacer recorre el paso
+    al revés, de modo que deshacer una línea cuesta lo que la línea y no lo
+    que el sketch.
+
+    Si se da `constraints` (un ConstraintSystem) sus altas, bajas y borrados
+    van al mismo registro, así que un paso que toca geometría y
+    restricciones se deshace entero.
+
+    Los pasos se delimitan con step() (o begin/commit); anidados forman un
+    solo paso. Los cambios hechos sin paso abierto van a un paso implícito
+    que se cierra con el siguiente begin() o al deshacer.
+    """
+
+    def __init__(self, store, max_steps=DEFAULT_MAX_STEPS, constraints=None):
+        self.store = store
+        self.constraints = constraints
+        self.max_steps = max_steps
+        self.undo_steps = []
+        self.redo_steps = []
+        self._open = None
+        self._depth = 0
+        self._replaying = False
+        store.journal = self
+        if constraints is not None:
+            constraints.journal = self
+
+    # --- Pasos ------------------------------------------------------------
+
+    def begin(self, label=None):
+        if self._depth == 0:
+            self._close_implicit()
+            self._open = Step(label)
+        self._depth += 1
+
+    def commit(self):
+        """
+        Cierra el paso abierto; si no cambió nada no se guarda
+        """
+        if self._depth == 0:
+            self._close_implicit()
+            return
+        self._depth -= 1
+        if self._depth == 0:
+            self._push(self._open)
+            self._open = None
+
+    @contextmanager
+    def step(self, label=None):
+        self.begin(label)
+        try:
+            yield self
+        finally:
+            self.commit()
+
+    def _close_implicit(self):
+        if self._depth == 0 and self._open is not None:
+            self._push(self._open)
+            self._open = None
+
+    def _push(self, step):
+        if not step.ops:
+            return
+        step.compact()
+        self.undo_steps.append(step)
+        # Pasos más antiguos que max_steps se olvidan (y con ellos los
+        # arreglos que retenían)
+        if len(self.undo_steps) > self.max_steps:
+            del self.undo_steps[:len(self.undo_steps) - self.max_steps]
+        self.redo_steps.clear()
+
+    def _current(self):
+        if self._open is None:
+            self._open = Step()
+        return self._open
+
+    # --- Registro (llamado por GeometryStore) -----------------------------
+
+    def record_append(self, n_vertices, n_edges):
+        """
+        Después de añadir al final desde los tamaños (n_vertices, n_edges)
+        """
+        if self._replaying:
+            return
+        ops = self._current().ops
+        last = ops[-1] if ops else None
+        if last is not None and last[0] == OP_APPEND and last[3:5] == [n_vertices, n_edges]:
+            last[3:5] = [self.store.n_vertices, self.store.n_edges]
+        else:
+            ops.append([OP_APPEND, n_vertices, n_edges,
+                        self.store.n_vertices, self.store.n_edges, None, None])
+
+    def record_set(self, kind, indices, old, new):
+        if self._replaying:
+            return
+        indices = np.asarray(indices, dtype=np.int64).reshape(-1)
+        ops = self._current().ops
+        last = ops[-1] if ops else None
+        if last is not None and last[0] == kind and np.array_equal(last[1], indices):
+            # Mover los mismos vértices una y otra vez (arrastre): basta
+            # con los valores del principio y los últimos
+            last[3] = np.array(new)
+            return
+        ops.append([kind, indices, np.array(old), np.array(new)])
+
+    def record_truncate(self, n_vertices, n_edges):
+        """
+        Antes de recortar a (n_vertices, n_edges): copia las filas que se
+        descartan
+        """
+        if self._replaying:
+            return
+        store = self.store
+        self._current().ops.append([OP_TRUNCATE, store.n_vertices, store.n_edges,
+                                    min(store.n_vertices, n_vertices), min(store.n_edges, n_edges),
+                                    store.points[n_vertices:].copy(), store.edges[n_edges:].copy()])
+
+    def record_replace(self, state):
+        if not self._replaying:
+            self._current().ops.append([OP_REPLACE, state])
+
+    # --- Registro (llamado por ConstraintSystem) --------------------------
+
+    def record_constraint_add(self, count):
+        """
+        Después de añadir restricciones al final desde el total `count`
+        """
+        if self._replaying:
+            return
+        ops = self._current().ops
+        last = ops[-1] if ops else None
+        if last is not None and last[0] == OP_CONSTRAINT_ADD and last[2] == count:
+            last[2] = self.constraints.count
+        else:
+            ops.append([OP_CONSTRAINT_ADD, count, self.constraints.count, None, None, None])
+
+    def record_constraint_remove(self, index):
+        """
+        Antes de quitar la restricción `index`
+        """
+        if self._replaying:
+            return
+        constraints = self.constraints
+        self._current().ops.append([OP_CONSTRAINT_REMOVE, index, constraints.kinds[index],
+                                    constraints.vertices[index].copy(),
+                                    constraints.values[index].copy()])
+
+    def record_constraint_clear(self):
+        """
+        Antes de borrar todas las restricciones
+        """
+        if self._replaying:
+            return
+        constraints = self.constraints
+        self._current().ops.append([OP_CONSTRAINT_CLEAR, constraints.kinds.copy(),
+                                    constraints.vertices.copy(), constraints.values.copy()])
+
+    # --- Deshacer / rehacer -----------------------------------------------
+
+    def can_undo(self):
+        return bool(self.undo_steps) or (self._depth == 0 and self._open is not None
+                                         and bool(self._open.ops))
+
+    def can_redo(self):
+        return bool(self.redo_steps) and (self._open is None or not self._open.ops)
+
+    def undo(self):
+        """
+        Deshace el último paso; retorna el paso o None si no había
+        """
+        if self._depth:
+            return None
+        self._close_implicit()
+        if not self.undo_steps:
+            return None
+        step = self.undo_steps.pop()
+        self._replaying = True
+        try:
+            for op in reversed(step.ops):
+                self._undo_op(op)
+        finally:
+            self._replaying = False
+        self.redo_steps.append(step)
+        return step
+
+    def redo(self):
+        """
+        Rehace el último paso deshecho; retorna el paso o None si no había
+        """
+        if self._depth:
+            return None
+        # Un cambio nuevo sin cerrar invalida lo deshecho
+        self._close_implicit()
+        if not self.redo_steps:
+            return None
+        step = self.redo_steps.pop()
+        self._replaying = True
+        try:
+            for op in step.ops:
+                self._redo_op(op)
+        finally:
+            self._replaying = False
+        self.undo_steps.append(step)
+        return step
+
+    def _undo_op(self, op):
+        store = self.store
+        kind = op[0]
+        if kind == OP_APPEND:
+            # Las filas añadidas se copian ahora: al deshacer pasos
+            # anteriores otras operaciones pueden sobrescribirlas
+            _, nv0, ne0, nv1, ne1 = op[:5]
+            op[5] = store.points[nv0:nv1].copy()
+            op[6] = store.edges[ne0:ne1].copy()
+            store._set_counts(nv0, ne0)
+        elif kind == OP_SET_VERTEX:
+            store._write_rows('vertices', op[1][::-1], op[2][::-1])
+        elif kind == OP_SET_EDGE:
+            store._write_rows('edges', op[1][::-1], op[2][::-1])
+        elif kind == OP_TRUNCATE:
+            _, nv0, ne0, nv1, ne1, vertices, edges = op
+            store._write_rows('vertices', np.arange(nv1, nv1 + len(vertices)), vertices, resize=True)
+            store._write_rows('edges', np.arange(ne1, ne1 + len(edges)), edges, resize=True)
+            store._set_counts(nv0, ne0, structural=True)
+        elif kind == OP_REPLACE:
+            store._attach(op[1])
+        elif kind == OP_CONSTRAINT_ADD:
+            # Como los añadidos de geometría, las filas se copian al deshacer
+            constraints = self.constraints
+            op[3:6] = [constraints.kinds[op[1]:op[2]].copy(), constraints.vertices[op[1]:op[2]].copy(),
+                       constraints.values[op[1]:op[2]].copy()]
+            constraints._truncate(op[1])
+        elif kind == OP_CONSTRAINT_REMOVE:
+            self.constraints._insert_row(*op[1:])
+        elif kind == OP_CONSTRAINT_CLEAR:
+            self.constraints._write_rows(0, *op[1:])
+
+    def _redo_op(self, op):
+        store = self.store
+        kind = op[0]
+        if kind == OP_APPEND:
+            _, nv0, ne0, nv1, ne1, vertices, edges = op
+            store._write_rows('vertices', np.arange(nv0, nv1), vertices, resize=True, structural=False)
+            store._write_rows('edges', np.arange(ne0, ne1), edges, resize=True, structural=False)
+            store._set_counts(nv1, ne1)
+        elif kind == OP_SET_VERTEX:
+            store._write_rows('vertices', op[1], op[3])
+        elif kind == OP_SET_EDGE:
+            store._write_rows('edges', op[1], op[3])
+        elif kind == OP_TRUNCATE:
+            store._set_counts(op[3], op[4], structural=True)
+        elif kind == OP_REPLACE:
+            op[1] = store._detach()
+        elif kind == OP_CONSTRAINT_ADD:
+            self.constraints._write_rows(op[1], *op[3:6])
+        elif kind == OP_CONSTRAINT_REMOVE:
+            self.constraints.remove(op[1])
+        elif kind == OP_CONSTRAINT_CLEAR:
+            self.constraints.clear()
+
+    # --- Estado -----------------------------------------------------------
+
+    def reset(self):
+        """
+        Olvida todo el historial (p. ej. al abrir un proyecto)
+        """
+        self.undo_steps.clear()
+        self.redo_steps.clear()
+        self._open = None
+        self._depth = 0
+
+    @property
+    def nbytes(self):
+        """
+        Memoria de los deltas guardados (sin contar los arreglos compartidos
+        por clear())
+        """
+        steps = self.undo_steps + self.redo_steps + ([self._open] if self._open else [])
+        return sum(step.nbytes for step in steps)
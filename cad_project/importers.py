@@ -0,0 +1,459 @@
+# importers.py
+"""
+Importación de dibujos 2D (DXF ASCII y SVG) al Sketch. Los archivos se leen
+por bloques y cada bloque se convierte en segmentos con operaciones sobre
+arreglos; al final los extremos se unen en una sola pasada y la geometría
+entra al almacenamiento del sketch de una vez.
+"""
+import math
+import re
+import xml.etree.ElementTree as ElementTree
+import numpy as np
+
+READ_BLOCK = 1 << 24  # Bytes leídos por bloque
+WELD_TOLERANCE = 1e-9
+CURVE_SEGMENTS = 16  # Segmentos por curva de Bézier o arco de SVG
+
+_NEWLINE, _RETURN = ord('\n'), ord('\r')
+_LINE, _LWPOLYLINE = 1, 2
+
+
+# --- Segmentos -> vértices y aristas ------------------------------------
+
+def weld_points(points, tolerance=WELD_TOLERANCE):
+    """
+    Une los puntos con la misma posición (redondeada a `tolerance`).
+    Retorna (puntos distintos, índice de cada punto original en ellos).
+    """
+    keys = np.round(points / tolerance).astype(np.int64)
+    order = np.lexsort((keys[:, 1], keys[:, 0]))
+    sorted_keys = keys[order]
+    new_group = np.ones(len(order), dtype=bool)
+    new_group[1:] = (sorted_keys[1:] != sorted_keys[:-1]).any(axis=1)
+    group = np.empty(len(order), dtype=np.int64)
+    group[order] = np.cumsum(new_group) - 1
+    return points[order[new_group]], group
+
+
+def weld_segments(starts, ends, tolerance=WELD_TOLERANCE, points=None):
+    """
+    Vértices y aristas de los segmentos (inicios, fines) con los extremos
+    unidos; `points` son vértices sueltos que también se conservan. Se
+    descartan las aristas degeneradas y las repetidas. Retorna (vértices
+    (N, 2), aristas (M, 2)).
+    """
+    loose = np.zeros((0, 2)) if points is None else np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    all_points = np.vstack([loose, starts, ends]).astype(np.float64)
+    if not len(all_points):
+        return np.zeros((0, 2)), np.zeros((0, 2), dtype=np.int64)
+    vertices, group = weld_points(all_points, tolerance)
+
+    edges = group[len(loose):].reshape(2, -1).T
+    edges = edges[edges[:, 0] != edges[:, 1]]
+    # Misma arista en los dos sentidos o repetida: se queda la primera
+    low, high = edges.min(axis=1), edges.max(axis=1)
+    _, first = np.unique(low * len(vertices) + high, return_index=True)
+    return vertices, edges[np.sort(first)]
+
+
+def _read_blocks(path, block_size):
+    with open(path, 'rb') as file:
+        while True:
+            block = file.read(block_size)
+            if not block:
+                return
+            yield block
+
+
+# --- DXF ------------------------------------------------------------------
+
+def _line_bounds(buffer):
+    """
+    Inicio y fin (sin el salto de línea ni '\\r') de cada línea completa
+    """
+    ends = np.flatnonzero(buffer == _NEWLINE)
+    starts = np.concatenate([[0], ends[:-1] + 1])
+    stripped = ends - (buffer[np.maximum(ends - 1, 0)] == _RETURN) * (ends > starts)
+    return starts, stripped
+
+
+def _fixed_strings(buffer, starts, ends, width):
+    """
+    Las líneas dadas como arreglo 'S<n>' (rellenas con ceros, n <= width
+    según la línea más larga) para compararlas o convertirlas a número sin
+    pasar por listas de Python
+    """
+    lengths = ends - starts
+    width = int(min(width, lengths.max())) if len(lengths) else 1
+    width = max(width, 1)
+    columns = np.arange(width, dtype=starts.dtype)
+    index = np.minimum(starts[:, None] + columns, len(buffer) - 1)
+    chars = buffer[index]
+    chars[columns >= lengths[:, None]] = 0
+    return chars.view(f'S{width}').reshape(-1)
+
+
+def _group_codes(buffer, starts, ends, width=4):
+    """
+    Códigos de grupo (enteros, con espacios opcionales a la izquierda)
+    """
+    chars = _fixed_strings(buffer, starts, ends, width)
+    digits = chars.view(np.uint8).reshape(len(chars), -1) - np.uint8(ord('0'))
+    codes = np.zeros(len(chars), dtype=np.int32)
+    for column in digits.T:
+        # Los espacios y el relleno no son cifras (la resta da la vuelta)
+        codes = np.where(column < 10, codes * 10 + column, codes)
+    return codes
+
+
+class _DXFState:
+    def __init__(self):
+        self.in_entities = False
+        self.starts = []
+        self.ends = []
+
+
+def _dxf_pairs(state, buffer, codes, starts, ends):
+    """
+    Procesa pares (código, valor) completos; las entidades empiezan en el
+    primer par y ninguna queda cortada
+    """
+    value_starts, value_ends = starts[1::2], ends[1::2]
+
+    zero = np.flatnonzero(codes == 0)
+    names = _fixed_strings(buffer, value_starts[zero], value_ends[zero], 16)
+    names = np.char.strip(names)
+
+    # Sección ENTITIES: empieza en (2, ENTITIES), termina en (0, ENDSEC)
+    name_codes = np.flatnonzero(codes == 2)
+    section_names = np.char.strip(_fixed_strings(buffer, value_starts[name_codes], value_ends[name_codes], 16))
+    opens = name_codes[section_names == b'ENTITIES']
+    closes = zero[names == b'ENDSEC']
+    events = np.concatenate([opens, closes])
+    kinds = np.concatenate([np.ones(len(opens), dtype=bool), np.zeros(len(closes), dtype=bool)])
+    order = np.argsort(events, kind='stable')
+    events, kinds = events[order], kinds[order]
+    if len(events):
+        last = np.searchsorted(events, zero, side='left') - 1
+        active = np.where(last >= 0, kinds[np.maximum(last, 0)], state.in_entities)
+        state.in_entities = bool(kinds[-1])
+    else:
+        active = np.full(len(zero), state.in_entities)
+
+    entity_type = np.where(names == b'LINE', _LINE, np.where(names == b'LWPOLYLINE', _LWPOLYLINE, 0))
+    entity_type = np.where(active, entity_type, 0)
+    entity = np.cumsum(codes == 0) - 1
+    pair_type = np.where(entity >= 0, entity_type[np.maximum(entity, 0)], 0)
+
+    def numbers(mask):
+        index = np.flatnonzero(mask)
+        return index, _fixed_strings(buffer, value_starts[index], value_ends[index], 32).astype(np.float64)
+
+    # LINE: extremos (10, 20) y (11, 21)
+    is_line = pair_type == _LINE
+    coordinates = np.full((len(zero), 4), np.nan)
+    for column, code in enumerate((10, 20, 11, 21)):
+        index, values = numbers(is_line & (codes == code))
+        coordinates[entity[index], column] = values
+    lines = coordinates[(entity_type == _LINE) & ~np.isnan(coordinates).any(axis=1)]
+    state.starts.append(lines[:, :2])
+    state.ends.append(lines[:, 2:])
+
+    # LWPOLYLINE: vértices (10, 20) en orden; bit 1 del código 70 = cerrada
+    is_polyline = pair_type == _LWPOLYLINE
+    x_index, x = numbers(is_polyline & (codes == 10))
+    _, y = numbers(is_polyline & (codes == 20))
+    if len(x) and len(x) == len(y):
+        owner = entity[x_index]
+        vertices = np.column_stack([x, y])
+        same = owner[1:] == owner[:-1]
+        state.starts.append(vertices[:-1][same])
+        state.ends.append(vertices[1:][same])
+
+        flag_index, flags = numbers(is_polyline & (codes == 70))
+        closed = np.zeros(len(zero), dtype=bool)
+        closed[entity[flag_index]] = flags.astype(np.int64) & 1 == 1
+        first = np.flatnonzero(np.concatenate([[True], ~same]))
+        last_vertex = np.concatenate([first[1:] - 1, [len(owner) - 1]])
+        closing = closed[owner[first]] & (last_vertex > first)
+        state.starts.append(vertices[last_vertex[closing]])
+        state.ends.append(vertices[first[closing]])
+
+
+def read_dxf(path, block_size=READ_BLOCK):
+    """
+    Segmentos de las entidades LINE y LWPOLYLINE de la sección ENTITIES de
+    un DXF ASCII. Los arcos de polilínea (bulge) se importan como cuerdas.
+    Retorna (inicios (K, 2), fines (K, 2)).
+    """
+    state = _DXFState()
+    carry = b''
+    for block in _read_blocks(path, block_size):
+        data = carry + block
+        buffer = np.frombuffer(data, dtype=np.uint8)
+        starts, ends = _line_bounds(buffer)
+        # Se procesan pares completos hasta la última entidad del bloque,
+        # que puede seguir en el siguiente
+        codes = _group_codes(buffer, starts[0:len(starts) - 1:2], ends[0:len(ends) - 1:2])
+        zero = np.flatnonzero(codes == 0)
+        if len(zero) < 2:
+            carry = data
+            continue
+        cut = 2 * zero[-1]
+        _dxf_pairs(state, buffer, codes[:zero[-1]], starts[:cut], ends[:cut])
+        carry = data[starts[cut]:]
+
+    if carry:
+        buffer = np.frombuffer(carry + b'\n', dtype=np.uint8)
+        starts, ends = _line_bounds(buffer)
+        pairs = len(starts) // 2 * 2
+        codes = _group_codes(buffer, starts[0:pairs:2], ends[0:pairs:2])
+        _dxf_pairs(state, buffer, codes, starts[:pairs], ends[:pairs])
+
+    if not state.starts:
+        return np.zeros((0, 2)), np.zeros((0, 2))
+    return np.vstack(state.starts), np.vstack(state.ends)
+
+
+# --- SVG ------------------------------------------------------------------
+
+_PATH_COMMANDS = re.compile(r'([MmLlHhVvZzCcSsQqTtAa])')
+_NUMBER = re.compile(r'[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?')
+# `d` que es una sola polilínea absoluta (M x y L x y ...), el caso más común
+# en los SVG exportados por programas de CAD
+_POLYLINE_PATH = re.compile(r'\s*M[^A-DF-Za-df-z]*(?:L[^A-DF-Za-df-z]*)*')
+_PARAMETERS = {'M': 2, 'L': 2, 'H': 1, 'V': 1, 'Z': 0, 'C': 6, 'S': 4, 'Q': 4, 'T': 2, 'A': 7}
+
+
+def _cubic(p0, p1, p2, p3, segments=CURVE_SEGMENTS):
+    t = np.linspace(0, 1, segments + 1)[1:, None]
+    u = 1 - t
+    return u ** 3 * p0 + 3 * u * u * t * p1 + 3 * u * t * t * p2 + t ** 3 * p3
+
+
+def _arc(start, rx, ry, angle, large, sweep, end, segments=CURVE_SEGMENTS):
+    """
+    Puntos del arco elíptico de SVG (parametrización por el centro)
+    """
+    rx, ry = abs(rx), abs(ry)
+    if rx == 0 or ry == 0 or np.allclose(start, end):
+        return end[None, :]
+    phi = math.radians(angle)
+    cos, sin = math.cos(phi), math.sin(phi)
+    dx, dy = (start - end) / 2
+    x1, y1 = cos * dx + sin * dy, -sin * dx + cos * dy
+    scale = (x1 / rx) ** 2 + (y1 / ry) ** 2
+    if scale > 1:
+        rx, ry = rx * math.sqrt(scale), ry * math.sqrt(scale)
+    numerator = max(rx * rx * ry * ry - rx * rx * y1 * y1 - ry * ry * x1 * x1, 0.0)
+    factor = math.sqrt(numerator / (rx * rx * y1 * y1 + ry * ry * x1 * x1))
+    if large == sweep:
+        factor = -factor
+    cx1, cy1 = factor * rx * y1 / ry, -factor * ry * x1 / rx
+    center = np.array([cos * cx1 - sin * cy1, sin * cx1 + cos * cy1]) + (start + end) / 2
+    theta = math.atan2((y1 - cy1) / ry, (x1 - cx1) / rx)
+    delta = math.atan2((-y1 - cy1) / ry, (-x1 - cx1) / rx) - theta
+    if sweep and delta < 0:
+        delta += 2 * math.pi
+    elif not sweep and delta > 0:
+        delta -= 2 * math.pi
+    t = theta + delta * np.linspace(0, 1, segments + 1)[1:]
+    x, y = rx * np.cos(t), ry * np.sin(t)
+    points = np.column_stack([cos * x - sin * y, sin * x + cos * y]) + center
+    points[-1] = end
+    return points
+
+
+def _command_runs(d):
+    """
+    Órdenes de un `d` con sus argumentos; las órdenes iguales seguidas (salvo
+    M y Z) se juntan en una sola, que equivale a repetir sus argumentos
+    """
+    parts = _PATH_COMMANDS.split(d)
+    runs = []
+    for command, arguments in zip(parts[1::2], parts[2::2]):
+        if runs and runs[-1][0] == command and command not in 'MmZz':
+            runs[-1][1].append(arguments)
+        else:
+            runs.append((command, [arguments]))
+    return [(command, ' '.join(arguments)) for command, arguments in runs]
+
+
+def path_polylines(d):
+    """
+    Polilíneas (K, 2) de un atributo `d` de SVG. Las órdenes de rectas se
+    convierten por grupos con NumPy; las curvas se aproximan con
+    CURVE_SEGMENTS segmentos.
+    """
+    if _POLYLINE_PATH.fullmatch(d):
+        values = np.array(_NUMBER.findall(d), dtype=np.float64)
+        points = values[:len(values) // 2 * 2].reshape(-1, 2)
+        return [points] if len(points) > 1 else []
+
+    polylines = []
+    current = []  # Bloques de puntos de la polilínea en curso
+    position = np.zeros(2)
+    subpath_start = np.zeros(2)
+    control = None  # Último punto de control (para S y T)
+    previous = ''
+
+    def finish():
+        if current:
+            points = np.vstack(current)
+            if len(points) > 1:
+                polylines.append(points)
+            current.clear()
+
+    for command, arguments in _command_runs(d):
+        values = np.array(_NUMBER.findall(arguments), dtype=np.float64)
+        upper = command.upper()
+        relative = command != upper
+        count = _PARAMETERS[upper]
+        if count:
+            values = values[:len(values) // count * count].reshape(-1, count)
+
+        if upper == 'Z':
+            if current:
+                current.append(subpath_start[None, :])
+            finish()
+            position = subpath_start.copy()
+            control = None
+        elif upper in 'ML':
+            if not len(values):
+                continue
+            points = np.cumsum(values, axis=0) + position if relative else values
+            if upper == 'M':
+                finish()
+                subpath_start = points[0].copy()
+            elif not current:
+                current.append(position[None, :])
+            current.append(points)
+            position = points[-1].copy()
+            control = None
+        elif upper in 'HV':
+            if not len(values):
+                continue
+            axis = 0 if upper == 'H' else 1
+            coordinate = np.cumsum(values[:, 0]) + position[axis] if relative else values[:, 0]
+            points = np.repeat(position[None, :], len(coordinate), axis=0)
+            points[:, axis] = coordinate
+            if not current:
+                current.append(position[None, :])
+            current.append(points)
+            position = points[-1].copy()
+            control = None
+        else:
+            if not current:
+                current.append(position[None, :])
+            for row in values:
+                base = position if relative else np.zeros(2)
+                if upper == 'A':
+                    end = row[5:7] + base
+                    current.append(_arc(position, row[0], row[1], row[2], bool(row[3]), bool(row[4]), end))
+                    control = None
+                else:
+                    pairs = row.reshape(-1, 2) + base
+                    smooth = upper in 'ST'
+                    reflected = 2 * position - control if control is not None and previous in (
+                        'CS' if upper == 'S' else 'QT') else position
+                    if upper in 'CS':
+                        first = reflected if smooth else pairs[0]
+                        second, end = pairs[-2], pairs[-1]
+                        current.append(_cubic(position, first, second, end))
+                        control = second
+                    else:
+                        middle = reflected if smooth else pairs[0]
+                        end = pairs[-1]
+                        # Cuadrática como cúbica equivalente
+                        current.append(_cubic(position, position + 2 / 3 * (middle - position),
+                                              end + 2 / 3 * (middle - end), end))
+                        control = middle
+                position = current[-1][-1].copy()
+                previous = upper
+            continue
+        previous = upper
+    finish()
+    return polylines
+
+
+def _element_polylines(tag, attributes):
+    def number(name):
+        return float(attributes.get(name, 0) or 0)
+
+    if tag == 'path':
+        return path_polylines(attributes.get('d', ''))
+    if tag == 'line':
+        return [np.array([[number('x1'), number('y1')], [number('x2'), number('y2')]])]
+    if tag in ('polyline', 'polygon'):
+        values = np.array(_NUMBER.findall(attributes.get('points', '')), dtype=np.float64)
+        points = values[:len(values) // 2 * 2].reshape(-1, 2)
+        if tag == 'polygon' and len(points) > 2:
+            points = np.vstack([points, points[:1]])
+        return [points] if len(points) > 1 else []
+    if tag == 'rect':
+        x, y, width, height = number('x'), number('y'), number('width'), number('height')
+        return [np.array([[x, y], [x + width, y], [x + width, y + height], [x, y + height], [x, y]])]
+    if tag in ('circle', 'ellipse'):
+        rx = number('r') if tag == 'circle' else number('rx')
+        ry = number('r') if tag == 'circle' else number('ry')
+        t = np.linspace(0, 2 * np.pi, 4 * CURVE_SEGMENTS + 1)
+        return [np.column_stack([number('cx') + rx * np.cos(t), number('cy') + ry * np.sin(t)])]
+    return []
+
+
+def read_svg(path):
+    """
+    Segmentos de los elementos path, line, polyline, polygon, rect, circle
+    y ellipse de un SVG, leídos con iterparse. No se aplican los atributos
+    transform ni viewBox; el eje y se invierte para que el dibujo no quede
+    reflejado. Retorna (inicios (K, 2), fines (K, 2)).
+    """
+    starts, ends = [], []
+    for _, element in ElementTree.iterparse(path, events=('end',)):
+        tag = element.tag.rsplit('}', 1)[-1]
+        for points in _element_polylines(tag, element.attrib):
+            points = points * (1.0, -1.0)
+            starts.append(points[:-1])
+            ends.append(points[1:])
+        element.clear()
+    if not starts:
+        return np.zeros((0, 2)), np.zeros((0, 2))
+    return np.vstack(starts), np.vstack(ends)
+
+
+# --- Entrada --------------------------------------------------------------
+
+def read_segments(path):
+    """
+    Segmentos (inicios, fines) de un .dxf o .svg
+    """
+    extension = str(path).lower().rsplit('.', 1)[-1]
+    if extension == 'dxf':
+        return read_dxf(path)
+    if extension == 'svg':
+        return read_svg(path)
+    raise ValueError(f"Formato de importación no soportado: .{extension}")
+
+
+def read_drawing(path, tolerance=WELD_TOLERANCE):
+    """
+    Vértices y aristas de un .dxf o .svg, ya unidos
+    """
+    return weld_segments(*read_segments(path), tolerance)
+
+
+def import_drawing(sketch, path, tolerance=WELD_TOLERANCE):
+    """
+    Añade el dibujo al sketch: sus extremos y los vértices del sketch se
+    unen en una sola pasada y el resultado se carga de una vez. Retorna el
+    número de aristas importadas.
+    """
+    starts, ends = read_segments(path)
+    existing = sketch.store.segments()
+    points, edges = weld_segments(np.vstack([existing[:, 0], starts]), np.vstack([existing[:, 1], ends]),
+                                  tolerance, points=sketch.store.points)
+    imported = len(edges) - sketch.store.n_edges
+    # Un solo paso del historial: deshacer recupera el sketch anterior
+    with sketch.history.step('importar'):
+        sketch.load_arrays(points, edges)
+    return imported
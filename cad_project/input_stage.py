@@ -0,0 +1,225 @@
+# input_stage.py
+"""
+Etapa de entrada: recoge los eventos de pygame de cada cuadro y fusiona
+los movimientos de ratón consecutivos. Los eventos de cada cuadro se pueden
+grabar en un registro JSON y reproducir después (ReplayInputStage).
+"""
+import json
+import pygame
+
+
+def coalesce_motion(events):
+    """
+    Fusiona las rachas de MOUSEMOTION consecutivos en un único evento con la
+    última posición y el desplazamiento acumulado. Los demás eventos (y por
+    tanto las pulsaciones de botones) conservan su orden. Retorna
+    (eventos, número de eventos descartados).
+    """
+    result = []
+    dropped = 0
+    pending = None  # Racha de movimiento en curso: [pos, rel_x, rel_y, buttons]
+
+    for event in events:
+        if event.type == pygame.MOUSEMOTION:
+            if pending is None:
+                pending = [event.pos, event.rel[0], event.rel[1], event.buttons]
+            else:
+                pending[0] = event.pos
+                pending[1] += event.rel[0]
+                pending[2] += event.rel[1]
+                pending[3] = event.buttons
+                dropped += 1
+            continue
+
+        if pending is not None:
+            result.append(_motion_event(pending))
+            pending = None
+        result.append(event)
+
+    if pending is not None:
+        result.append(_motion_event(pending))
+    return result, dropped
+
+
+def _motion_event(pending):
+    pos, rel_x, rel_y, buttons = pending
+    return pygame.event.Event(pygame.MOUSEMOTION, pos=pos, rel=(rel_x, rel_y),
+                              buttons=buttons)
+
+
+class InputStage:
+    """
+    Obtiene los eventos pendientes una vez por cuadro y lleva la cuenta de
+    cuántos movimientos de ratón se descartaron al fusionarlos
+    """
+
+    def __init__(self, coalesce=True):
+        self.coalesce = coalesce
+        self.recording = None  # Eventos por cuadro, si se está grabando
+        self.last_received = 0
+        self.last_dropped = 0
+        self.total_received = 0
+        self.total_dropped = 0
+
+    def poll(self, wait_ms=None):
+        """
+        Retorna los eventos pendientes. Con `wait_ms` se bloquea hasta que
+        llegue el primero o se agote el tiempo.
+        """
+        events = []
+        if wait_ms is not None:
+            event = pygame.event.wait(wait_ms)
+            if event.type != pygame.NOEVENT:
+                events.append(event)
+        events.extend(pygame.event.get())
+        if self.recording is not None:
+            self.recording.append([event_to_dict(event) for event in events])
+        return self.process(events)
+
+    def process(self, events):
+        received = len(events)
+        dropped = 0
+        if self.coalesce:
+            events, dropped = coalesce_motion(events)
+
+        self.last_received = received
+        self.last_dropped = dropped
+        self.total_received += received
+        self.total_dropped += dropped
+        return events
+
+    def stats(self):
+        return {
+            'received': self.last_received,
+            'dropped': self.last_dropped,
+            'total_received': self.total_received,
+            'total_dropped': self.total_dropped,
+        }
+
+    def start_recording(self):
+        self.recording = []
+
+    # Estado de teclado y ratón que se consulta por sondeo; ReplayInputStage
+    # lo reconstruye a partir de los eventos reproducidos
+
+    def key_state(self):
+        return pygame.key.get_pressed()
+
+    def mouse_position(self):
+        return pygame.mouse.get_pos()
+
+    def mouse_focused(self):
+        return pygame.mouse.get_focused()
+
+    def warp_mouse(self, position):
+        pygame.mouse.set_pos(position)
+
+    def capture_mouse(self, captured):
+        """
+        Oculta y retiene el cursor en la ventana (modo 3D) o lo libera
+        """
+        pygame.mouse.set_visible(not captured)
+        pygame.event.set_grab(captured)
+
+
+def event_to_dict(event):
+    """
+    Evento de pygame como diccionario serializable a JSON; los atributos
+    que no son números, cadenas o tuplas de ellos se omiten
+    """
+    attributes = {}
+    for name, value in event.dict.items():
+        if isinstance(value, (tuple, list)):
+            value = list(value)
+            if not all(isinstance(item, (int, float)) for item in value):
+                continue
+        elif value is not None and not isinstance(value, (bool, int, float, str)):
+            continue
+        attributes[name] = value
+    return {'type': event.type, 'attributes': attributes}
+
+
+def event_from_dict(data):
+    attributes = {name: tuple(value) if isinstance(value, list) else value
+                  for name, value in data['attributes'].items()}
+    return pygame.event.Event(data['type'], **attributes)
+
+
+def save_event_log(path, frames):
+    """
+    Guarda los eventos grabados (lista por cuadro de event_to_dict)
+    """
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump({'version': 1, 'frames': frames}, file)
+
+
+def load_event_log(path):
+    """
+    Eventos por cuadro de un registro guardado con save_event_log
+    """
+    with open(path, encoding='utf-8') as file:
+        data = json.load(file)
+    return [[event_from_dict(event) for event in frame] for frame in data['frames']]
+
+
+class _KeyState:
+    """
+    Sustituto de pygame.key.get_pressed(): indexable por código de tecla
+    """
+
+    def __init__(self, pressed):
+        self.pressed = pressed
+
+    def __getitem__(self, key):
+        return key in self.pressed
+
+
+class ReplayInputStage(InputStage):
+    """
+    Entrega eventos grabados, un cuadro por llamada a poll, sin esperar ni
+    leer la cola de pygame. El estado de teclas y ratón se deduce de los
+    propios eventos, así también funciona sin ventana. Al acabarse los
+    cuadros envía QUIT.
+    """
+
+    def __init__(self, frames, coalesce=True):
+        super().__init__(coalesce)
+        self.frames = list(frames)
+        self.position = 0
+        self.pressed = set()
+        self.mouse = (0, 0)
+
+    @property
+    def finished(self):
+        return self.position >= len(self.frames)
+
+    def poll(self, wait_ms=None):
+        if self.finished:
+            return self.process([pygame.event.Event(pygame.QUIT)])
+        events = self.frames[self.position]
+        self.position += 1
+        for event in events:
+            if event.type == pygame.KEYDOWN:
+                self.pressed.add(event.key)
+            elif event.type == pygame.KEYUP:
+                self.pressed.discard(event.key)
+            elif event.type in (pygame.MOUSEMOTION, pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP):
+                self.mouse = tuple(event.pos)
+        if self.recording is not None:
+            self.recording.append([event_to_dict(event) for event in events])
+        return self.process(list(events))
+
+    def key_state(self):
+        return _KeyState(self.pressed)
+
+    def mouse_position(self):
+        return self.mouse
+
+    def mouse_focused(self):
+        return True
+
+    def warp_mouse(self, position):
+        self.mouse = tuple(position)
+
+    def capture_mouse(self, captured):
+        pass
@@ -0,0 +1,421 @@
+# lod.py
+"""
+Niveles de detalle: simplificación de mallas por colapso de aristas con
+error cuádrico (Garland-Heckbert) y selección por error en pantalla
+"""
+import math
+import threading
+import weakref
+import numpy as np
+from mesh import Mesh
+
+LOD_RATIOS = (0.5, 0.25, 0.1)  # Fracción de triángulos de cada nivel
+MIN_LOD_TRIANGLES = 64  # Mallas más pequeñas no se simplifican
+BOUNDARY_WEIGHT = 100.0  # Peso de los planos que fijan los bordes abiertos
+
+
+def weld_vertices(vertices, triangles, tolerance=1e-6):
+    """
+    Une los vértices con la misma posición (redondeada a `tolerance`).
+    Retorna (posiciones (V, 3) float64, triángulos (F, 3) sin degenerados).
+    """
+    vertices = np.asarray(vertices, dtype=np.float64).reshape(-1, 3)
+    keys = np.round(vertices / tolerance).astype(np.int64)
+    order = np.lexsort(keys.T[::-1])
+    sorted_keys = keys[order]
+    new_group = np.ones(len(order), dtype=bool)
+    new_group[1:] = (sorted_keys[1:] != sorted_keys[:-1]).any(axis=1)
+    group = np.cumsum(new_group) - 1
+    remap = np.empty(len(order), dtype=np.int64)
+    remap[order] = group
+    positions = vertices[order[new_group]]
+    faces = remap[np.asarray(triangles, dtype=np.int64).reshape(-1, 3)]
+    return positions, drop_degenerate(faces)
+
+
+def drop_degenerate(faces):
+    keep = ((faces[:, 0] != faces[:, 1]) & (faces[:, 1] != faces[:, 2])
+            & (faces[:, 0] != faces[:, 2]))
+    return faces[keep]
+
+
+def face_normals(positions, faces):
+    """
+    Normales sin normalizar (su norma es el doble del área)
+    """
+    a, b, c = positions[faces[:, 0]], positions[faces[:, 1]], positions[faces[:, 2]]
+    return np.cross(b - a, c - a)
+
+
+def mesh_edges(faces, n_vertices=None):
+    """
+    Aristas únicas (E, 2) con a < b, ordenadas por (a, b), y el número de
+    caras de cada una
+    """
+    if n_vertices is None:
+        n_vertices = int(faces.max()) + 1
+    edges = np.sort(faces[:, [0, 1, 1, 2, 2, 0]].reshape(-1, 2), axis=1)
+    keys = edges[:, 0] * n_vertices + edges[:, 1]
+    order = np.argsort(keys, kind='stable')
+    keys = keys[order]
+    first = np.ones(len(keys), dtype=bool)
+    first[1:] = keys[1:] != keys[:-1]
+    starts = np.flatnonzero(first)
+    counts = np.diff(np.append(starts, len(keys)))
+    return edges[order[starts]], counts
+
+
+def plane_quadrics(positions, faces):
+    """
+    Cuádrica (V, 4, 4) de cada vértice: suma de p p^T de los planos de sus
+    caras, más planos perpendiculares en los bordes abiertos para que no se
+    encojan
+    """
+    count = len(positions)
+    normals = face_normals(positions, faces)
+    length = np.linalg.norm(normals, axis=1)
+    valid = length > 0
+    unit = normals[valid] / length[valid, None]
+    planes = np.column_stack([unit, -np.einsum('ij,ij->i', unit, positions[faces[valid, 0]])])
+    face_quadric = (planes[:, :, None] * planes[:, None, :]).reshape(-1, 16)
+
+    quadrics = np.zeros((count, 16))
+    for corner in range(3):
+        np.add.at(quadrics, faces[valid, corner], face_quadric)
+
+    # Bordes: aristas dirigidas cuya arista no dirigida tiene una sola cara
+    directed = faces[:, [0, 1, 1, 2, 2, 0]].reshape(-1, 2)
+    edges, counts = mesh_edges(faces, count)
+    if (counts == 1).any():
+        boundary_keys = edges[counts == 1, 0] * count + edges[counts == 1, 1]
+        directed_keys = directed.min(axis=1) * count + directed.max(axis=1)
+        is_boundary = np.isin(directed_keys, boundary_keys)
+        start = positions[directed[is_boundary, 0]]
+        end = positions[directed[is_boundary, 1]]
+        owner = np.repeat(np.arange(len(faces)), 3)[is_boundary]
+        side = np.cross(end - start, normals[owner])
+        side_length = np.linalg.norm(side, axis=1)
+        ok = side_length > 0
+        side = side[ok] / side_length[ok, None]
+        side_planes = np.column_stack([side, -np.einsum('ij,ij->i', side, start[ok])])
+        side_quadric = BOUNDARY_WEIGHT * (side_planes[:, :, None] * side_planes[:, None, :]).reshape(-1, 16)
+        for end_index in range(2):
+            np.add.at(quadrics, directed[is_boundary][ok, end_index], side_quadric)
+    return quadrics.reshape(count, 4, 4)
+
+
+def quadric_error(quadrics, points):
+    """
+    p^T Q p con p = (x, y, z, 1) para cada par (Q, p), usando la simetría
+    de Q en lugar de productos de matrices pequeñas
+    """
+    q = quadrics
+    x, y, z = points[:, 0], points[:, 1], points[:, 2]
+    return (q[:, 0, 0] * x * x + q[:, 1, 1] * y * y + q[:, 2, 2] * z * z + q[:, 3, 3]
+            + 2.0 * (q[:, 0, 1] * x * y + q[:, 0, 2] * x * z + q[:, 1, 2] * y * z
+                     + q[:, 0, 3] * x + q[:, 1, 3] * y + q[:, 2, 3] * z))
+
+
+def solve_symmetric3(system, rhs):
+    """
+    Resuelve en bloque sistemas simétricos 3x3 por cofactores. Retorna
+    (soluciones, máscara de sistemas bien condicionados).
+    """
+    a, b, c = system[:, 0, 0], system[:, 0, 1], system[:, 0, 2]
+    d, e, f = system[:, 1, 1], system[:, 1, 2], system[:, 2, 2]
+    cofactor = np.stack([
+        d * f - e * e, c * e - b * f, b * e - c * d,
+        c * e - b * f, a * f - c * c, b * c - a * e,
+        b * e - c * d, b * c - a * e, a * d - b * b,
+    ], axis=1).reshape(-1, 3, 3)
+    determinant = a * cofactor[:, 0, 0] + b * cofactor[:, 1, 0] + c * cofactor[:, 2, 0]
+    solvable = np.abs(determinant) > 1e-9
+    safe = np.where(solvable, determinant, 1.0)
+    solution = np.matmul(cofactor, rhs[:, :, None])[:, :, 0] / safe[:, None]
+    return solution, solvable
+
+
+def collapse_targets(positions, quadrics, edges):
+    """
+    Costo y posición óptima de colapsar cada arista: el mínimo de la
+    cuádrica si el sistema está bien condicionado y queda cerca de la
+    arista, si no el mejor entre los extremos y el punto medio
+    """
+    quadric = quadrics[edges[:, 0]] + quadrics[edges[:, 1]]
+    a, b = positions[edges[:, 0]], positions[edges[:, 1]]
+    middle = 0.5 * (a + b)
+
+    optimal, solvable = solve_symmetric3(quadric[:, :3, :3], -quadric[:, :3, 3])
+    # Con sistemas casi singulares el mínimo se aleja de la arista
+    near = np.linalg.norm(optimal - middle, axis=1) <= np.linalg.norm(b - a, axis=1)
+    optimal = np.where((solvable & near)[:, None], optimal, middle)
+
+    candidates = np.stack([a, b, middle, optimal])
+    errors = np.stack([quadric_error(quadric, candidate) for candidate in candidates])
+    best = np.argmin(errors, axis=0)
+    rows = np.arange(len(edges))
+    return np.maximum(errors[best, rows], 0.0), candidates[best, rows]
+
+
+class Adjacency:
+    """
+    Vecinos de cada vértice en formato CSR, ordenados, con las claves
+    origen * V + destino para consultar si dos vértices son vecinos
+    """
+
+    def __init__(self, edges, n_vertices):
+        source = np.concatenate([edges[:, 0], edges[:, 1]])
+        target = np.concatenate([edges[:, 1], edges[:, 0]])
+        order = np.lexsort((target, source))
+        self.n_vertices = n_vertices
+        self.target = target[order]
+        self.keys = source[order] * n_vertices + self.target
+        self.degree = np.bincount(source, minlength=n_vertices)
+        self.first = np.concatenate([[0], np.cumsum(self.degree)[:-1]])
+
+    def neighbors(self, vertices):
+        """
+        (dueño, vecino) de cada vecino de `vertices`
+        """
+        degree = self.degree[vertices]
+        owner = np.repeat(np.arange(len(vertices)), degree)
+        offset = np.arange(len(owner)) - np.repeat(np.cumsum(degree) - degree, degree)
+        return owner, self.target[self.first[vertices[owner]] + offset]
+
+    def connected(self, a, b):
+        query = a * self.n_vertices + b
+        position = np.minimum(np.searchsorted(self.keys, query), len(self.keys) - 1)
+        return self.keys[position] == query
+
+
+def link_condition(adjacency, edges, face_counts):
+    """
+    Máscara de las aristas cuyo colapso conserva la variedad: los extremos
+    comparten exactamente los vecinos opuestos de sus caras
+    """
+    owner, neighbor = adjacency.neighbors(edges[:, 0])
+    shared = adjacency.connected(edges[owner, 1], neighbor)
+    return np.bincount(owner[shared], minlength=len(edges)) == face_counts
+
+
+def _match_cheapest(edges, face_counts, adjacency, cost, excluded, count):
+    """
+    Aristas baratas a colapsar en bloque: entre las `count` más baratas que
+    cumplen la condición de enlace, cada una se toma si es la más barata de
+    los anillos de vecinos de sus dos extremos. Así los colapsos no se
+    tocan entre sí.
+    """
+    order = np.flatnonzero(~excluded)
+    order = order[np.argsort(cost[order], kind='stable')[:count]]
+    order = order[link_condition(adjacency, edges[order], face_counts[order])]
+    rank = np.arange(len(order))
+    best = np.full(adjacency.n_vertices, len(order))
+    np.minimum.at(best, edges[order, 0], rank)
+    np.minimum.at(best, edges[order, 1], rank)
+    ring = best.copy()
+    np.minimum.at(ring, edges[:, 0], best[edges[:, 1]])
+    np.minimum.at(ring, edges[:, 1], best[edges[:, 0]])
+    return order[(ring[edges[order, 0]] == rank) & (ring[edges[order, 1]] == rank)]
+
+
+def _apply_collapses(positions, faces, edges, targets, selected):
+    """
+    Resultado de colapsar `selected` (extremo 1 sobre extremo 0): posiciones,
+    caras vivas y la máscara de caras invertidas
+    """
+    keep, drop = edges[selected, 0], edges[selected, 1]
+    remap = np.arange(len(positions))
+    remap[drop] = keep
+    moved = positions.copy()
+    moved[keep] = targets[selected]
+
+    new_faces = remap[faces]
+    alive = ((new_faces[:, 0] != new_faces[:, 1]) & (new_faces[:, 1] != new_faces[:, 2])
+             & (new_faces[:, 0] != new_faces[:, 2]))
+    before = face_normals(positions, faces[alive])
+    after = face_normals(moved, new_faces[alive])
+    flipped = np.einsum('ij,ij->i', before, after) <= 0.0
+    return moved, new_faces[alive], flipped
+
+
+def simplify(positions, faces, target_faces, deviation=None, max_rounds=256, max_retries=8):
+    """
+    Colapsa aristas hasta dejar a lo sumo `target_faces` caras. Cada ronda
+    colapsa en bloque las aristas más baratas que no se tocan entre sí y
+    cumplen la condición de enlace; las que invierten caras se excluyen y
+    se busca otra selección.
+
+    `deviation` (V,) es el desplazamiento acumulado de cada vértice desde la
+    malla original. Retorna (posiciones, caras, desplazamientos).
+    """
+    positions = positions.copy()
+    quadrics = plane_quadrics(positions, faces)
+    if deviation is None:
+        deviation = np.zeros(len(positions))
+
+    n_vertices = len(positions)
+    changed = None  # Vértices movidos en la ronda anterior
+    for _ in range(max_rounds):
+        if len(faces) <= target_faces:
+            break
+        edges, face_counts = mesh_edges(faces, n_vertices)
+        keys = edges[:, 0] * n_vertices + edges[:, 1]
+        if changed is None:
+            cost, targets = collapse_targets(positions, quadrics, edges)
+        else:
+            # Solo cambian los costos de las aristas con un extremo movido
+            dirty = changed[edges[:, 0]] | changed[edges[:, 1]]
+            previous = np.searchsorted(previous_keys, keys[~dirty])
+            cost = np.empty(len(edges))
+            targets = np.empty((len(edges), 3))
+            cost[~dirty] = previous_cost[previous]
+            targets[~dirty] = previous_targets[previous]
+            cost[dirty], targets[dirty] = collapse_targets(positions, quadrics, edges[dirty])
+        # Cada colapso quita ~dos caras
+        needed = max(1, (len(faces) - target_faces) // 2)
+
+        adjacency = Adjacency(edges, n_vertices)
+        excluded = np.zeros(len(edges), dtype=bool)
+        selected = selected_faces = None
+        for _ in range(max_retries):
+            candidate = _match_cheapest(edges, face_counts, adjacency, cost, excluded, 4 * needed)[:needed]
+            if not len(candidate):
+                break
+            moved, new_faces, flipped = _apply_collapses(positions, faces, edges, targets, candidate)
+            if not flipped.any():
+                selected, selected_faces = candidate, new_faces
+                break
+            # Excluir los colapsos que tocan caras invertidas y reintentar
+            touched = np.zeros(len(positions), dtype=bool)
+            touched[new_faces[flipped].ravel()] = True
+            excluded[candidate[touched[edges[candidate, 0]]]] = True
+        if selected is None:
+            break
+
+        keep, drop = edges[selected, 0], edges[selected, 1]
+        shift_keep = np.linalg.norm(moved[keep] - positions[keep], axis=1)
+        shift_drop = np.linalg.norm(moved[keep] - positions[drop], axis=1)
+        deviation[keep] = np.maximum(deviation[keep] + shift_keep, deviation[drop] + shift_drop)
+        quadrics[keep] += quadrics[drop]
+        positions = moved
+        faces = selected_faces
+        changed = np.zeros(n_vertices, dtype=bool)
+        changed[keep] = True
+        previous_keys, previous_cost, previous_targets = keys, cost, targets
+
+    # Compactar los vértices usados
+    used = np.flatnonzero(np.bincount(faces.ravel(), minlength=len(positions)))
+    remap = np.empty(len(positions), dtype=np.int64)
+    remap[used] = np.arange(len(used))
+    return positions[used], remap[faces], deviation[used]
+
+
+def flat_mesh(positions, faces):
+    """
+    Malla con vértices propios por triángulo y normal de cara, para que las
+    aristas vivas del sólido sigan viéndose nítidas
+    """
+    normals = face_normals(positions, faces)
+    length = np.linalg.norm(normals, axis=1, keepdims=True)
+    length[length == 0] = 1.0
+    normals = np.repeat(normals / length, 3, axis=0)
+    return Mesh(positions[faces].reshape(-1, 3), normals, np.arange(3 * len(faces)).reshape(-1, 3))
+
+
+class LevelOfDetail:
+    """
+    Malla de un nivel y su error geométrico (distancia en unidades de mundo)
+    """
+
+    def __init__(self, mesh, error):
+        self.mesh = mesh
+        self.error = error
+
+
+def build_lods(mesh, ratios=LOD_RATIOS):
+    """
+    Niveles de detalle de `mesh`, del original (error 0) al más simple. Los
+    niveles que no reducen la malla se omiten.
+    """
+    return [LevelOfDetail(mesh, 0.0)] + simplified_levels(mesh.vertices, mesh.triangles, ratios)
+
+
+def simplified_levels(vertices, triangles, ratios=LOD_RATIOS):
+    """
+    Niveles simplificados de la malla (vertices, triangles), sin el
+    original
+    """
+    levels = []
+    triangle_count = len(triangles)
+    if triangle_count < MIN_LOD_TRIANGLES:
+        return levels
+
+    # Cada nivel parte del anterior; el error es el mayor desplazamiento
+    # acumulado de un vértice respecto de la malla original
+    positions, faces = weld_vertices(vertices, triangles)
+    deviation = None
+    for ratio in ratios:
+        target = max(4, int(triangle_count * ratio))
+        positions, faces, deviation = simplify(positions, faces, target, deviation)
+        if len(faces) >= (levels[-1].mesh.triangle_count if levels else triangle_count):
+            continue
+        levels.append(LevelOfDetail(flat_mesh(positions, faces), float(deviation.max(initial=0.0))))
+    return levels
+
+
+class LodBuilder:
+    """
+    Cálculo de los niveles de `mesh` en un hilo aparte, para no detener el
+    dibujado: las operaciones de NumPy grandes sueltan el GIL, así que el
+    bucle principal sigue con sus cuadros mientras tanto. `levels` queda en
+    None hasta terminar.
+    """
+
+    def __init__(self, mesh, ratios=LOD_RATIOS):
+        self.levels = None
+        self._mesh = weakref.ref(mesh)
+        self._simplified = None
+        self._error = None
+        # El hilo trabaja sobre copias: ProjectFile.close() puede cambiar
+        # los arreglos de la malla (y cerrar el mmap) mientras tanto
+        self._thread = threading.Thread(
+            target=self._work, args=(mesh.vertices.copy(), mesh.triangles.copy(), ratios),
+            name="lod", daemon=True)
+        self._thread.start()
+
+    def _work(self, vertices, triangles, ratios):
+        try:
+            self._simplified = simplified_levels(vertices, triangles, ratios)
+        except Exception as error:
+            self._error = error
+
+    def run(self, wait=False):
+        """
+        Retorna los niveles si el hilo ya terminó (esperándolo si `wait`),
+        o None. Un error del cálculo se relanza aquí.
+        """
+        if self.levels is None and (wait or not self._thread.is_alive()):
+            self._thread.join()
+            if self._error is not None:
+                raise self._error
+            self.levels = [LevelOfDetail(self._mesh(), 0.0)] + self._simplified
+        return self.levels
+
+
+def select_levels(errors, distances, pixels_per_unit, max_pixel_error=1.0):
+    """
+    Índice del nivel más simple cuyo error proyectado no supera
+    `max_pixel_error` píxeles, para cada cuerpo. `errors` es (N, L) con los
+    errores crecientes de cada nivel (inf en niveles inexistentes).
+    """
+    distances = np.maximum(np.asarray(distances, dtype=np.float64), 1e-6)
+    projected = errors * (pixels_per_unit / distances)[:, None]
+    # Errores crecientes: el número de niveles aceptables menos uno
+    return np.maximum((projected <= max_pixel_error).sum(axis=1) - 1, 0)
+
+
+def pixels_per_unit(fovy, viewport_height):
+    """
+    Píxeles que ocupa una unidad de mundo a distancia 1 de la cámara
+    """
+    return viewport_height / (2.0 * math.tan(math.radians(fovy) / 2.0))
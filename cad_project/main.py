@@ -1,15 +1,45 @@
-
 # main.py
 """
 Punto de entrada principal de la aplicación
+
+Uso: python main.py [proyecto.cadp] [--record eventos.json]
+                    [--replay eventos.json] [--headless] [--profile perfil.csv]
 """
+import argparse
 import sys
-from cad_system import CADSystem
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Sistema CAD")
+    parser.add_argument('project', nargs='?', help="proyecto .cadp a abrir")
+    parser.add_argument('--record', metavar='EVENTOS', help="grabar los eventos de la sesión en un JSON")
+    parser.add_argument('--replay', metavar='EVENTOS', help="reproducir eventos grabados y salir")
+    parser.add_argument('--headless', action='store_true',
+                        help="sin ventana, con un contexto OpenGL fuera de pantalla (EGL u OSMesa)")
+    parser.add_argument('--profile', metavar='PERFIL',
+                        help="registrar tiempos por cuadro y volcarlos al salir (.csv o .json)")
+    return parser.parse_args(argv)
+
 
 def main():
+    args = parse_args(sys.argv[1:])
+    if args.headless:
+        # Debe importarse antes que OpenGL (lo importa cad_system)
+        import headless
+    from cad_system import CADSystem
+    from input_stage import load_event_log
+
     try:
         # Inicializar el sistema CAD
-        cad = CADSystem()
+        cad = CADSystem(headless=args.headless)
+        if args.project:
+            cad.load_project(args.project)
+        if args.replay:
+            cad.replay_events(load_event_log(args.replay))
+        if args.record:
+            cad.record_events(args.record)
+        if args.profile:
+            cad.enable_profiling(args.profile)
 
         # Ejecutar el bucle principal
         cad.run()
@@ -22,4 +52,4 @@ def main():
         sys.exit(0)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
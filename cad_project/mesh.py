@@ -0,0 +1,57 @@
+# mesh.py
+"""
+Malla de triángulos indexada para los sólidos
+"""
+import numpy as np
+
+
+class Mesh:
+    """
+    Vértices (V, 3) y normales (V, 3) en float32, triángulos (T, 3) uint32.
+    Los tipos son los que espera OpenGL, así que se pueden subir sin copia.
+    """
+
+    def __init__(self, vertices, normals, triangles):
+        self.vertices = np.ascontiguousarray(vertices, dtype=np.float32).reshape(-1, 3)
+        self.normals = np.ascontiguousarray(normals, dtype=np.float32).reshape(-1, 3)
+        self.triangles = np.ascontiguousarray(triangles, dtype=np.uint32).reshape(-1, 3)
+
+    @property
+    def vertex_count(self):
+        return len(self.vertices)
+
+    @property
+    def triangle_count(self):
+        return len(self.triangles)
+
+    @property
+    def nbytes(self):
+        return self.vertices.nbytes + self.normals.nbytes + self.triangles.nbytes
+
+    def bounds(self):
+        """
+        Retorna (mínimo, máximo) de la caja envolvente alineada a los ejes
+        """
+        if not len(self.vertices):
+            zero = np.zeros(3, dtype=np.float32)
+            return zero, zero
+        return self.vertices.min(axis=0), self.vertices.max(axis=0)
+
+    def triangle_vertices(self):
+        """
+        Coordenadas de cada triángulo como arreglo (T, 3, 3)
+        """
+        return self.vertices[self.triangles]
+
+    @staticmethod
+    def concatenate(meshes):
+        meshes = [mesh for mesh in meshes if mesh.vertex_count]
+        if not meshes:
+            return Mesh(np.zeros((0, 3)), np.zeros((0, 3)), np.zeros((0, 3)))
+        offsets = np.cumsum([0] + [mesh.vertex_count for mesh in meshes[:-1]])
+        return Mesh(
+            np.concatenate([mesh.vertices for mesh in meshes]),
+            np.concatenate([mesh.normals for mesh in meshes]),
+            np.concatenate([mesh.triangles.astype(np.int64) + offset
+                            for mesh, offset in zip(meshes, offsets)]),
+        )
@@ -0,0 +1,241 @@
+# mesh_export.py
+"""
+Exportación de mallas a STL binario y Wavefront OBJ por bloques de
+memoria acotada. Cada parte es (malla, transformación 4x4, nombre).
+"""
+import struct
+import numpy as np
+
+CHUNK_TRIANGLES = 1 << 18
+OBJ_DECIMALS = 6
+
+# Faceta de STL binario: normal, tres vértices y atributo (50 bytes)
+STL_FACET = np.dtype([('normal', '<f4', (3,)), ('vertices', '<f4', (3, 3)), ('attribute', '<u2')])
+
+_PAD = b'\0'  # Relleno de los campos de ancho fijo, se elimina al escribir
+
+
+def _transform_points(points, transform):
+    if transform is None:
+        return points
+    return points @ transform[:3, :3].T + transform[:3, 3]
+
+
+def _transform_normals(normals, transform):
+    if transform is None:
+        return normals
+    normals = normals @ np.linalg.inv(transform[:3, :3])  # (M^-1)^T aplicado por filas
+    length = np.linalg.norm(normals, axis=1, keepdims=True)
+    return normals / np.where(length > 0, length, 1.0)
+
+
+def _words(texts):
+    # Textos de hasta 4 caracteres ASCII, cada uno en un uint32 rellenado con _PAD
+    return np.frombuffer(b''.join(text.encode('ascii').rjust(4, _PAD) for text in texts),
+                         dtype=np.uint32)
+
+
+def _word(text):
+    return np.frombuffer(text.encode('ascii').ljust(4, _PAD), dtype=np.uint32)[0]
+
+
+# Grupos de cuatro cifras 0000-9999 en ASCII, cada uno en un uint32: los
+# enteros se convierten por grupos y no cifra a cifra. Tres tablas seguidas:
+# con ceros a la izquierda, sin ellos para el grupo más significativo y sin
+# ellos pero con el "0" de un número nulo para el grupo de las unidades.
+_DIGIT_TABLE = np.concatenate([
+    _words(f"{value:04d}" for value in range(10000)),
+    _words(f"{value:d}" if value else "" for value in range(10000)),
+    _words(f"{value:d}" for value in range(10000)),
+])
+_LEADING, _UNITS = 10000, 20000
+
+# Decimales de menos de cuatro cifras precedidos del punto (".5", ".25", ".125")
+_FRACTION_TABLES = {digits: _words(f".{value:0{digits}d}" for value in range(10 ** digits))
+                    for digits in (1, 2, 3)}
+
+
+def _compact(values):
+    # La división entera es bastante más rápida en 32 bits
+    if values.size and values.max() < 1 << 31:
+        return values.astype(np.int32)
+    return values
+
+
+def _groups(values):
+    # Grupos de cuatro cifras que necesita el mayor de `values`
+    return -(-len(str(int(values.max()))) // 4) if values.size else 1
+
+
+def _gather(out, table, index):
+    # Tomar en un bloque contiguo con índices intp y copiar después al
+    # campo es bastante más rápido que np.take con `out` no contiguo
+    out[...] = np.take(table, index.astype(np.intp))
+
+
+def _digit_words(out, values, groups):
+    """
+    Escribe en `out` (..., groups) las cifras ASCII de enteros no negativos,
+    con _PAD en lugar de los ceros a la izquierda
+    """
+    rest = _compact(values)
+    for group in range(groups - 1, -1, -1):
+        quotient = rest // 10000
+        index = rest - quotient * 10000
+        # Sin más cifras por delante: tabla sin ceros a la izquierda
+        index += (quotient == 0) * np.int32(_UNITS if group == groups - 1 else _LEADING)
+        _gather(out[..., group], _DIGIT_TABLE, index)
+        rest = quotient
+
+
+def _compress(lines):
+    # Quitar el relleno deja cada número con su ancho justo
+    return lines.tobytes().translate(None, _PAD)
+
+
+def format_float_rows(prefix, values, decimals=OBJ_DECIMALS):
+    """
+    Filas de texto `prefijo x y z` con `decimals` decimales fijos. Los
+    números se convierten a cifras con aritmética entera sobre todo el
+    bloque, en campos de ancho fijo de palabras de 4 bytes cuyo relleno se
+    elimina al final, sin formatear valor por valor.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    rows, columns = values.shape
+    scale = 10 ** decimals
+    # Parte entera y decimales en coma flotante: son exactos y más rápidos
+    # que la división entera en 64 bits
+    magnitude = np.abs(values)
+    magnitude *= scale
+    np.rint(magnitude, out=magnitude)
+    negative = (values < 0) & (magnitude > 0)
+    integer = np.floor(magnitude / scale)
+    magnitude -= integer * scale
+    fraction = magnitude.astype(np.int32)
+    integer = integer.astype(np.int64)
+
+    # Campo: espacio y signo, parte entera, punto y decimales. El punto va
+    # en la palabra de los decimales más significativos si caben con él;
+    # sin decimales no hay punto, como con "%.0f".
+    integer_groups = _groups(integer)
+    fraction_groups, leading = divmod(decimals, 4)
+    field = 1 + integer_groups + (1 if decimals else 0) + fraction_groups
+    prefix = prefix.encode('ascii')
+    head = -(-len(prefix) // 4)
+    lines = np.empty((rows, head + columns * field + 1), dtype=np.uint32)
+    lines[:, :head] = np.frombuffer(prefix.ljust(4 * head, _PAD), dtype=np.uint32)
+    fields = lines[:, head:-1].reshape(rows, columns, field)
+    fields[..., 0] = np.where(negative, _word(" -"), _word(" "))
+    _digit_words(fields[..., 1:1 + integer_groups], integer, integer_groups)
+    rest = fraction
+    for group in range(field - 1, field - 1 - fraction_groups, -1):
+        quotient = rest // 10000
+        _gather(fields[..., group], _DIGIT_TABLE, rest - quotient * 10000)
+        rest = quotient
+    if leading:
+        _gather(fields[..., 1 + integer_groups], _FRACTION_TABLES[leading], rest)
+    elif decimals:
+        fields[..., 1 + integer_groups] = _word(".")
+    lines[:, -1] = _word("\n")
+    return _compress(lines)
+
+
+def format_face_rows(faces, normals):
+    """
+    Filas `f v//n v//n v//n` con los índices (base 1) de vértice y normal
+    """
+    faces = np.asarray(faces)
+    normals = np.asarray(normals)
+    rows, columns = faces.shape
+    groups = _groups(faces)
+    normal_groups = _groups(normals)
+
+    # Campo: espacio, índice de vértice, "//" e índice de normal
+    field = groups + normal_groups + 2
+    lines = np.empty((rows, columns * field + 1), dtype=np.uint32)
+    fields = lines[:, :-1].reshape(rows, columns, field)
+    fields[..., 0] = _word(" ")
+    fields[:, 0, 0] = _word("f ")
+    _digit_words(fields[..., 1:1 + groups], faces, groups)
+    fields[..., 1 + groups] = _word("//")
+    _digit_words(fields[..., 2 + groups:], normals, normal_groups)
+    lines[:, -1] = _word("\n")
+    return _compress(lines)
+
+
+def write_stl(path, parts, chunk=CHUNK_TRIANGLES, header=b"cad_project binary STL"):
+    """
+    STL binario con todas las partes. Las normales de faceta se calculan
+    de los vértices ya transformados. Retorna el número de triángulos.
+    """
+    parts = list(parts)
+    total = sum(mesh.triangle_count for mesh, _, _ in parts)
+    if total >= 1 << 32:
+        raise ValueError("STL binario admite como máximo 2^32 - 1 triángulos")
+    facets = np.zeros(min(chunk, max(total, 1)), dtype=STL_FACET)
+    with open(path, 'wb') as file:
+        file.write(header[:80].ljust(80, b'\0'))
+        file.write(struct.pack('<I', total))
+        for mesh, transform, _ in parts:
+            for start in range(0, mesh.triangle_count, chunk):
+                triangles = mesh.triangles[start:start + chunk]
+                corners = _transform_points(mesh.vertices[triangles].astype(np.float64), transform)
+                normals = np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0])
+                length = np.linalg.norm(normals, axis=1, keepdims=True)
+                block = facets[:len(triangles)]
+                block['normal'] = normals / np.where(length > 0, length, 1.0)
+                block['vertices'] = corners
+                file.write(memoryview(block).cast('B'))
+    return total
+
+
+def normal_runs(normals):
+    """
+    Índice de normal de cada vértice cuando las normales repetidas de
+    vértices consecutivos (caras planas, tapas) se escriben una sola vez.
+    Retorna (índices, posiciones de las normales distintas).
+    """
+    changed = np.ones(len(normals), dtype=bool)
+    changed[1:] = (normals[1:] != normals[:-1]).any(axis=1)
+    return np.cumsum(changed, dtype=np.int64) - 1, np.flatnonzero(changed)
+
+
+def write_obj(path, parts, chunk=CHUNK_TRIANGLES, decimals=OBJ_DECIMALS):
+    """
+    Wavefront OBJ con un objeto `o` por parte, vértices y normales en
+    coordenadas de mundo y caras `v//vn`. Retorna el número de triángulos.
+    """
+    total = 0
+    # Los índices de OBJ empiezan en 1 y son globales al archivo
+    vertex_offset = normal_offset = 1
+    with open(path, 'wb') as file:
+        file.write(b"# cad_project\n")
+        for index, (mesh, transform, name) in enumerate(parts):
+            label = (name or f"cuerpo_{index + 1}").replace('\n', ' ')
+            file.write(f"o {label}\n".encode('utf-8'))
+            for start in range(0, mesh.vertex_count, chunk):
+                positions = _transform_points(mesh.vertices[start:start + chunk].astype(np.float64), transform)
+                file.write(format_float_rows('v', positions, decimals))
+            normal_index, distinct = normal_runs(mesh.normals)
+            for start in range(0, len(distinct), chunk):
+                normals = mesh.normals[distinct[start:start + chunk]].astype(np.float64)
+                file.write(format_float_rows('vn', _transform_normals(normals, transform), decimals))
+            for start in range(0, mesh.triangle_count, chunk):
+                triangles = mesh.triangles[start:start + chunk].astype(np.int64)
+                file.write(format_face_rows(triangles + vertex_offset, normal_index[triangles] + normal_offset))
+            vertex_offset += mesh.vertex_count
+            normal_offset += len(distinct)
+            total += mesh.triangle_count
+    return total
+
+
+def export_mesh_file(path, parts, chunk=CHUNK_TRIANGLES):
+    """
+    Elige el formato por la extensión (.stl u .obj)
+    """
+    extension = str(path).lower().rsplit('.', 1)[-1]
+    if extension == 'stl':
+        return write_stl(path, parts, chunk)
+    if extension == 'obj':
+        return write_obj(path, parts, chunk)
+    raise ValueError(f"Formato de exportación no soportado: .{extension}")
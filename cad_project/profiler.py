@@ -0,0 +1,230 @@
+# profiler.py
+"""
+Instrumentación por cuadro: tiempos de bloques con nombre, contadores y
+llamadas a OpenGL en un búfer circular, con volcado a CSV o JSON. Desactivado
+cuesta una comprobación por bloque: scope() devuelve siempre el mismo
+contexto vacío.
+"""
+import csv
+import functools
+import json
+import time
+import numpy as np
+
+DEFAULT_CAPACITY = 600  # Cuadros guardados (10 s a 60 FPS)
+SUMMARY_PERCENTILES = (50, 90, 99)
+
+
+class _NullScope:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SCOPE = _NullScope()
+
+
+class _Scope:
+    __slots__ = ('profiler', 'name', 'start')
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.add_time(self.name, (time.perf_counter() - self.start) * 1000.0)
+        return False
+
+
+class Profiler:
+    """
+    Cada cuadro (begin_frame / end_frame) es una fila del búfer circular de
+    `capacity` cuadros; cada nombre usado es una columna. Los tiempos están
+    en milisegundos y se acumulan si un bloque se repite en el cuadro.
+    """
+
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        self.enabled = False
+        self.capacity = capacity
+        self.columns = {'frame': 0}  # Nombre -> columna
+        self.samples = np.zeros((capacity, 1))
+        self.frame_count = 0  # Cuadros registrados desde el inicio
+        self._current = {}
+        self._frame_start = None
+        self._gl_patches = []  # (módulo, nombre, función original)
+
+    # --- Activación -------------------------------------------------------
+
+    def enable(self, gl_modules=()):
+        """
+        Empieza a registrar. Las funciones gl* de `gl_modules` se envuelven
+        para contar las llamadas a OpenGL ('gl_calls', y 'draw_calls' las de
+        dibujo) hasta disable().
+        """
+        if not self.enabled:
+            self.enabled = True
+            for module in gl_modules:
+                self._count_gl_calls(module)
+
+    def disable(self):
+        self.enabled = False
+        self._frame_start = None
+        for module, name, original in reversed(self._gl_patches):
+            setattr(module, name, original)
+        self._gl_patches.clear()
+
+    def _count_gl_calls(self, module):
+        # Los módulos importan OpenGL con `from OpenGL.GL import *`, así que
+        # cada uno tiene sus propias referencias a las funciones
+        for name, function in list(vars(module).items()):
+            if not name.startswith('gl') or not callable(function):
+                continue
+            draw = name.startswith('glDraw') or name.startswith('glCallList')
+            setattr(module, name, self._counting(function, draw))
+            self._gl_patches.append((module, name, function))
+
+    def _counting(self, function, draw):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            current = self._current
+            current['gl_calls'] = current.get('gl_calls', 0) + 1
+            if draw:
+                current['draw_calls'] = current.get('draw_calls', 0) + 1
+            return function(*args, **kwargs)
+        return wrapper
+
+    # --- Registro ---------------------------------------------------------
+
+    def scope(self, name):
+        """
+        Contexto que suma su duración al bloque `name` del cuadro actual
+        """
+        if not self.enabled:
+            return _NULL_SCOPE
+        return _Scope(self, name)
+
+    def add_time(self, name, milliseconds):
+        if self.enabled:
+            self._current[name] = self._current.get(name, 0.0) + milliseconds
+
+    def add(self, name, amount=1):
+        """
+        Suma `amount` al contador `name` del cuadro actual
+        """
+        if self.enabled:
+            self._current[name] = self._current.get(name, 0) + amount
+
+    def set(self, name, value):
+        """
+        Valor del cuadro actual (tamaños, recuentos)
+        """
+        if self.enabled:
+            self._current[name] = value
+
+    def begin_frame(self):
+        if self.enabled:
+            self._frame_start = time.perf_counter()
+
+    def end_frame(self):
+        if not self.enabled or self._frame_start is None:
+            return
+        current = self._current
+        current['frame'] = (time.perf_counter() - self._frame_start) * 1000.0
+        for name in current:
+            if name not in self.columns:
+                self._add_column(name)
+        row = self.samples[self.frame_count % self.capacity]
+        row[:] = 0.0
+        for name, value in current.items():
+            row[self.columns[name]] = value
+        self.frame_count += 1
+        self._current = {}
+
+    def _add_column(self, name):
+        self.columns[name] = len(self.columns)
+        self.samples = np.hstack([self.samples, np.zeros((self.capacity, 1))])
+
+    # --- Consulta ---------------------------------------------------------
+
+    def values(self, name):
+        """
+        Valores de `name` en los cuadros guardados, del más antiguo al más
+        reciente (ceros si nunca se registró)
+        """
+        column = self.columns.get(name)
+        count = min(self.frame_count, self.capacity)
+        if column is None:
+            return np.zeros(count)
+        if self.frame_count <= self.capacity:
+            return self.samples[:count, column].copy()
+        start = self.frame_count % self.capacity
+        return np.concatenate([self.samples[start:, column], self.samples[:start, column]])
+
+    def percentile(self, name, q):
+        values = self.values(name)
+        return float(np.percentile(values, q)) if len(values) else 0.0
+
+    def summary(self):
+        """
+        Percentiles y media de cada columna sobre los cuadros guardados
+        """
+        result = {}
+        for name in self.columns:
+            values = self.values(name)
+            if not len(values):
+                continue
+            stats = {f"p{q}": float(value)
+                     for q, value in zip(SUMMARY_PERCENTILES, np.percentile(values, SUMMARY_PERCENTILES))}
+            stats.update(mean=float(values.mean()), max=float(values.max()))
+            result[name] = stats
+        return result
+
+    def dump(self, path):
+        """
+        Guarda los cuadros del búfer en CSV (una fila por cuadro) o JSON
+        (filas y resumen) según la extensión. Retorna los cuadros escritos.
+        """
+        names = list(self.columns)
+        table = np.column_stack([self.values(name) for name in names]) if names else np.zeros((0, 0))
+        first = self.frame_count - len(table)
+        extension = str(path).lower().rsplit('.', 1)[-1]
+        if extension == 'csv':
+            with open(path, 'w', newline='', encoding='utf-8') as file:
+                writer = csv.writer(file)
+                writer.writerow(['index'] + names)
+                for offset, row in enumerate(table.tolist()):
+                    writer.writerow([first + offset] + row)
+        elif extension == 'json':
+            with open(path, 'w', encoding='utf-8') as file:
+                json.dump({'first_frame': first, 'columns': names, 'frames': table.tolist(),
+                           'summary': self.summary()}, file)
+        else:
+            raise ValueError(f"Formato de volcado no soportado: .{extension}")
+        return len(table)
+
+    def clear(self):
+        self.samples[:] = 0.0
+        self.frame_count = 0
+        self._current = {}
+
+
+_profiler = Profiler()
+
+
+def get_profiler():
+    """
+    Profiler compartido por la aplicación
+    """
+    return _profiler
+
+
+def scope(name):
+    return _profiler.scope(name) if _profiler.enabled else _NULL_SCOPE
@@ -0,0 +1,352 @@
+# profiles.py
+"""
+Detección de perfiles cerrados y regiones (contorno exterior y agujeros) a
+partir de las líneas del sketch
+"""
+import math
+import numpy as np
+
+
+def connected_components(n_points, edges):
+    """
+    Etiqueta de componente conexa por vértice (enganche y atajos
+    vectorizados, O(log n) rondas)
+    """
+    labels = np.arange(n_points)
+    if not len(edges):
+        return labels
+    a, b = edges[:, 0], edges[:, 1]
+    while True:
+        la, lb = labels[a], labels[b]
+        differs = la != lb
+        if not differs.any():
+            return labels
+        high = np.maximum(la[differs], lb[differs])
+        low = np.minimum(la[differs], lb[differs])
+        np.minimum.at(labels, high, low)
+        while True:
+            jumped = labels[labels]
+            if np.array_equal(jumped, labels):
+                break
+            labels = jumped
+
+
+def unique_edges(edges):
+    """
+    Elimina aristas degeneradas y duplicadas (sin importar la dirección)
+    """
+    edges = np.sort(np.asarray(edges, dtype=np.int64).reshape(-1, 2), axis=1)
+    edges = edges[edges[:, 0] != edges[:, 1]]
+    if not len(edges):
+        return edges
+    keys = edges[:, 0] * (int(edges.max()) + 1) + edges[:, 1]
+    order = np.argsort(keys, kind='stable')
+    keys = keys[order]
+    keep = np.ones(len(keys), dtype=bool)
+    keep[1:] = keys[1:] != keys[:-1]
+    return edges[order[keep]]
+
+
+def prune_dangling(n_points, edges):
+    """
+    Quita iterativamente las aristas con un extremo de grado 1 (cadenas
+    abiertas). Retorna (aristas restantes, aristas quitadas).
+    """
+    degree = np.bincount(edges.ravel(), minlength=n_points)
+    if not (degree == 1).any():
+        return edges, edges[:0]
+
+    # Adyacencia en formato CSR: vértice -> aristas incidentes
+    ends = edges.ravel()
+    incident = np.argsort(ends, kind='stable') // 2
+    offsets = np.concatenate([[0], np.cumsum(degree)]).tolist()
+    incident = incident.tolist()
+    edge_list = edges.tolist()
+    degree = degree.tolist()
+    removed = bytearray(len(edge_list))
+
+    stack = [v for v in range(n_points) if degree[v] == 1]
+    while stack:
+        vertex = stack.pop()
+        if degree[vertex] != 1:
+            continue
+        for edge in incident[offsets[vertex]:offsets[vertex + 1]]:
+            if not removed[edge]:
+                break
+        removed[edge] = 1
+        a, b = edge_list[edge]
+        other = b if a == vertex else a
+        degree[vertex] -= 1
+        degree[other] -= 1
+        if degree[other] == 1:
+            stack.append(other)
+
+    removed = np.frombuffer(bytes(removed), dtype=np.uint8).astype(bool)
+    return edges[~removed], edges[removed]
+
+
+def order_cycles(successor):
+    """
+    Descompone la permutación `successor` en ciclos con saltos de punteros.
+    Retorna (orden de los elementos agrupados por ciclo empezando por su
+    líder, etiqueta de ciclo por elemento, inicio de cada ciclo en el orden).
+    """
+    count = len(successor)
+    # Líder de cada ciclo = índice mínimo del ciclo
+    leader = np.arange(count)
+    jump = successor.copy()
+    steps = 1
+    while steps < count:
+        leader = np.minimum(leader, leader[jump])
+        jump = jump[jump]
+        steps *= 2
+
+    # Distancia hasta el final del ciclo (el elemento previo al líder)
+    terminal = successor == leader
+    rank = np.where(terminal, 0, 1)
+    jump = np.where(terminal, np.arange(count), successor)
+    steps = 1
+    while steps < count:
+        rank = rank + rank[jump]
+        jump = jump[jump]
+        steps *= 2
+
+    order = np.lexsort((-rank, leader))
+    leaders = leader[order]
+    starts = np.flatnonzero(np.concatenate([[True], leaders[1:] != leaders[:-1]]))
+    labels = np.empty(count, dtype=np.int64)
+    labels[order] = np.repeat(np.arange(len(starts)), np.diff(np.append(starts, count)))
+    return order, labels, starts
+
+
+def point_in_polygon(point, polygon):
+    """
+    Prueba de paridad de cruces (estricta para puntos fuera del borde)
+    """
+    x, y = point
+    xi, yi = polygon[:, 0], polygon[:, 1]
+    xj, yj = np.roll(xi, 1), np.roll(yi, 1)
+    crosses = (yi > y) != (yj > y)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        x_cross = (xj - xi) * (y - yi) / (yj - yi) + xi
+    return bool(np.count_nonzero(crosses & (x < x_cross)) % 2)
+
+
+def make_half_edges(edges):
+    """
+    Semiaristas: 2i = a -> b, 2i + 1 = b -> a (la gemela de h es h ^ 1)
+    """
+    half_edges = np.empty((2 * len(edges), 2), dtype=np.int64)
+    half_edges[0::2] = edges
+    half_edges[1::2] = edges[:, ::-1]
+    return half_edges
+
+
+def face_successors(points, half_edges):
+    """
+    Siguiente semiarista de cada cara (la cara queda a la izquierda): la
+    anterior a la gemela en el orden antihorario alrededor del vértice de
+    llegada
+    """
+    origin, target = half_edges[:, 0], half_edges[:, 1]
+    delta = points[target] - points[origin]
+    angle = np.arctan2(delta[:, 1], delta[:, 0])
+
+    # Orden antihorario de las semiaristas salientes de cada vértice
+    by_vertex = np.lexsort((angle, origin))
+    position = np.empty_like(by_vertex)
+    position[by_vertex] = np.arange(len(by_vertex))
+    degree = np.bincount(origin, minlength=len(points))
+    first = np.concatenate([[0], np.cumsum(degree)[:-1]])
+
+    twin = np.arange(len(half_edges)) ^ 1
+    start = first[origin[twin]]
+    return by_vertex[start + (position[twin] - start - 1) % degree[origin[twin]]]
+
+
+class BoxGrid:
+    """
+    Rejilla uniforme sobre cajas (xmin, ymin, xmax, ymax) para encontrar las
+    que contienen un punto sin recorrerlas todas. Las cajas que ocupan
+    demasiadas celdas se guardan aparte y se revisan siempre.
+    """
+
+    MAX_CELLS_PER_BOX = 64
+
+    def __init__(self, boxes):
+        self.boxes = boxes
+        self.cells = {}
+        self.large = []
+        if not len(boxes):
+            self.cell_size = 1.0
+            return
+        extent = np.maximum(boxes[:, 2] - boxes[:, 0], boxes[:, 3] - boxes[:, 1])
+        self.cell_size = max(float(np.median(extent)), 1e-12)
+        low = np.floor(boxes[:, :2] / self.cell_size).astype(np.int64)
+        high = np.floor(boxes[:, 2:] / self.cell_size).astype(np.int64)
+        spans = (high - low + 1).prod(axis=1)
+        for index, (x0, y0), (x1, y1), span in zip(range(len(boxes)), low.tolist(),
+                                                    high.tolist(), spans.tolist()):
+            if span > self.MAX_CELLS_PER_BOX:
+                self.large.append(index)
+                continue
+            for ix in range(x0, x1 + 1):
+                for iy in range(y0, y1 + 1):
+                    self.cells.setdefault((ix, iy), []).append(index)
+
+    def query(self, point):
+        """
+        Índices de las cajas que contienen estrictamente `point`
+        """
+        x, y = float(point[0]), float(point[1])
+        key = (math.floor(x / self.cell_size), math.floor(y / self.cell_size))
+        result = []
+        for index in self.cells.get(key, []) + self.large:
+            x0, y0, x1, y1 = self.boxes[index]
+            if x0 < x < x1 and y0 < y < y1:
+                result.append(index)
+        return result
+
+
+class Region:
+    """
+    Región plana: contorno exterior antihorario y agujeros horarios (índices
+    de vértices). `depth` es la profundidad de anidamiento: las regiones de
+    profundidad par son sólidas y las impares quedan como huecos.
+    """
+
+    def __init__(self, outer, holes, depth, area):
+        self.outer = outer
+        self.holes = holes
+        self.depth = depth
+        self.area = area
+
+    @property
+    def is_solid(self):
+        return self.depth % 2 == 0
+
+    def boundaries(self):
+        return [self.outer] + self.holes
+
+
+class Profiles:
+    """
+    Resultado de build_profiles: ciclos del grafo de líneas, regiones y la
+    información de semiaristas necesaria para generar paredes
+    """
+
+    def __init__(self, points, half_edges, cycle_of, cycles, cycle_area,
+                 cycle_region, regions, loose_edges):
+        self.points = points
+        self.half_edges = half_edges      # (H, 2) origen -> destino
+        self.cycle_of = cycle_of          # Ciclo de cada semiarista
+        self.cycles = cycles              # Vértices de cada ciclo en orden
+        self.cycle_area = cycle_area      # Área con signo de cada ciclo
+        self.cycle_region = cycle_region  # Región a la izquierda del ciclo (-1 = exterior)
+        self.regions = regions
+        self.loose_edges = loose_edges    # Aristas que no cierran ningún ciclo
+
+    @property
+    def loops(self):
+        """
+        Contornos cerrados en sentido antihorario
+        """
+        return [region.outer for region in self.regions]
+
+    def solid_regions(self):
+        return [region for region in self.regions if region.is_solid]
+
+    def wall_segments(self):
+        """
+        Semiaristas en la frontera entre región sólida y vacío, orientadas
+        con el sólido a la izquierda (normal exterior hacia la derecha)
+        """
+        if not len(self.half_edges):
+            return self.half_edges
+        solid = np.array([region.is_solid for region in self.regions] + [False])
+        side = solid[self.cycle_region[self.cycle_of]]
+        twin = np.arange(len(self.half_edges)) ^ 1
+        return self.half_edges[side & ~side[twin]]
+
+
+def build_profiles(points, edges, area_epsilon=1e-12):
+    """
+    Construye los ciclos y regiones del grafo plano formado por `edges`.
+    Las caras se recorren con semiaristas ordenadas por ángulo alrededor de
+    cada vértice; las de área positiva son regiones acotadas y las de área
+    negativa son contornos exteriores de cada componente, que se asignan
+    como agujeros a la menor región que los contiene.
+    """
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    n_points = len(points)
+    edges = unique_edges(edges)
+    edges, loose = prune_dangling(n_points, edges)
+
+    empty = np.zeros((0, 2), dtype=np.int64)
+    if not len(edges):
+        return Profiles(points, empty, np.zeros(0, dtype=np.int64), [], np.zeros(0),
+                        np.zeros(0, dtype=np.int64), [], loose)
+
+    half_edges = make_half_edges(edges)
+    origin, target = half_edges[:, 0], half_edges[:, 1]
+    successor = face_successors(points, half_edges)
+
+    order, cycle_of, starts = order_cycles(successor)
+    cross = points[origin, 0] * points[target, 1] - points[target, 0] * points[origin, 1]
+    cycle_area = 0.5 * np.bincount(cycle_of, weights=cross, minlength=len(starts))
+    cycle_vertices = np.split(origin[order], starts[1:])
+
+    # Regiones acotadas (área positiva) y contornos exteriores (negativa)
+    bounded = np.flatnonzero(cycle_area > area_epsilon)
+    outer = np.flatnonzero(cycle_area < -area_epsilon)
+    component = connected_components(n_points, edges)
+    cycle_component = component[origin[order[starts]]]
+
+    cycle_region = np.full(len(starts), -1, dtype=np.int64)
+    cycle_region[bounded] = np.arange(len(bounded))
+
+    # Caja envolvente de cada ciclo, en bloque sobre los vértices ordenados
+    ordered = points[origin[order]]
+    cycle_boxes = np.hstack([np.minimum.reduceat(ordered, starts),
+                             np.maximum.reduceat(ordered, starts)])
+    grid = BoxGrid(cycle_boxes[bounded])
+    region_area = cycle_area[bounded]
+
+    # Padre de cada componente: la menor región de otra componente que la contiene
+    component_parent = {}
+    holes = [[] for _ in bounded]
+    cycle_starts = [cycle[0] for cycle in cycle_vertices]
+    for cycle in outer.tolist():
+        point = points[cycle_starts[cycle]]
+        parent = -1
+        candidates = grid.query(point)
+        candidates.sort(key=region_area.__getitem__)
+        for region in candidates:
+            face = bounded[region]
+            if cycle_component[face] == cycle_component[cycle]:
+                continue
+            if point_in_polygon(point, points[cycle_vertices[face]]):
+                parent = region
+                break
+        cycle_region[cycle] = parent
+        component_parent[int(cycle_component[cycle])] = parent
+        if parent >= 0:
+            holes[parent].append(cycle_vertices[cycle])
+
+    # Profundidad de anidamiento de cada componente
+    depth_cache = {}
+
+    def component_depth(comp):
+        if comp not in depth_cache:
+            parent = component_parent.get(comp, -1)
+            depth_cache[comp] = 0 if parent < 0 else \
+                component_depth(int(cycle_component[bounded[parent]])) + 1
+        return depth_cache[comp]
+
+    regions = [Region(cycle_vertices[face], holes[i],
+                      component_depth(int(cycle_component[face])),
+                      float(cycle_area[face]))
+               for i, face in enumerate(bounded.tolist())]
+
+    return Profiles(points, half_edges, cycle_of, cycle_vertices, cycle_area,
+                    cycle_region, regions, loose)
@@ -0,0 +1,268 @@
+# project_file.py
+"""
+Formato binario de proyecto (.cadp): geometría del sketch y mallas de los
+cuerpos en bloques contiguos little-endian que se cargan con mmap
+
+Estructura:
+    cabecera     '<4sHHQQ': magia, versión, reservado, nº de secciones,
+                 desplazamiento de la tabla de secciones
+    bloques      arreglos de datos alineados a BLOCK_ALIGN bytes
+    tabla        por sección: etiqueta (4 bytes), tamaño de los metadatos
+                 (u32) y los metadatos, que apuntan a sus bloques
+
+Secciones:
+    SKCH  vértices (N, 2) '<f8' y aristas (M, 2) '<i4' de un sketch; desde
+          la versión 2 además su plano de trabajo, caja envolvente en
+          coordenadas del sketch, visibilidad y nombre (una por sketch)
+    BODY  vértices y normales (V, 3) '<f4', triángulos (T, 3) '<u4',
+          caja envolvente, transformación, color y nombre del cuerpo
+"""
+import mmap
+import os
+import struct
+import numpy as np
+from mesh import Mesh
+from workplane import Workplane
+
+MAGIC = b'CADP'
+VERSION = 2
+BLOCK_ALIGN = 64
+
+_HEADER = struct.Struct('<4sHHQQ')
+_SECTION = struct.Struct('<4sI')
+_SKETCH = struct.Struct('<QQdQQ')  # vértices, aristas, snap, desplazamientos
+_SKETCH_PLANE = struct.Struct('<9d4d?I')  # + nombre utf-8 de longitud variable
+_BODY = struct.Struct('<QQQQQ6d16d3dI')  # + nombre utf-8 de longitud variable
+
+SKETCH_VERTEX = np.dtype('<f8')
+SKETCH_EDGE = np.dtype('<i4')
+MESH_FLOAT = np.dtype('<f4')
+MESH_INDEX = np.dtype('<u4')
+
+
+class _BlockWriter:
+    """
+    Escribe arreglos alineados y guarda dónde quedó cada uno
+    """
+
+    def __init__(self, file):
+        self.file = file
+        self.position = file.tell()
+
+    def write(self, array, dtype):
+        padding = -self.position % BLOCK_ALIGN
+        if padding:
+            self.file.write(b'\0' * padding)
+            self.position += padding
+        offset = self.position
+        data = np.ascontiguousarray(array, dtype=dtype)
+        self.file.write(memoryview(data.reshape(-1)).cast('B'))
+        self.position += data.nbytes
+        return offset
+
+
+def _sketch_metadata(blocks, points, edges, snap_distance, workplane, bounds, visible, name):
+    vertex_offset = blocks.write(points, SKETCH_VERTEX)
+    edge_offset = blocks.write(edges, SKETCH_EDGE)
+    if bounds is None:
+        bounds = (np.full(2, np.nan), np.full(2, np.nan))
+    name = (name or '').encode('utf-8')
+    return (_SKETCH.pack(len(points), len(edges), snap_distance, vertex_offset, edge_offset)
+            + _SKETCH_PLANE.pack(*workplane.origin.tolist(), *workplane.normal.tolist(),
+                                 *workplane.x_axis.tolist(), *bounds[0].tolist(), *bounds[1].tolist(),
+                                 bool(visible), len(name))
+            + name)
+
+
+def save_project(path, sketches, bodies, snap_distance=0.1):
+    """
+    Guarda los sketches y los cuerpos de la escena. `sketches` es una
+    SketchCollection (cada sketch con su plano de trabajo; los que no se
+    llegaron a cargar se copian del proyecto de origen sin materializarlos)
+    o un GeometryStore, que se guarda como único sketch en el plano z = 0.
+    Se escribe en un archivo temporal que luego reemplaza al destino, así
+    un proyecto abierto con mmap en la misma ruta sigue siendo válido. En
+    Windows un archivo mapeado no se puede reemplazar: el ProjectFile de
+    esa ruta se cierra antes con close().
+    """
+    if hasattr(sketches, 'n_vertices'):
+        store = sketches
+        points = store.points
+        bounds = (points.min(axis=0), points.max(axis=0)) if len(points) else None
+        records = [(points, store.edges, snap_distance, Workplane(), bounds, True, None)]
+    else:
+        records = [(*entry.arrays(), entry.snap_distance, entry.workplane, entry.local_bounds(),
+                    entry.visible, entry.name) for entry in sketches]
+
+    temporary = f"{path}.tmp"
+    with open(temporary, 'wb') as file:
+        file.write(b'\0' * _HEADER.size)
+        blocks = _BlockWriter(file)
+        sections = [(b'SKCH', _sketch_metadata(blocks, *record)) for record in records]
+
+        for body in bodies:
+            mesh = body.mesh
+            offsets = (blocks.write(mesh.vertices, MESH_FLOAT),
+                       blocks.write(mesh.normals, MESH_FLOAT),
+                       blocks.write(mesh.triangles, MESH_INDEX))
+            name = (body.name or '').encode('utf-8')
+            low, high = body.local_bounds
+            metadata = _BODY.pack(mesh.vertex_count, mesh.triangle_count, *offsets,
+                                  *np.concatenate([low, high]).tolist(),
+                                  *np.asarray(body.transform, dtype=np.float64).ravel().tolist(),
+                                  *body.color, len(name))
+            sections.append((b'BODY', metadata + name))
+
+        table_offset = blocks.position
+        for tag, metadata in sections:
+            file.write(_SECTION.pack(tag, len(metadata)))
+            file.write(metadata)
+        file.seek(0)
+        file.write(_HEADER.pack(MAGIC, VERSION, 0, len(sections), table_offset))
+    os.replace(temporary, path)
+
+
+class SketchRecord:
+    """
+    Sketch de un proyecto abierto: plano de trabajo, caja envolvente y
+    vistas de np.frombuffer sobre el mmap que se leen al materializarlo.
+    Los archivos de la versión 1 solo tienen un sketch en el plano z = 0.
+    """
+
+    def __init__(self, buffer, metadata):
+        values = _SKETCH.unpack_from(metadata)
+        self.n_vertices, self.n_edges, self.snap_distance = values[:3]
+        self._offsets = values[3:5]
+        self._buffer = buffer
+        self._arrays = None  # Copia en memoria tras load()
+        self.workplane = Workplane()
+        self.bounds = None
+        self.visible = True
+        self.name = None
+        if len(metadata) > _SKETCH.size:
+            values = _SKETCH_PLANE.unpack_from(metadata, _SKETCH.size)
+            self.workplane = Workplane(values[0:3], values[3:6], values[6:9])
+            low, high = np.array(values[9:11]), np.array(values[11:13])
+            if not np.isnan(low).any():
+                self.bounds = (low, high)
+            self.visible = values[13]
+            start = _SKETCH.size + _SKETCH_PLANE.size
+            self.name = metadata[start:start + values[14]].decode('utf-8') or None
+
+    def arrays(self):
+        """
+        Vértices (N, 2) y aristas (M, 2), sin copia
+        """
+        if self._arrays is not None:
+            return self._arrays
+        vertex_offset, edge_offset = self._offsets
+        points = np.frombuffer(self._buffer, SKETCH_VERTEX, self.n_vertices * 2, vertex_offset)
+        edges = np.frombuffer(self._buffer, SKETCH_EDGE, self.n_edges * 2, edge_offset)
+        return points.reshape(-1, 2), edges.reshape(-1, 2)
+
+    def load(self):
+        """
+        Copia los arreglos a memoria y deja de usar el mmap
+        """
+        if self._arrays is None:
+            self._arrays = tuple(array.copy() for array in self.arrays())
+            self._buffer = None
+
+
+class BodyRecord:
+    """
+    Cuerpo de un proyecto abierto. La malla son vistas de np.frombuffer
+    sobre el mmap: sus páginas se leen del disco cuando se usan.
+    """
+
+    def __init__(self, buffer, metadata):
+        values = _BODY.unpack_from(metadata)
+        self.vertex_count, self.triangle_count = values[0], values[1]
+        self._offsets = values[2:5]
+        self.bounds = (np.array(values[5:8], dtype=np.float32), np.array(values[8:11], dtype=np.float32))
+        self.transform = np.array(values[11:27], dtype=np.float64).reshape(4, 4)
+        self.color = tuple(values[27:30])
+        self.name = metadata[_BODY.size:_BODY.size + values[30]].decode('utf-8') or None
+        self._buffer = buffer
+        self._mesh = None
+
+    def mesh(self):
+        if self._mesh is None:
+            vertices, normals, triangles = self._offsets
+            count = self.vertex_count * 3
+            self._mesh = Mesh(
+                np.frombuffer(self._buffer, MESH_FLOAT, count, vertices),
+                np.frombuffer(self._buffer, MESH_FLOAT, count, normals),
+                np.frombuffer(self._buffer, MESH_INDEX, self.triangle_count * 3, triangles))
+        return self._mesh
+
+    def load(self):
+        """
+        Copia la malla a memoria y deja de usar el mmap. Se reemplazan los
+        arreglos de la misma Mesh, así los cuerpos que ya la usan (y las
+        cachés por malla) también sueltan el archivo.
+        """
+        if self._buffer is None:
+            return
+        mesh = self.mesh()
+        mesh.vertices = mesh.vertices.copy()
+        mesh.normals = mesh.normals.copy()
+        mesh.triangles = mesh.triangles.copy()
+        self._buffer = None
+
+
+class ProjectFile:
+    """
+    Proyecto abierto con mmap. Solo se lee la cabecera y la tabla de
+    secciones; los arreglos son vistas de solo lectura sobre el archivo.
+    El mapeo se libera cuando no queda ninguna vista que lo use.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as file:
+            self.buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self.buffer) < _HEADER.size:
+            raise ValueError(f"{path}: archivo de proyecto incompleto")
+        magic, version, _, section_count, table_offset = _HEADER.unpack_from(self.buffer)
+        if magic != MAGIC:
+            raise ValueError(f"{path}: no es un archivo de proyecto")
+        if version > VERSION:
+            raise ValueError(f"{path}: versión {version} no soportada (máximo {VERSION})")
+        self.version = version
+
+        self.sketches = []
+        self.bodies = []
+        position = table_offset
+        for _ in range(section_count):
+            tag, size = _SECTION.unpack_from(self.buffer, position)
+            position += _SECTION.size
+            metadata = self.buffer[position:position + size]
+            position += size
+            if tag == b'SKCH':
+                self.sketches.append(SketchRecord(self.buffer, metadata))
+            elif tag == b'BODY':
+                self.bodies.append(BodyRecord(self.buffer, metadata))
+            # Las secciones desconocidas se ignoran
+
+    @property
+    def snap_distance(self):
+        return self.sketches[0].snap_distance if self.sketches else None
+
+    def close(self):
+        """
+        Pasa a memoria los sketches y cuerpos que aún se leen del archivo y
+        libera el mapeo, para poder sobrescribir la ruta
+        """
+        for record in self.sketches + self.bodies:
+            record.load()
+        self.buffer.close()
+
+    def sketch_arrays(self):
+        """
+        Vértices (N, 2) y aristas (M, 2) del primer sketch, sin copia
+        """
+        if not self.sketches:
+            return np.zeros((0, 2)), np.zeros((0, 2), dtype=np.int32)
+        return self.sketches[0].arrays()
+
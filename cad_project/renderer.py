@@ -0,0 +1,214 @@
+# renderer.py
+"""
+Renderizado en modo retenido: la geometría vive en buffers de OpenGL (VBO)
+y solo se vuelve a subir cuando cambia
+"""
+from OpenGL.GL import *
+import numpy as np
+
+MOVED_RUN_GAP = 64  # Vértices sin mover que se suben igual para unir tramos
+
+
+class GLBuffer:
+    """
+    Buffer de OpenGL con capacidad que crece duplicándose. Permite subir
+    datos completos o solo un tramo (glBufferSubData).
+    """
+
+    def __init__(self, target=GL_ARRAY_BUFFER, usage=GL_DYNAMIC_DRAW):
+        self.target = target
+        self.usage = usage
+        self.id = glGenBuffers(1)
+        self.capacity = 0  # En bytes
+
+    def bind(self):
+        glBindBuffer(self.target, self.id)
+
+    def unbind(self):
+        glBindBuffer(self.target, 0)
+
+    def reserve(self, nbytes):
+        """
+        Garantiza al menos `nbytes` de capacidad. Retorna True si hubo que
+        reservar de nuevo (el contenido anterior se pierde).
+        """
+        if nbytes <= self.capacity:
+            return False
+        capacity = max(self.capacity, 1024)
+        while capacity < nbytes:
+            capacity *= 2
+        self.bind()
+        glBufferData(self.target, capacity, None, self.usage)
+        self.capacity = capacity
+        return True
+
+    def upload(self, data, offset=0):
+        """
+        Sube `data` (arreglo contiguo) a partir de `offset` bytes
+        """
+        data = np.ascontiguousarray(data)
+        if data.nbytes == 0:
+            return
+        self.bind()
+        glBufferSubData(self.target, offset, data.nbytes, data)
+
+    def delete(self):
+        if self.id:
+            glDeleteBuffers(1, [self.id])
+            self.id = 0
+            self.capacity = 0
+
+
+class SketchRenderer:
+    """
+    Dibuja los puntos y líneas de un GeometryStore con glDrawArrays /
+    glDrawElements. Solo sube a la GPU el tramo añadido desde el último
+    cuadro, más las filas que cambiaron (GeometryStore.retained_since).
+    Los vértices movidos sin cambiar la topología (arrastres) se suben como
+    el tramo que los contiene.
+    La línea de preview usa un buffer aparte para no invalidar el principal.
+    El relleno de las regiones cerradas (set_fill) usa su propio buffer de
+    índices sobre los mismos vértices.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self.vertex_buffer = None
+        self.index_buffer = None
+        self.preview_buffer = None
+        self.fill_buffer = None
+        self._topology = None
+        self._version = None
+        self._uploaded_vertices = 0
+        self._uploaded_edges = 0
+        self._fill_source = None
+        self._fill_count = 0
+
+    def _create_buffers(self):
+        self.vertex_buffer = GLBuffer(GL_ARRAY_BUFFER)
+        self.index_buffer = GLBuffer(GL_ELEMENT_ARRAY_BUFFER)
+        self.preview_buffer = GLBuffer(GL_ARRAY_BUFFER, GL_STREAM_DRAW)
+        self.preview_buffer.reserve(4 * 8)
+        self.fill_buffer = GLBuffer(GL_ELEMENT_ARRAY_BUFFER)
+
+    def sync(self):
+        """
+        Sincroniza los buffers de la GPU con el almacenamiento
+        """
+        if self.vertex_buffer is None:
+            self._create_buffers()
+
+        store = self.store
+        points = store.points
+        edges = store.edges
+
+        # Solo siguen valiendo en la GPU las filas del principio que no
+        # cambiaron; deshacer un añadido deja filas de más que basta con no
+        # dibujar
+        keep_vertices, keep_edges = store.retained_since(self._topology)
+        self._uploaded_vertices = min(self._uploaded_vertices, keep_vertices, len(points))
+        self._uploaded_edges = min(self._uploaded_edges, keep_edges, len(edges))
+        if store.version != self._version and self._uploaded_vertices:
+            moved = store.moved_since(self._version)
+            if moved is None:
+                self._uploaded_vertices = 0
+            else:
+                self._upload_moved(points, moved[moved < self._uploaded_vertices])
+        # Si hay que reservar más memoria el contenido se pierde: subir todo
+        if self.vertex_buffer.reserve(points.nbytes):
+            self._uploaded_vertices = 0
+        if self.index_buffer.reserve(edges.nbytes):
+            self._uploaded_edges = 0
+
+        if self._uploaded_vertices < len(points):
+            start = self._uploaded_vertices
+            self.vertex_buffer.upload(points[start:], start * points.itemsize * 2)
+            self._uploaded_vertices = len(points)
+        if self._uploaded_edges < len(edges):
+            start = self._uploaded_edges
+            self.index_buffer.upload(edges[start:], start * edges.itemsize * 2)
+            self._uploaded_edges = len(edges)
+
+        self._topology = store.topology
+        self._version = store.version
+
+    def _upload_moved(self, points, moved):
+        # Un tramo por grupo de índices cercanos (ordenados)
+        if not len(moved):
+            return
+        breaks = np.flatnonzero(np.diff(moved) > MOVED_RUN_GAP) + 1
+        for run in np.split(moved, breaks):
+            start, stop = int(run[0]), int(run[-1]) + 1
+            self.vertex_buffer.upload(points[start:stop], start * points.itemsize * 2)
+
+    def set_fill(self, triangles):
+        """
+        Triángulos (K, 3) de relleno con índices del almacenamiento. Solo se
+        suben si cambió el arreglo.
+        """
+        if triangles is self._fill_source:
+            return
+        if self.fill_buffer is None:
+            self._create_buffers()
+        indices = np.ascontiguousarray(triangles, dtype=np.uint32)
+        self.fill_buffer.reserve(indices.nbytes)
+        self.fill_buffer.upload(indices)
+        self._fill_source = triangles
+        self._fill_count = indices.size
+
+    def draw(self, preview_start=None, preview_end=None, marker=None):
+        self.sync()
+
+        glEnableClientState(GL_VERTEX_ARRAY)
+
+        # Puntos, líneas y relleno comparten el buffer de vértices (z = 0 implícito)
+        self.vertex_buffer.bind()
+        glVertexPointer(2, GL_DOUBLE, 0, None)
+
+        if self._fill_count:
+            glEnable(GL_BLEND)
+            glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
+            glColor4f(0.2, 0.6, 1.0, 0.25)  # Azul translúcido para las regiones
+            self.fill_buffer.bind()
+            glDrawElements(GL_TRIANGLES, self._fill_count, GL_UNSIGNED_INT, None)
+            self.fill_buffer.unbind()
+            glDisable(GL_BLEND)
+
+        if self._uploaded_vertices:
+            glPointSize(5.0)
+            glColor3f(1, 1, 0)  # Amarillo para los puntos
+            glDrawArrays(GL_POINTS, 0, self._uploaded_vertices)
+
+        if self._uploaded_edges:
+            glLineWidth(2.0)
+            glColor3f(0, 1, 0)  # Verde para las líneas
+            self.index_buffer.bind()
+            glDrawElements(GL_LINES, self._uploaded_edges * 2, GL_UNSIGNED_INT, None)
+            self.index_buffer.unbind()
+
+        # Línea en progreso en su propio buffer dinámico
+        if preview_start is not None and preview_end is not None:
+            preview = np.array([preview_start, preview_end], dtype=np.float64)
+            self.preview_buffer.upload(preview)
+            glVertexPointer(2, GL_DOUBLE, 0, None)
+            glLineWidth(1.0)  # Línea más delgada para el preview
+            glColor3f(1, 1, 1)  # Blanco para la línea en progreso
+            glDrawArrays(GL_LINES, 0, 2)
+            if marker is not None:
+                # Punto de snap del extremo (el segundo vértice del preview)
+                glPointSize(9.0)
+                glColor3f(1, 0.5, 0)  # Naranja para el snap
+                glDrawArrays(GL_POINTS, 1, 1)
+
+        self.vertex_buffer.unbind()
+        glDisableClientState(GL_VERTEX_ARRAY)
+
+    def delete(self):
+        for buffer in (self.vertex_buffer, self.index_buffer, self.preview_buffer, self.fill_buffer):
+            if buffer is not None:
+                buffer.delete()
+        self.vertex_buffer = self.index_buffer = self.preview_buffer = self.fill_buffer = None
+        self._topology = None
+        self._version = None
+        self._fill_source = None
+        self._fill_count = 0
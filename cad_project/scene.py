@@ -0,0 +1,401 @@
+# scene.py
+"""
+Escena de sólidos: cuerpos con malla, transformación y caja envolvente,
+con buffers de GPU por cuerpo y recorte contra el frustum de la cámara
+"""
+import ctypes
+import weakref
+from OpenGL.GL import *
+import numpy as np
+from renderer import GLBuffer
+from lod import LodBuilder, select_levels, pixels_per_unit, MIN_LOD_TRIANGLES
+from bvh import BVH, ray_box_mask, ray_triangles
+import profiler
+
+DEFAULT_COLOR = (0.7, 0.7, 0.75)
+
+# Niveles de detalle por malla, compartidos entre cuerpos con la misma malla
+_lod_cache = weakref.WeakKeyDictionary()
+# Cálculos de niveles a medias (lod.LodBuilder), por malla
+_lod_builders = weakref.WeakKeyDictionary()
+# BVH de triángulos por malla, para la selección con rayos
+_bvh_cache = weakref.WeakKeyDictionary()
+
+
+def frustum_planes(view_projection):
+    """
+    Seis planos (a, b, c, d) del frustum de `projection @ modelview`
+    (Gribb-Hartmann), normalizados y con la normal hacia dentro
+    """
+    m = np.asarray(view_projection, dtype=np.float64)
+    planes = np.array([
+        m[3] + m[0], m[3] - m[0],  # izquierda, derecha
+        m[3] + m[1], m[3] - m[1],  # abajo, arriba
+        m[3] + m[2], m[3] - m[2],  # cerca, lejos
+    ])
+    return planes / np.linalg.norm(planes[:, :3], axis=1, keepdims=True)
+
+
+def boxes_in_frustum(planes, mins, maxs):
+    """
+    Máscara (N,) de las cajas (mins, maxs) que no quedan por completo fuera
+    de algún plano. Para cada plano se prueba la esquina más adentro.
+    """
+    normals = planes[:, :3]
+    # (N, 6, 3): esquina de cada caja en la dirección de cada normal
+    corner = np.where(normals[None, :, :] >= 0, maxs[:, None, :], mins[:, None, :])
+    distance = np.einsum('npk,pk->np', corner, normals) + planes[:, 3]
+    return (distance >= 0).all(axis=1)
+
+
+def transform_bounds(lows, highs, transforms):
+    """
+    Cajas alineadas a los ejes que contienen las cajas (lows, highs) (N, 3)
+    transformadas por `transforms` (N, 4, 4). Retorna (mínimos, máximos).
+    """
+    lows = np.asarray(lows, dtype=np.float64).reshape(-1, 3)
+    highs = np.asarray(highs, dtype=np.float64).reshape(-1, 3)
+    transforms = np.asarray(transforms, dtype=np.float64).reshape(-1, 4, 4)
+    # Las ocho esquinas de cada caja: (N, 8, 3)
+    select = np.array([[x, y, z] for x in (0, 1) for y in (0, 1) for z in (0, 1)], dtype=bool)
+    corners = np.where(select[None, :, :], highs[:, None, :], lows[:, None, :])
+    world = np.einsum('nij,nkj->nki', transforms[:, :3, :3], corners) + transforms[:, None, :3, 3]
+    return world.min(axis=1), world.max(axis=1)
+
+
+class BodyBuffers:
+    """
+    Malla de un cuerpo en la GPU: vértices seguidos de normales en un
+    buffer y los triángulos en otro. Se sube una sola vez.
+    """
+
+    def __init__(self, mesh):
+        self.vertex_buffer = GLBuffer(GL_ARRAY_BUFFER, GL_STATIC_DRAW)
+        self.index_buffer = GLBuffer(GL_ELEMENT_ARRAY_BUFFER, GL_STATIC_DRAW)
+        self.normal_offset = mesh.vertices.nbytes
+        self.index_count = mesh.triangles.size
+
+        self.vertex_buffer.reserve(mesh.vertices.nbytes + mesh.normals.nbytes)
+        self.vertex_buffer.upload(mesh.vertices)
+        self.vertex_buffer.upload(mesh.normals, self.normal_offset)
+        self.index_buffer.reserve(mesh.triangles.nbytes)
+        self.index_buffer.upload(mesh.triangles)
+
+    def bind(self):
+        self.vertex_buffer.bind()
+        glVertexPointer(3, GL_FLOAT, 0, None)
+        glNormalPointer(GL_FLOAT, 0, ctypes.c_void_p(self.normal_offset))
+        self.index_buffer.bind()
+
+    def draw(self):
+        glDrawElements(GL_TRIANGLES, self.index_count, GL_UNSIGNED_INT, None)
+
+    def delete(self):
+        self.vertex_buffer.delete()
+        self.index_buffer.delete()
+
+
+class Body:
+    """
+    Sólido de la escena. La malla no se modifica después de crearlo; para
+    moverlo se cambia `transform` con set_transform.
+    """
+
+    def __init__(self, mesh, transform=None, color=DEFAULT_COLOR, name=None, bounds=None):
+        self.mesh = mesh
+        self.transform = np.identity(4)
+        self.has_transform = False
+        if transform is not None:
+            self.transform = np.asarray(transform, dtype=np.float64)
+            self.has_transform = not np.array_equal(self.transform, np.identity(4))
+        self.color = tuple(color)
+        self.name = name
+        self.visible = True
+        self.lods = None  # Niveles de detalle (lod.LevelOfDetail), al pedirlos
+        self.buffers = {}  # Nivel -> BodyBuffers, creados al primer dibujado
+        # Caja local; si se conoce (p. ej. al abrir un proyecto) no se recorre la malla
+        self.local_bounds = mesh.bounds() if bounds is None else bounds
+        self.scene = None
+
+    @property
+    def needs_lods(self):
+        if self.lods is None and self.mesh.triangle_count >= MIN_LOD_TRIANGLES:
+            # Otro cuerpo con la misma malla puede haberlos calculado ya
+            self.lods = _lod_cache.get(self.mesh)
+            return self.lods is None
+        return False
+
+    def build_lods(self, wait=True):
+        """
+        Calcula una sola vez las mallas simplificadas del cuerpo, en un hilo
+        aparte (lod.LodBuilder). Sin `wait` retorna None mientras el cálculo
+        sigue; entretanto el cuerpo se dibuja con la malla completa.
+        """
+        if self.lods is None:
+            self.lods = _lod_cache.get(self.mesh)
+        if self.lods is None:
+            builder = _lod_builders.get(self.mesh)
+            if builder is None:
+                builder = _lod_builders[self.mesh] = LodBuilder(self.mesh)
+            if builder.run(wait) is not None:
+                self.lods = _lod_cache[self.mesh] = builder.levels
+                del _lod_builders[self.mesh]
+        return self.lods
+
+    def lod_errors(self):
+        """
+        Error geométrico de cada nivel en unidades de mundo (escalado por la
+        transformación)
+        """
+        if self.lods is None:
+            return [0.0]
+        scale = np.linalg.norm(self.transform[:3, :3], axis=0).max()
+        return [level.error * scale for level in self.lods]
+
+    def level_buffers(self, level):
+        buffers = self.buffers.get(level)
+        if buffers is None:
+            mesh = self.mesh if self.lods is None else self.lods[level].mesh
+            buffers = self.buffers[level] = BodyBuffers(mesh)
+        return buffers
+
+    def triangle_bvh(self):
+        tree = _bvh_cache.get(self.mesh)
+        if tree is None:
+            corners = self.mesh.vertices[self.mesh.triangles].astype(np.float64)
+            tree = _bvh_cache[self.mesh] = BVH(corners.min(axis=1), corners.max(axis=1))
+        return tree
+
+    def intersect(self, origin, direction, t_max=np.inf):
+        """
+        Triángulo de la malla completa que corta primero el rayo de mundo.
+        Retorna (t, índice) con t en unidades del rayo, o None.
+        """
+        if self.has_transform:
+            inverse = np.linalg.inv(self.transform)
+            origin = inverse[:3, :3] @ origin + inverse[:3, 3]
+            direction = inverse[:3, :3] @ direction
+        candidates = self.triangle_bvh().ray_candidates(origin, direction, t_max)
+        if not len(candidates):
+            return None
+        corners = self.mesh.vertices[self.mesh.triangles[candidates]].astype(np.float64)
+        t = ray_triangles(origin, direction, corners[:, 0], corners[:, 1], corners[:, 2])
+        best = int(np.argmin(t))
+        if not t[best] <= t_max:
+            return None
+        return float(t[best]), int(candidates[best])
+
+    def bounds(self):
+        """
+        Caja envolvente (mínimo, máximo) en coordenadas de mundo
+        """
+        low, high = transform_bounds(*self.local_bounds, self.transform)
+        return low[0], high[0]
+
+    def set_transform(self, transform):
+        self.transform = np.asarray(transform, dtype=np.float64)
+        self.has_transform = not np.array_equal(self.transform, np.identity(4))
+        if self.scene is not None:
+            self.scene.invalidate()
+
+    def release(self):
+        for buffers in self.buffers.values():
+            buffers.delete()
+        self.buffers = {}
+
+
+class Scene:
+    """
+    Contenedor de cuerpos. Las cajas de mundo se guardan en arreglos para
+    recortar todos los cuerpos contra el frustum en una sola operación, y
+    los visibles se dibujan ordenados por color para cambiar de estado lo
+    menos posible.
+
+    Cada cuerpo visible se dibuja con el nivel de detalle más simple cuyo
+    error proyectado no supera `max_pixel_error` píxeles. Los niveles se
+    calculan bajo demanda en hilos aparte, a lo sumo `lod_threads` a la
+    vez; mientras tanto el cuerpo usa su malla completa.
+    """
+
+    def __init__(self, max_pixel_error=1.0, lod_threads=2):
+        self.max_pixel_error = max_pixel_error
+        self.lod_threads = lod_threads
+        self.bodies = []
+        self.version = 0  # Cambia con cada modificación de la escena
+        self._mins = np.zeros((0, 3))
+        self._maxs = np.zeros((0, 3))
+        self._bounds_version = None
+        # Estadísticas del último dibujado
+        self.drawn_count = 0
+        self.culled_count = 0
+        self.triangle_count = 0
+        self.pending_lod_count = 0  # Cuerpos visibles que aún esperan sus niveles
+
+    def __len__(self):
+        return len(self.bodies)
+
+    def add(self, body):
+        body.scene = self
+        self.bodies.append(body)
+        self.invalidate()
+        return body
+
+    def remove(self, body):
+        self.bodies.remove(body)
+        body.scene = None
+        body.release()
+        self.invalidate()
+
+    def clear(self):
+        for body in self.bodies:
+            body.scene = None
+            body.release()
+        self.bodies = []
+        self.invalidate()
+
+    def invalidate(self):
+        self.version += 1
+
+    def world_bounds(self):
+        """
+        Arreglos (N, 3) de mínimos y máximos de cada cuerpo
+        """
+        if self._bounds_version != self.version:
+            if self.bodies:
+                self._mins, self._maxs = transform_bounds(
+                    [body.local_bounds[0] for body in self.bodies],
+                    [body.local_bounds[1] for body in self.bodies],
+                    [body.transform for body in self.bodies])
+            else:
+                self._mins = np.zeros((0, 3))
+                self._maxs = np.zeros((0, 3))
+            self._bounds_version = self.version
+        return self._mins, self._maxs
+
+    def _visible_indices(self, camera):
+        mins, maxs = self.world_bounds()
+        inside = boxes_in_frustum(frustum_planes(camera.view_projection), mins, maxs)
+        return [index for index in np.flatnonzero(inside).tolist() if self.bodies[index].visible]
+
+    def visible_bodies(self, camera):
+        """
+        Cuerpos visibles que intersectan el frustum de la cámara, en el
+        orden de dibujado (agrupados por color)
+        """
+        if not self.bodies:
+            return []
+        visible = [self.bodies[index] for index in self._visible_indices(camera)]
+        visible.sort(key=lambda body: body.color)
+        return visible
+
+    def select_levels(self, camera, indices):
+        """
+        Nivel de detalle de cada cuerpo de `indices` según la distancia de
+        la cámara a su caja envolvente
+        """
+        if not indices:
+            return []
+        mins, maxs = self.world_bounds()
+        eye = camera.eye
+        closest = np.clip(eye, mins[indices], maxs[indices])
+        distances = np.linalg.norm(closest - eye, axis=1)
+
+        errors = [self.bodies[index].lod_errors() for index in indices]
+        table = np.full((len(indices), max(len(row) for row in errors)), np.inf)
+        for row, values in enumerate(errors):
+            table[row, :len(values)] = values
+        scale = pixels_per_unit(camera.fovy, camera.viewport[1])
+        return select_levels(table, distances, scale, self.max_pixel_error).tolist()
+
+    def pick(self, origin, direction):
+        """
+        Primer cuerpo que corta el rayo: se descartan los cuerpos cuya caja
+        no toca el rayo y el resto se prueba de la más cercana a la más
+        lejana, cortando en cuanto la caja empieza detrás del mejor acierto.
+        Retorna (t, cuerpo, triángulo) o None.
+        """
+        if not self.bodies:
+            return None
+        origin = np.asarray(origin, dtype=np.float64)
+        direction = np.asarray(direction, dtype=np.float64)
+        mins, maxs = self.world_bounds()
+        hit = np.flatnonzero(ray_box_mask(origin, direction, mins, maxs))
+        if not len(hit):
+            return None
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t1 = (mins[hit] - origin) / direction
+            t2 = (maxs[hit] - origin) / direction
+        entry = np.maximum(np.where(np.isnan(t1), -np.inf, np.minimum(t1, t2)).max(axis=1), 0.0)
+
+        best = None
+        for position in np.argsort(entry).tolist():
+            if best is not None and entry[position] > best[0]:
+                break
+            body = self.bodies[hit[position]]
+            if not body.visible:
+                continue
+            found = body.intersect(origin, direction, np.inf if best is None else best[0])
+            if found is not None:
+                best = (found[0], body, found[1])
+        return best
+
+    def draw(self, camera):
+        if not self.bodies:
+            self.drawn_count = self.culled_count = self.triangle_count = 0
+            self.pending_lod_count = 0
+            return
+        indices = self._visible_indices(camera)
+        self.drawn_count = len(indices)
+        self.culled_count = len(self.bodies) - len(indices)
+        self.triangle_count = 0
+        if not indices:
+            self.pending_lod_count = 0
+            return
+
+        # Niveles pendientes, primero los cuerpos más simplificables: se
+        # recogen los que ya terminaron y se lanzan nuevos hasta llenar
+        # `lod_threads`, sin esperar a ningún hilo
+        pending = [index for index in indices if self.bodies[index].needs_lods]
+        pending.sort(key=lambda index: -self.bodies[index].mesh.triangle_count)
+        with profiler.scope('lod_build'):
+            running = 0
+            for index in pending:
+                body = self.bodies[index]
+                if body.mesh not in _lod_builders and running >= self.lod_threads:
+                    continue
+                if body.build_lods(wait=False) is None:
+                    running += 1
+        self.pending_lod_count = sum(self.bodies[index].lods is None for index in pending)
+
+        levels = self.select_levels(camera, indices)
+        draws = sorted(zip(indices, levels), key=lambda item: self.bodies[item[0]].color)
+
+        glEnableClientState(GL_VERTEX_ARRAY)
+        glEnableClientState(GL_NORMAL_ARRAY)
+
+        color = None
+        for index, level in draws:
+            body = self.bodies[index]
+            if body.color != color:
+                color = body.color
+                glColor3f(*color)
+
+            buffers = body.level_buffers(level)
+            buffers.bind()
+            if body.has_transform:
+                glPushMatrix()
+                glMultMatrixd(np.ascontiguousarray(body.transform.T))
+                buffers.draw()
+                glPopMatrix()
+            else:
+                buffers.draw()
+            self.triangle_count += buffers.index_count // 3
+
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, 0)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        glDisableClientState(GL_NORMAL_ARRAY)
+        glDisableClientState(GL_VERTEX_ARRAY)
+
+    def release(self):
+        for body in self.bodies:
+            body.release()
@@ -5,28 +5,171 @@ Maneja toda la lógica relacionada con el dibujo 2D
 from OpenGL.GL import *
 from OpenGL.GLU import *
 import numpy as np
+from geometry_store import GeometryStore
+from renderer import SketchRenderer
+from spatial_index import SpatialHash
+from profiles import build_profiles
+from triangulation import triangulate_regions
+from bvh import IncrementalBVH, point_segment_distance
+from snapping import SnapEngine, SNAP_VERTEX, intersection_splits
+from history import History, OP_APPEND, OP_SET_VERTEX, OP_TRUNCATE, OP_REPLACE
+from constraints import ConstraintSystem
+from dependencies import DependencyGraph
+import profiler
+
+DRAG_ITERATIONS = 8  # Iteraciones del solver por cuadro de arrastre
+
+
+class DragState:
+    """
+    Arrastre de un vértice en curso: el cluster de restricciones que se
+    re-resuelve en cada cuadro, los vértices que mueve y las aristas que
+    dependen de ellos
+    """
+
+    def __init__(self, vertex, cluster, moving, edges):
+        self.vertex = vertex
+        self.cluster = cluster
+        self.moving = moving
+        self.edges = edges
+        self.slot = int(np.searchsorted(moving, vertex))
+        self.result = None
+
 
 class Sketch:
     def __init__(self):
-        self.points = []
-        self.lines = []
+        # Geometría en arreglos columnares: vértices (N, 2) y aristas (M, 2)
+        self.store = GeometryStore()
         self.is_drawing = False
         self.snap_distance = 0.1
         self.current_line_start = None
+        self.current_start_index = None
         self.current_line_end = None  # Para el preview de la línea actual
+        # Índice espacial para el snap, celdas del tamaño de snap_distance
+        self.point_index = SpatialHash(self.snap_distance)
+        # Renderizador con VBOs (se crea al dibujar por primera vez)
+        self.renderer = None
+        # Perfiles cerrados cacheados hasta la siguiente modificación
+        self._profiles = None
+        self._profiles_version = None
+        self._fill_triangles = None
+        # BVH de las aristas para la selección, actualizado al añadir líneas
+        self.segment_index = IncrementalBVH(self._segment_bounds)
+        # Snap a vértices, cortes, puntos medios y aristas
+        self.snap_engine = SnapEngine(self)
+        self.current_snap = None  # Snap del extremo de la línea en progreso
+        # Restricciones geométricas sobre los vértices
+        self.constraints = ConstraintSystem(self.store)
+        # Deshacer/rehacer: cada línea, punto, restricción, importación o
+        # clear es un paso, con la geometría y las restricciones que tocó
+        self.history = History(self.store, constraints=self.constraints)
+        # Aristas y restricciones de cada vértice, para los arrastres
+        self.dependencies = DependencyGraph(self.store, self.constraints)
+        self.drag = None  # DragState del arrastre en curso
+
+    @property
+    def points(self):
+        """
+        Vista (N, 2) sin copia de los vértices del sketch
+        """
+        return self.store.points
+
+    @property
+    def lines(self):
+        """
+        Líneas como coordenadas (M, 2, 2) de sus extremos
+        """
+        return self.store.segments()
+
+    def find_snap_point(self, point, radius=None):
+        """
+        Retorna el índice del punto existente más cercano dentro de
+        `radius` (por defecto snap_distance), o None si no hay ninguno
+        """
+        if self.point_index.cell_size != self.snap_distance or len(self.point_index) != self.store.n_vertices:
+            self.point_index.rebuild(self.points.tolist(), self.snap_distance)
+        return self.point_index.nearest(point, self.snap_distance if radius is None else radius)
+
+    def find_snap(self, point):
+        """
+        Snap de mayor prioridad (vértice, corte, punto medio o punto más
+        cercano de una arista) dentro de snap_distance, o None
+        """
+        return self.snap_engine.snap(point, self.snap_distance)
+
+    def add_vertex(self, point):
+        """
+        Igual que add_point pero retorna el índice del vértice. Si el punto
+        cae sobre una arista (o un corte) esta se parte en el nuevo vértice.
+        """
+        snap = self.find_snap(point)
+        if snap is not None and snap.kind == SNAP_VERTEX:
+            return snap.vertex
+        if snap is not None:
+            point = snap.point
+        index = self.store.add_vertex(point)
+        self.point_index.insert(index, point)
+        if snap is not None:
+            for edge in snap.edges:
+                self._split_edge(edge, index)
+        return index
+
+    def _split_edge(self, edge, vertex):
+        a, b = (int(value) for value in self.store.edges[edge])
+        if vertex not in (a, b):
+            self.store.set_edge(edge, a, vertex)
+            self.store.add_edge(vertex, b)
 
+    def split_intersections(self):
+        """
+        Parte todas las aristas en sus cortes mutuos. Retorna el número de
+        aristas añadidas.
+        """
+        new_points, pieces, owner = intersection_splits(self.store.points, self.store.edges)
+        added = len(pieces) - len(np.unique(owner))
+        if added <= 0:
+            return 0
+        # Cada arista partida conserva su índice con el primer tramo y el
+        # resto se añade al final: el historial solo guarda lo que cambió
+        first = np.ones(len(owner), dtype=bool)
+        first[1:] = owner[1:] != owner[:-1]
+        changed = first & np.any(pieces != self.store.edges[owner], axis=1)
+        start = self.store.extend_vertices(new_points)
+        self.store.set_edges(owner[changed], pieces[changed])
+        self.store.extend_edges(pieces[~first])
+        for index, point in enumerate(new_points.tolist(), start=start):
+            self.point_index.insert(index, point)
+        return added
+
+    def load_arrays(self, points, edges):
+        """
+        Reemplaza la geometría por los arreglos dados en una sola copia. El
+        índice de snap se reconstruye en la primera búsqueda.
+        """
+        self._end_drawing()
+        with self.history.step('cargar'):
+            self.clear()
+            self.store.extend_vertices(points)
+            self.store.extend_edges(edges)
 
     def add_point(self, point):
-        # Intenta hacer snap a un punto existente
-        for existing_point in self.points:
-            if np.linalg.norm(np.array(existing_point) - np.array(point)) < self.snap_distance:
-                return existing_point
-        self.points.append(point)
-        return point
-
-    def start_line(self, point):
+        # Intenta hacer snap a un punto existente o a una arista
+        with self.history.step('punto'):
+            return self.store.vertex(self.add_vertex(point))
+
+    def start_line(self, point, drag=False):
+        # Con `drag` sobre un vértice existente se arrastra en vez de dibujar
+        if drag and not self.is_drawing:
+            vertex = self.find_snap_point(point)
+            if vertex is not None:
+                self.start_drag(vertex)
+                return
+        # El paso de la línea queda abierto hasta end_line
+        if not self.is_drawing:
+            self.history.begin('línea')
         self.is_drawing = True
-        snap_point = self.add_point(point)
+        self.current_start_index = self.add_vertex(point)
+        snap_point = self.store.vertex(self.current_start_index)
         self.current_line_start = snap_point
         self.current_line_end = snap_point  # Inicializar el punto final
 
@@ -34,49 +177,185 @@ class Sketch:
         """
         Actualiza la posición final de la línea mientras se está dibujando
         """
-        if self.is_drawing:
-            self.current_line_end = point
+        if self.drag is not None:
+            self.drag_to(point)
+        elif self.is_drawing:
+            self.current_snap = self.find_snap(point)
+            self.current_line_end = self.current_snap.point if self.current_snap else point
 
     def end_line(self, point):
-        if self.is_drawing:
-            snap_point = self.add_point(point)
+        if self.drag is not None:
+            self.end_drag(point)
+        elif self.is_drawing:
+            end_index = self.add_vertex(point)
             # Solo añadir la línea si los puntos son diferentes
-            if self.current_line_start != snap_point:
-                self.lines.append((self.current_line_start, snap_point))
-            self.is_drawing = False
-            self.current_line_start = None
-            self.current_line_end = None
+            if self.current_start_index != end_index:
+                self.snap_engine.sync()
+                crossings = len(self.snap_engine.crossing_points)
+                self.store.add_edge(self.current_start_index, end_index)
+                # Si la línea nueva cruza otras, todas quedan partidas en los cortes
+                self.snap_engine.sync()
+                if len(self.snap_engine.crossing_points) > crossings:
+                    self.split_intersections()
+            self._end_drawing()
+
+    def add_constraint(self, kind, vertices, value=(0.0, 0.0)):
+        """
+        Añade una restricción (constraints.COINCIDENT, ...) y resuelve su
+        componente. Retorna el SolveResult.
+        """
+        with self.history.step('restricción'):
+            index = self.constraints.add(kind, vertices, value)
+            return self.solve_constraints(self.constraints.vertices[index, :1])
+
+    def solve_constraints(self, vertices=None, pinned=()):
+        """
+        Resuelve las restricciones de las componentes que contienen
+        `vertices` (todas si es None) como un paso del historial
+        """
+        result = self.constraints.solve(vertices, pinned, apply=False)
+        if not len(result.vertices):
+            return result
+        previous = self.store.points[result.vertices].copy()
+        with self.history.step('restricciones'):
+            self.store.move_vertices(result.vertices, result.positions)
+        self._vertices_moved(result.vertices, previous)
+        return result
+
+    def start_drag(self, vertex):
+        """
+        Empieza a arrastrar el vértice `vertex` (un paso del historial hasta
+        end_drag). Solo se re-resuelve su componente de restricciones, con
+        él fijo donde esté el cursor.
+        """
+        self._end_drawing()
+        self.history.begin('arrastre')
+        cluster = None
+        moving = np.array([vertex], dtype=np.int64)
+        if len(self.dependencies.constraints_of(moving)):
+            cluster = self.constraints.cluster(moving, pinned=moving)
+            moving = np.union1d(moving, cluster.free)
+        self.drag = DragState(vertex, cluster, moving, self.dependencies.edges_of(moving))
+
+    def drag_to(self, point):
+        """
+        Mueve el vértice arrastrado a `point` y re-resuelve su cluster
+        partiendo de la solución del cuadro anterior, con pocas iteraciones.
+        Retorna el SolveResult (None si el vértice no tiene restricciones).
+        """
+        drag = self.drag
+        positions = self.store.points[drag.moving].copy()
+        previous = positions.copy()
+        positions[drag.slot] = point
+        if drag.cluster is not None:
+            result = self.constraints.solve_cluster(drag.cluster, max_iterations=DRAG_ITERATIONS,
+                                                    apply=False, targets=[point])
+            positions[np.searchsorted(drag.moving, result.vertices)] = result.positions
+            drag.result = result
+        # Siempre los mismos índices: el historial guarda un solo delta
+        self.store.move_vertices(drag.moving, positions)
+        self._vertices_moved(drag.moving, previous, drag.edges)
+        return drag.result
+
+    def end_drag(self, point):
+        """
+        Termina el arrastre en `point`. Si el último cuadro no llegó a
+        cumplir las restricciones se resuelven del todo.
+        """
+        drag = self.drag
+        result = self.drag_to(point)
+        if result is not None and not result.converged:
+            self.solve_constraints([drag.vertex], pinned=[drag.vertex])
+        self.drag = None
+        self.history.commit()
+        return result
+
+    def _vertices_moved(self, indices, previous, edges=None):
+        # Índices de snap y de aristas al día sin reconstruirlos: cada
+        # vértice cambia de celda y cada arista agranda sus cajas del BVH
+        if len(self.point_index) == self.store.n_vertices:
+            current = self.store.points[indices]
+            for index, old, new in zip(indices.tolist(), previous.tolist(), current.tolist()):
+                self.point_index.move(index, old, new)
+        if edges is None:
+            edges = self.dependencies.edges_of(indices)
+        if not len(edges):
+            return
+        if self.segment_index.topology is not None:
+            self.sync_segment_index()
+            mins, maxs = self._edge_bounds(edges)
+            self.segment_index.expand(edges, mins, maxs)
+        self.snap_engine.update_edges(edges)
+
+    def _end_drawing(self):
+        if self.is_drawing or self.drag is not None:
+            self.history.commit()
+        self.drag = None
+        self.is_drawing = False
+        self.current_snap = None
+        self.current_line_start = None
+        self.current_start_index = None
+        self.current_line_end = None
+
+    def undo(self):
+        """
+        Deshace la última edición; una línea a medio dibujar se cancela
+        (junto con su vértice inicial). Retorna si había algo que deshacer.
+        """
+        self._end_drawing()
+        step = self.history.undo()
+        if step is not None:
+            self._sync_point_index(step, undone=True)
+        return step is not None
+
+    def redo(self):
+        """
+        Rehace la última edición deshecha. Retorna si había algo que rehacer.
+        """
+        self._end_drawing()
+        step = self.history.redo()
+        if step is not None:
+            self._sync_point_index(step, undone=False)
+        return step is not None
+
+    def _sync_point_index(self, step, undone):
+        # Los añadidos se quitan o vuelven a poner en el índice de snap uno a
+        # uno; cualquier otro cambio de vértices lo reconstruye al buscar
+        if any(op[0] in (OP_SET_VERTEX, OP_TRUNCATE, OP_REPLACE) for op in step.ops):
+            self.point_index.clear()
+            return
+        for op in step.ops:
+            if op[0] != OP_APPEND:
+                continue
+            for index, point in enumerate(op[5].tolist(), start=op[1]):
+                if undone:
+                    self.point_index.remove(index, point)
+                else:
+                    self.point_index.insert(index, point)
 
     def draw(self):
+        with profiler.scope('sketch_draw'):
+            self._draw()
 
+    def _draw(self):
         glDisable(GL_DEPTH_TEST)
         glDisable(GL_LIGHTING)
 
-        # Dibujar puntos
-        glPointSize(5.0)
-        glBegin(GL_POINTS)
-        glColor3f(1, 1, 0)  # Amarillo para los puntos
-        for point in self.points:
-            glVertex3f(*point, 0)
-        glEnd()
-
-        # Dibujar líneas
-        glLineWidth(2.0)
-        glBegin(GL_LINES)
-        glColor3f(0, 1, 0)  # Verde para las líneas
-        for line in self.lines:
-            glVertex3f(*line[0], 0)
-            glVertex3f(*line[1], 0)
-        glEnd()
-
-        # Dibujar línea en progreso
+        # Los buffers se crean al primer dibujado, cuando ya hay contexto GL
+        if self.renderer is None:
+            self.renderer = SketchRenderer(self.store)
+
+        # Relleno de las regiones cerradas bajo las líneas
+        with profiler.scope('sketch_fill'):
+            fill = self.get_fill_triangles()
+        self.renderer.set_fill(fill)
+
+        # Dibujar puntos, líneas y la línea en progreso
         if self.is_drawing and self.current_line_start and self.current_line_end:
-            glLineWidth(1.0)  # Línea más delgada para el preview
-            glBegin(GL_LINES)
-            glColor3f(1, 1, 1)  # Blanco para la línea en progreso
-            glVertex3f(*self.current_line_start, 0)
-            glVertex3f(*self.current_line_end, 0)
-            glEnd()
+            marker = self.current_snap.point if self.current_snap else None
+            self.renderer.draw(self.current_line_start, self.current_line_end, marker)
+        else:
+            self.renderer.draw()
 
         glEnable(GL_DEPTH_TEST)
         glEnable(GL_LIGHTING)
@@ -84,19 +363,90 @@ class Sketch:
 
     def get_geometry(self):
         """
-        Retorna la geometría actual del sketch para operaciones 3D
+        Retorna la geometría actual del sketch para operaciones 3D.
+        'points' y 'edges' son vistas sin copia del almacenamiento;
+        'lines' contiene las coordenadas de los extremos de cada arista.
         """
         return {
-            'points': self.points,
-            'lines': self.lines
+            'points': self.store.points,
+            'edges': self.store.edges,
+            'lines': self.store.segments()
         }
 
+    def get_profiles(self):
+        """
+        Retorna los ciclos y regiones del sketch; solo se recalculan si la
+        geometría cambió desde la última llamada
+        """
+        # Durante un arrastre la topología no cambia: se conservan los
+        # perfiles (y el relleno, que sigue a los vértices) hasta soltar
+        stale = self._profiles_version != self.store.version and self.drag is None
+        if self._profiles is None or stale:
+            self._profiles = build_profiles(self.store.points, self.store.edges)
+            self._profiles_version = self.store.version
+            self._fill_triangles = None
+        return self._profiles
+
+    def get_fill_triangles(self):
+        """
+        Triángulos (K, 3) con índices de vértices que rellenan las regiones
+        cerradas; se recalculan junto con los perfiles
+        """
+        profiles = self.get_profiles()
+        if self._fill_triangles is None:
+            try:
+                self._fill_triangles = triangulate_regions(self.store.points, profiles.solid_regions())
+            except ValueError:
+                # Líneas que se cruzan sin vértice común: no hay relleno válido
+                self._fill_triangles = np.zeros((0, 3), dtype=np.int64)
+        return self._fill_triangles
+
+    def sync_segment_index(self):
+        """
+        Pone al día el BVH de aristas con el almacenamiento, conservando las
+        aristas que no cambiaron desde la última vez
+        """
+        store = self.store
+        index = self.segment_index
+        index.sync(store.n_edges, store.retained_since(index.topology)[1], store.topology)
+
+    def _segment_bounds(self, start, stop):
+        segments = self.store.points[self.store.edges[start:stop]]
+        return segments.min(axis=1), segments.max(axis=1)
+
+    def _edge_bounds(self, edges):
+        segments = self.store.points[self.store.edges[edges]]
+        return segments.min(axis=1), segments.max(axis=1)
+
+    def pick(self, point, radius):
+        """
+        Entidad del sketch a menos de `radius` de `point`: el vértice más
+        cercano si lo hay, si no la arista más cercana. Retorna
+        (tipo, índice, punto más cercano) o None.
+        """
+        vertex = self.find_snap_point(point, radius)
+        if vertex is not None:
+            return 'vertex', vertex, self.store.vertex(vertex)
+
+        self.sync_segment_index()
+        candidates = self.segment_index.point_candidates(point, radius)
+        if not len(candidates):
+            return None
+        segments = self.store.points[self.store.edges[candidates]]
+        distance, t = point_segment_distance(np.asarray(point, dtype=np.float64),
+                                             segments[:, 0], segments[:, 1])
+        best = int(np.argmin(distance))
+        if distance[best] > radius:
+            return None
+        closest = segments[best, 0] + t[best] * (segments[best, 1] - segments[best, 0])
+        return 'segment', int(candidates[best]), (float(closest[0]), float(closest[1]))
+
     def clear(self):
         """
         Limpia el sketch actual
         """
-        self.points = []
-        self.lines = []
-        self.is_drawing = False
-        self.current_line_start = None
-        self.current_line_end = None
\ No newline at end of file
+        self._end_drawing()
+        with self.history.step('borrar'):
+            self.store.clear()
+            self.constraints.clear()
+        self.point_index.clear()
@@ -0,0 +1,219 @@
+# sketches.py
+"""
+Colección de sketches, cada uno sobre su plano de trabajo, con carga
+diferida de la geometría y recorte contra el frustum de la cámara
+"""
+from OpenGL.GL import *
+import numpy as np
+from sketch import Sketch
+from workplane import Workplane
+from scene import frustum_planes, boxes_in_frustum, transform_bounds
+
+
+class SketchEntry:
+    """
+    Sketch de la colección con su plano de trabajo. Al abrir un proyecto la
+    geometría queda en `source` (un project_file.SketchRecord sobre el
+    mmap) y no se materializa en un Sketch hasta que se ve o se activa.
+    Cada Sketch cargado conserva su SketchRenderer, así que un sketch que
+    no se edita se vuelve a dibujar sin subir nada a la GPU.
+    """
+
+    def __init__(self, workplane=None, name=None, source=None, visible=True):
+        self.workplane = workplane if workplane is not None else Workplane()
+        self.name = name
+        self.source = source
+        self.visible = visible
+        self._sketch = None if source is not None else Sketch()
+        self._bounds = None if source is None else source.bounds
+        self._bounds_version = None
+
+    @property
+    def loaded(self):
+        return self._sketch is not None
+
+    @property
+    def sketch(self):
+        return self.materialize()
+
+    def materialize(self):
+        """
+        Copia la geometría de `source` a un Sketch la primera vez que se
+        pide. Abrir un proyecto no se deshace: el historial empieza vacío.
+        """
+        if self._sketch is None:
+            sketch = Sketch()
+            if self.source.snap_distance:
+                sketch.snap_distance = self.source.snap_distance
+            sketch.load_arrays(*self.source.arrays())
+            sketch.history.reset()
+            self._sketch = sketch
+            self.source = None
+        return self._sketch
+
+    @property
+    def snap_distance(self):
+        if self._sketch is not None:
+            return self._sketch.snap_distance
+        return self.source.snap_distance or 0.1
+
+    def arrays(self):
+        """
+        Vértices (N, 2) y aristas (M, 2) sin copia, sin materializar el
+        sketch si no estaba cargado
+        """
+        if self._sketch is not None:
+            return self._sketch.store.points, self._sketch.store.edges
+        return self.source.arrays()
+
+    def local_bounds(self):
+        """
+        Caja (mínimo, máximo) de los vértices en coordenadas del sketch, o
+        None si está vacío
+        """
+        if self._sketch is not None:
+            store = self._sketch.store
+            if self._bounds_version != store.version:
+                points = store.points
+                self._bounds = (points.min(axis=0), points.max(axis=0)) if len(points) else None
+                self._bounds_version = store.version
+        elif self._bounds is None and self.source.n_vertices:
+            # Proyectos antiguos sin la caja guardada: solo se leen los vértices
+            points = self.source.arrays()[0]
+            self._bounds = (points.min(axis=0), points.max(axis=0))
+        return self._bounds
+
+    def draw(self):
+        sketch = self.materialize()
+        if self.workplane.is_identity:
+            sketch.draw()
+            return
+        glPushMatrix()
+        glMultMatrixd(np.ascontiguousarray(self.workplane.matrix.T))
+        sketch.draw()
+        glPopMatrix()
+
+    def release(self):
+        """
+        Libera los buffers de GPU (la geometría se conserva)
+        """
+        if self._sketch is not None and self._sketch.renderer is not None:
+            self._sketch.renderer.delete()
+            self._sketch.renderer = None
+
+
+class SketchCollection:
+    """
+    Sketches del proyecto; uno de ellos es el activo, el que se edita. En
+    modo 3D se dibujan todos los visibles cuya caja (llevada a mundo con su
+    plano) toca el frustum, y solo esos se materializan.
+    """
+
+    def __init__(self):
+        self.entries = []
+        self.active_index = 0
+        self.version = 0  # Cambia al añadir, activar u ocultar sketches
+        self.drawn_count = 0
+        self.add(Workplane(), "Sketch 1")
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __iter__(self):
+        return iter(self.entries)
+
+    @property
+    def active(self):
+        return self.entries[self.active_index]
+
+    @property
+    def active_sketch(self):
+        return self.active.sketch
+
+    @property
+    def loaded_count(self):
+        return sum(entry.loaded for entry in self.entries)
+
+    def add(self, workplane=None, name=None, activate=True):
+        """
+        Añade un sketch vacío sobre `workplane`. Retorna su SketchEntry.
+        """
+        entry = SketchEntry(workplane, name or f"Sketch {len(self.entries) + 1}")
+        self.entries.append(entry)
+        if activate:
+            self.activate(len(self.entries) - 1)
+        self.version += 1
+        return entry
+
+    def activate(self, index):
+        """
+        Pasa a editar el sketch `index`; una línea a medio dibujar en el
+        anterior se termina
+        """
+        index %= len(self.entries)
+        if index != self.active_index and self.active.loaded:
+            self.active.sketch._end_drawing()
+        self.active_index = index
+        self.active.visible = True
+        self.version += 1
+        return self.active
+
+    def set_visible(self, index, visible):
+        self.entries[index].visible = visible
+        self.version += 1
+
+    def load(self, project):
+        """
+        Reemplaza la colección por los sketches de un ProjectFile sin leer
+        su geometría
+        """
+        self.release()
+        self.entries = [SketchEntry(record.workplane, record.name or f"Sketch {index + 1}",
+                                    record, record.visible)
+                        for index, record in enumerate(project.sketches)]
+        if not self.entries:
+            self.entries.append(SketchEntry(Workplane(), "Sketch 1"))
+        self.active_index = 0
+        self.version += 1
+
+    def visible_entries(self, camera):
+        """
+        Sketches visibles que tocan el frustum de la cámara; el activo
+        siempre que sea visible. Los vacíos no se dibujan.
+        """
+        candidates = []
+        lows, highs, transforms = [], [], []
+        for index, entry in enumerate(self.entries):
+            if not entry.visible:
+                continue
+            bounds = entry.local_bounds()
+            if bounds is None:
+                if index == self.active_index:
+                    candidates.append((index, None))
+                continue
+            candidates.append((index, len(lows)))
+            lows.append([bounds[0][0], bounds[0][1], 0.0])
+            highs.append([bounds[1][0], bounds[1][1], 0.0])
+            transforms.append(self.entries[index].workplane.matrix)
+        if not candidates:
+            return []
+        inside = np.zeros(0, dtype=bool)
+        if lows:
+            mins, maxs = transform_bounds(lows, highs, transforms)
+            inside = boxes_in_frustum(frustum_planes(camera.view_projection), mins, maxs)
+        return [self.entries[index] for index, box in candidates
+                if index == self.active_index or (box is not None and inside[box])]
+
+    def draw(self, camera):
+        """
+        Dibuja los sketches visibles, materializando los que aparecen por
+        primera vez
+        """
+        entries = self.visible_entries(camera)
+        for entry in entries:
+            entry.draw()
+        self.drawn_count = len(entries)
+
+    def release(self):
+        for entry in self.entries:
+            entry.release()
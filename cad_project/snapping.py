@@ -0,0 +1,336 @@
+# snapping.py
+"""
+Snap de los extremos de línea a vértices, intersecciones, puntos medios y
+al punto más cercano de las aristas, y cálculo masivo de intersecciones
+para partir las líneas que se cruzan
+"""
+import numpy as np
+from spatial_index import SpatialHash
+from bvh import point_segment_distance
+
+# Tipos de snap, en orden de prioridad
+SNAP_VERTEX = 'vertex'
+SNAP_INTERSECTION = 'intersection'
+SNAP_MIDPOINT = 'midpoint'
+SNAP_NEAREST = 'nearest'
+SNAP_MODES = (SNAP_VERTEX, SNAP_INTERSECTION, SNAP_MIDPOINT, SNAP_NEAREST)
+
+# Pares candidatos evaluados por bloque en el barrido
+PAIR_CHUNK = 1 << 20
+# Tolerancia en el parámetro de la arista para tratar un corte como extremo
+PARAM_EPSILON = 1e-9
+
+
+def _cross(a, b):
+    return a[:, 0] * b[:, 1] - a[:, 1] * b[:, 0]
+
+
+def intersect_pairs(points, edges, first, second):
+    """
+    Corte de las aristas `first[k]` y `second[k]`. Retorna la máscara de
+    los pares que se cortan y los parámetros (s, t) del corte sobre cada
+    una. Los pares que comparten un vértice y los paralelos no cuentan.
+    """
+    a = edges[first]
+    b = edges[second]
+    p = points[a[:, 0]]
+    d1 = points[a[:, 1]] - p
+    q = points[b[:, 0]]
+    d2 = points[b[:, 1]] - q
+    denominator = _cross(d1, d2)
+    shared = ((a[:, 0] == b[:, 0]) | (a[:, 0] == b[:, 1])
+              | (a[:, 1] == b[:, 0]) | (a[:, 1] == b[:, 1]))
+    valid = (np.abs(denominator) > 1e-300) & ~shared
+    safe = np.where(valid, denominator, 1.0)
+    offset = q - p
+    s = _cross(offset, d2) / safe
+    t = _cross(offset, d1) / safe
+    hit = valid & (s >= 0) & (s <= 1) & (t >= 0) & (t <= 1)
+    return hit, s, t
+
+
+def segment_intersections(points, edges):
+    """
+    Todos los cortes entre aristas con un barrido sobre x por franjas
+    horizontales: cada arista se apunta en las franjas que toca y, dentro
+    de una franja, solo se compara con las que empiezan antes de que ella
+    termine. Un par se cuenta solo en la franja del mayor de sus y mínimos.
+    Retorna (primera, segunda, s, t) de cada par que se corta.
+    """
+    points = np.asarray(points, dtype=np.float64)
+    edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+    empty = np.zeros(0, dtype=np.int64)
+    if len(edges) < 2:
+        return empty, empty, np.zeros(0), np.zeros(0)
+
+    segments = points[edges]
+    low = segments.min(axis=1)
+    high = segments.max(axis=1)
+    origin = low.min(axis=0)
+    span = high.max(axis=0) - origin
+    # Franjas del alto medio de las aristas, sin pasar de ~sqrt(M) franjas
+    height = max(float(np.mean(high[:, 1] - low[:, 1])), span[1] / np.sqrt(len(edges)), 1e-300)
+    first_band = ((low[:, 1] - origin[1]) / height).astype(np.int64)
+    last_band = ((high[:, 1] - origin[1]) / height).astype(np.int64)
+    copies = last_band - first_band + 1
+    item = np.repeat(np.arange(len(edges)), copies)
+    band = np.repeat(first_band, copies) + np.arange(copies.sum()) - np.repeat(np.cumsum(copies) - copies, copies)
+
+    # Clave de barrido creciente por (franja, x mínima)
+    stride = span[0] + 1.0
+    start_key = band * stride + (low[item, 0] - origin[0])
+    order = np.argsort(start_key, kind='stable')
+    item, band, start_key = item[order], band[order], start_key[order]
+    stop = np.searchsorted(start_key, band * stride + (high[item, 0] - origin[0]), side='right')
+    counts = stop - np.arange(len(item)) - 1
+    totals = np.cumsum(counts)
+
+    found = []
+    begin = 0
+    while begin < len(item):
+        # Bloque del barrido cuyos pares caben en PAIR_CHUNK
+        base = totals[begin - 1] if begin else 0
+        end = max(begin + 1, int(np.searchsorted(totals, base + PAIR_CHUNK, side='right')))
+        sizes = counts[begin:end]
+        sweep = np.repeat(np.arange(begin, end), sizes)
+        offsets = np.arange(sizes.sum()) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+        first = item[sweep]
+        second = item[sweep + 1 + offsets]
+        overlap = (low[first, 1] <= high[second, 1]) & (low[second, 1] <= high[first, 1])
+        reference = ((np.maximum(low[first, 1], low[second, 1]) - origin[1]) / height).astype(np.int64)
+        overlap &= reference == band[sweep]
+        first, second = first[overlap], second[overlap]
+        hit, s, t = intersect_pairs(points, edges, first, second)
+        found.append((first[hit], second[hit], s[hit], t[hit]))
+        begin = end
+
+    return tuple(np.concatenate(column) for column in zip(*found))
+
+
+def split_at_intersections(points, edges, tolerance=1e-9):
+    """
+    Parte las aristas en sus cortes. Los cortes en el extremo de una arista
+    reutilizan ese vértice y los que coinciden (redondeados a `tolerance`)
+    comparten el nuevo vértice. Retorna (vértices, aristas): los vértices
+    originales seguidos de los nuevos.
+    """
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    new_points, pieces, _ = intersection_splits(points, edges, tolerance)
+    return np.vstack([points, new_points]), pieces
+
+
+def intersection_splits(points, edges, tolerance=1e-9):
+    """
+    Como split_at_intersections pero sin copiar los vértices originales.
+    Retorna (vértices nuevos, tramos, arista de la que sale cada tramo); los
+    tramos van ordenados por arista.
+    """
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+    first, second, s, t = segment_intersections(points, edges)
+    if not len(first):
+        return np.zeros((0, 2)), edges, np.arange(len(edges))
+
+    start = points[edges[first, 0]]
+    crossing = start + s[:, None] * (points[edges[first, 1]] - start)
+    keys = np.round(crossing / tolerance).astype(np.int64)
+    unique_keys, group = np.unique(keys, axis=0, return_inverse=True)
+    group = group.reshape(-1)
+    new_points = np.zeros((len(unique_keys), 2))
+    new_points[group] = crossing
+    vertex = len(points) + group
+    # Un corte en el extremo de una arista (unión en T) usa ese vértice
+    for edge_ids, params in ((second, t), (first, s)):
+        vertex = np.where(params <= PARAM_EPSILON, edges[edge_ids, 0],
+                          np.where(params >= 1 - PARAM_EPSILON, edges[edge_ids, 1], vertex))
+
+    # Cortes de cada arista: (arista, parámetro, vértice), extremos incluidos
+    edge_ids = np.concatenate([first, second])
+    params = np.concatenate([s, t])
+    cut_vertex = np.concatenate([vertex, vertex])
+
+    all_edges = np.arange(len(edges))
+    edge_ids = np.concatenate([all_edges, all_edges, edge_ids])
+    params = np.concatenate([np.zeros(len(edges)), np.ones(len(edges)), params])
+    cut_vertex = np.concatenate([edges[:, 0], edges[:, 1], cut_vertex])
+    order = np.lexsort((params, edge_ids))
+    edge_ids, cut_vertex = edge_ids[order], cut_vertex[order]
+
+    # Tramos entre cortes consecutivos de la misma arista
+    same = edge_ids[1:] == edge_ids[:-1]
+    pieces = np.column_stack([cut_vertex[:-1][same], cut_vertex[1:][same]])
+    owner = edge_ids[:-1][same]
+    distinct = pieces[:, 0] != pieces[:, 1]
+    pieces, owner = pieces[distinct], owner[distinct]
+    # Vértices nuevos que acabaron sin usar (todos sus cortes en extremos)
+    used = np.zeros(len(new_points), dtype=bool)
+    new_ids = pieces[pieces >= len(points)] - len(points)
+    used[new_ids] = True
+    remap = np.arange(len(points) + len(new_points))
+    remap[len(points):] = len(points) + np.cumsum(used) - 1
+    return new_points[used], remap[pieces], owner
+
+
+class Snap:
+    """
+    Resultado del snap: tipo (SNAP_*), punto (x, y) y el vértice o las
+    aristas de las que sale
+    """
+
+    def __init__(self, kind, point, vertex=None, edges=()):
+        self.kind = kind
+        self.point = (float(point[0]), float(point[1]))
+        self.vertex = vertex
+        self.edges = tuple(int(edge) for edge in edges)
+
+    def __repr__(self):
+        return f"Snap({self.kind!r}, {self.point})"
+
+
+class SnapEngine:
+    """
+    Motor de snap de un Sketch. Los vértices se buscan en su SpatialHash y
+    las aristas en su BVH; los cortes entre aristas se calculan de una vez
+    con el barrido y, mientras solo se añaden líneas, se completan probando
+    las nuevas contra el BVH. Cada consulta cuesta lo que la búsqueda en
+    los índices, así que se puede llamar en cada movimiento del ratón.
+    """
+
+    def __init__(self, sketch, modes=SNAP_MODES, full_pass_threshold=64):
+        self.sketch = sketch
+        self.modes = tuple(modes)
+        self.full_pass_threshold = full_pass_threshold
+        self.crossings = SpatialHash(sketch.snap_distance)
+        self.crossing_points = []  # (x, y) de cada corte
+        self.crossing_edges = []  # Aristas (primera, segunda) de cada corte
+        self._edge_count = 0
+        self._topology = None
+
+    def sync(self):
+        """
+        Pone al día el BVH de aristas y los cortes con el almacenamiento:
+        se conservan los cortes de las aristas que no cambiaron y se buscan
+        los de las demás
+        """
+        store = self.sketch.store
+        self.sketch.sync_segment_index()
+        if store.topology == self._topology:
+            return
+        kept = min(store.retained_since(self._topology)[1], self._edge_count)
+        if store.n_edges - kept > self.full_pass_threshold:
+            self._reset(*segment_intersections(store.points, store.edges)[:3])
+        else:
+            if kept < self._edge_count:
+                self._drop_crossings(kept)
+            for edge in range(kept, store.n_edges):
+                self._add_crossings(edge)
+        self._edge_count = store.n_edges
+        self._topology = store.topology
+
+    def _reset(self, first, second, s):
+        self.crossings = SpatialHash(self.sketch.snap_distance)
+        self.crossing_points = []
+        self.crossing_edges = []
+        self._insert(first, second, s)
+
+    def _insert(self, first, second, s):
+        store = self.sketch.store
+        start = store.points[store.edges[first, 0]]
+        points = start + s[:, None] * (store.points[store.edges[first, 1]] - start)
+        for pair, point in zip(zip(first.tolist(), second.tolist()), points.tolist()):
+            self.crossings.insert(len(self.crossing_points), point)
+            self.crossing_points.append(point)
+            self.crossing_edges.append(pair)
+
+    def _drop_crossings(self, n_edges):
+        # Aristas descartadas del final (deshacer)
+        self._remove_crossings(lambda pair: max(pair) >= n_edges)
+
+    def _remove_crossings(self, predicate):
+        # Los cortes salen del índice y los huecos del final de las listas
+        # se recortan
+        for index, pair in enumerate(self.crossing_edges):
+            if pair is not None and predicate(pair):
+                self.crossings.remove(index, self.crossing_points[index])
+                self.crossing_edges[index] = None
+        while self.crossing_edges and self.crossing_edges[-1] is None:
+            self.crossing_edges.pop()
+            self.crossing_points.pop()
+
+    def update_edges(self, edges):
+        """
+        Recalcula los cortes de las aristas `edges` después de mover sus
+        vértices (sin cambio de topología); el BVH ya debe tener sus cajas
+        nuevas. Con muchas aristas sale más a cuenta el barrido completo.
+        """
+        store = self.sketch.store
+        if self._topology is None:
+            return  # El primer sync lo calcula todo
+        # Los cambios de topología pendientes primero: sync() no sabe de
+        # movimientos
+        self.sync()
+        if len(edges) > self.full_pass_threshold:
+            self._reset(*segment_intersections(store.points, store.edges)[:3])
+            return
+        moved = np.unique(np.asarray(edges, dtype=np.int64))
+        lookup = set(moved.tolist())
+        self._remove_crossings(lambda pair: pair[0] in lookup or pair[1] in lookup)
+        for edge in moved.tolist():
+            self._add_crossings(edge, moved)
+
+    def _add_crossings(self, edge, moved=None):
+        # Cortes de `edge` con las aristas anteriores; si `edge` es una de
+        # las aristas movidas `moved`, con todas salvo las movidas
+        # posteriores (cada par se cuenta una vez)
+        store = self.sketch.store
+        segment = store.points[store.edges[edge]]
+        low, high = segment.min(axis=0), segment.max(axis=0)
+        others = self.sketch.segment_index.candidates(
+            lambda mins, maxs: ((mins <= high) & (low <= maxs)).all(axis=1))
+        if moved is None:
+            others = others[others < edge]
+        else:
+            others = others[(others < edge) | ((others > edge) & ~np.isin(others, moved))]
+        first = np.full(len(others), edge)
+        hit, s, _ = intersect_pairs(store.points, store.edges, first, others)
+        self._insert(first[hit], others[hit], s[hit])
+
+    def snap(self, point, radius):
+        """
+        Snap de mayor prioridad a menos de `radius` de `point`, o None
+        """
+        if SNAP_VERTEX in self.modes:
+            vertex = self.sketch.find_snap_point(point, radius)
+            if vertex is not None:
+                return Snap(SNAP_VERTEX, self.sketch.store.vertex(vertex), vertex=vertex)
+
+        self.sync()
+        if SNAP_INTERSECTION in self.modes:
+            crossing = self.crossings.nearest(point, radius)
+            if crossing is not None:
+                return Snap(SNAP_INTERSECTION, self.crossing_points[crossing],
+                            edges=self.crossing_edges[crossing])
+
+        if SNAP_MIDPOINT not in self.modes and SNAP_NEAREST not in self.modes:
+            return None
+        candidates = self.sketch.segment_index.point_candidates(point, radius)
+        if not len(candidates):
+            return None
+        store = self.sketch.store
+        segments = store.points[store.edges[candidates]]
+        query = np.asarray(point, dtype=np.float64)
+
+        if SNAP_MIDPOINT in self.modes:
+            middle = 0.5 * (segments[:, 0] + segments[:, 1])
+            distance = np.linalg.norm(middle - query, axis=1)
+            best = int(np.argmin(distance))
+            if distance[best] <= radius:
+                return Snap(SNAP_MIDPOINT, middle[best], edges=(candidates[best],))
+
+        if SNAP_NEAREST in self.modes:
+            distance, t = point_segment_distance(query, segments[:, 0], segments[:, 1])
+            best = int(np.argmin(distance))
+            if distance[best] <= radius:
+                closest = segments[best, 0] + t[best] * (segments[best, 1] - segments[best, 0])
+                return Snap(SNAP_NEAREST, closest, edges=(candidates[best],))
+        return None
@@ -0,0 +1,94 @@
+# spatial_index.py
+"""
+Índice espacial de rejilla uniforme para búsquedas de vecinos en 2D
+"""
+import math
+
+
+class SpatialHash:
+    """
+    Rejilla uniforme (hash espacial) sobre puntos 2D.
+
+    Cada celda tiene lado `cell_size`; si el radio de búsqueda no supera el
+    tamaño de celda basta con revisar las 3x3 celdas vecinas, por lo que
+    la consulta del punto más cercano es O(1) en promedio.
+    """
+
+    def __init__(self, cell_size):
+        if cell_size <= 0:
+            raise ValueError("cell_size debe ser positivo")
+        self.cell_size = float(cell_size)
+        self.cells = {}
+        self.count = 0
+
+    def _cell(self, point):
+        return (math.floor(point[0] / self.cell_size),
+                math.floor(point[1] / self.cell_size))
+
+    def insert(self, index, point):
+        # Cada celda guarda (índice, x, y) para no consultar el almacenamiento
+        entry = (index, float(point[0]), float(point[1]))
+        self.cells.setdefault(self._cell(point), []).append(entry)
+        self.count += 1
+
+    def remove(self, index, point):
+        key = self._cell(point)
+        bucket = self.cells.get(key)
+        if not bucket:
+            return False
+        for position, entry in enumerate(bucket):
+            if entry[0] == index:
+                del bucket[position]
+                break
+        else:
+            return False
+        if not bucket:
+            del self.cells[key]
+        self.count -= 1
+        return True
+
+    def move(self, index, old_point, new_point):
+        """
+        Actualiza la posición de un punto que se ha desplazado
+        """
+        self.remove(index, old_point)
+        self.insert(index, new_point)
+
+    def nearest(self, point, radius):
+        """
+        Retorna el índice del punto más cercano a `point` a distancia menor
+        que `radius`, o None
+        """
+        cx, cy = self._cell(point)
+        reach = max(1, math.ceil(radius / self.cell_size))
+        px, py = point[0], point[1]
+        best = None
+        best_dist = radius * radius
+        for ix in range(cx - reach, cx + reach + 1):
+            for iy in range(cy - reach, cy + reach + 1):
+                bucket = self.cells.get((ix, iy))
+                if not bucket:
+                    continue
+                for index, x, y in bucket:
+                    dist = (x - px) ** 2 + (y - py) ** 2
+                    if dist < best_dist:
+                        best_dist = dist
+                        best = index
+        return best
+
+    def rebuild(self, points, cell_size=None):
+        """
+        Reconstruye el índice completo (p. ej. al cambiar `snap_distance`)
+        """
+        if cell_size is not None:
+            self.cell_size = float(cell_size)
+        self.clear()
+        for index, point in enumerate(points):
+            self.insert(index, point)
+
+    def clear(self):
+        self.cells = {}
+        self.count = 0
+
+    def __len__(self):
+        return self.count
@@ -0,0 +1,365 @@
+# triangulation.py
+"""
+Triangulación de polígonos con agujeros en O(n log n): partición en piezas
+y-monótonas con un barrido y triangulación lineal de cada pieza
+"""
+import numpy as np
+from profiles import make_half_edges, face_successors, order_cycles
+
+START, END, SPLIT, MERGE, REGULAR_LEFT, REGULAR_RIGHT = range(6)
+
+
+def _ring_links(rings):
+    """
+    Vértices locales 0..n-1 de los anillos concatenados con su siguiente y
+    anterior dentro de su anillo
+    """
+    sizes = np.array([len(ring) for ring in rings])
+    starts = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+    local = np.arange(sizes.sum())
+    ring_start = np.repeat(starts, sizes)
+    ring_size = np.repeat(sizes, sizes)
+    offset = local - ring_start
+    following = ring_start + (offset + 1) % ring_size
+    preceding = ring_start + (offset - 1) % ring_size
+    return following, preceding
+
+
+def classify_vertices(xy, following, preceding):
+    """
+    Tipo de cada vértice para el barrido de arriba hacia abajo. Retorna
+    (tipos, rango en el orden del barrido, orden del barrido).
+    """
+    count = len(xy)
+    # Orden del barrido: mayor y primero; a igual y, menor x primero
+    order = np.lexsort((xy[:, 0], -xy[:, 1]))
+    rank = np.empty(count, dtype=np.int64)
+    rank[order] = np.arange(count)
+
+    below_prev = rank[preceding] > rank
+    below_next = rank[following] > rank
+    incoming = xy - xy[preceding]
+    outgoing = xy[following] - xy
+    convex = incoming[:, 0] * outgoing[:, 1] - incoming[:, 1] * outgoing[:, 0] > 0
+
+    kinds = np.where(below_next, REGULAR_LEFT, REGULAR_RIGHT)
+    kinds[below_prev & below_next] = np.where(convex, START, SPLIT)[below_prev & below_next]
+    both_above = ~below_prev & ~below_next
+    kinds[both_above] = np.where(convex, END, MERGE)[both_above]
+    return kinds, rank, order
+
+
+def left_edges(xy, base_x, slope, rank, order, lower, edges, queries):
+    """
+    Para cada vértice de `queries`, la arista de `edges` más cercana a su
+    izquierda entre las que cruzan su altura en el barrido (las que están
+    entre el rango de su extremo superior y el de su extremo inferior
+    `lower`, sin incluirlos), o -1. La recta de cada arista es
+    x = base_x + (y - y0) * slope.
+
+    Todas las consultas van en bloque sobre un árbol de segmentos de
+    rangos del barrido: cada arista se guarda en los O(log n) nodos que
+    cubren su intervalo, ordenada por x (dentro de un nodo las aristas no se
+    cruzan), y cada consulta hace una búsqueda binaria en los nodos de su
+    camino, todas a la vez.
+    """
+    x, y = xy[:, 0], xy[:, 1]
+    levels = max(1, (len(xy) - 1).bit_length())
+    size = 1 << levels
+
+    # Nodos que cubren [rango superior + 1, rango inferior) de cada arista
+    edges = np.asarray(edges, dtype=np.int64)
+    low = rank[edges] + 1 + size
+    high = rank[lower[edges]] + size
+    owners = np.arange(len(edges))
+    nodes, entries = [], []
+    while len(owners):
+        keep = low < high
+        owners, low, high = owners[keep], low[keep], high[keep]
+        take = (low & 1) == 1
+        nodes.append(low[take])
+        entries.append(owners[take])
+        low = low + take
+        take = (high & 1) == 1
+        high = high - take
+        nodes.append(high[take])
+        entries.append(owners[take])
+        low >>= 1
+        high >>= 1
+    nodes = np.concatenate(nodes)
+    entries = edges[np.concatenate(entries)]
+
+    # Orden de cada nodo: x a la altura de su primer rango. Se ordena por
+    # nodo y rango de x en una sola clave entera.
+    first = (nodes << (levels + 1 - np.frexp(nodes)[1])) - size
+    key = base_x[entries] + (y[order[first]] - y[entries]) * slope[entries]
+    key_rank = np.empty(len(key), dtype=np.int64)
+    key_rank[np.argsort(key)] = np.arange(len(key))
+    by_node = np.argsort(nodes * len(key) + key_rank)
+    entries = entries[by_node]
+    node_start = np.searchsorted(nodes[by_node], np.arange(2 * size + 1))
+    entry_x, entry_y, entry_slope = base_x[entries], y[entries], slope[entries]
+
+    # Búsqueda en los nodos del camino de cada consulta: última arista con
+    # x <= x del vértice
+    queries = np.asarray(queries, dtype=np.int64)
+    path = ((rank[queries] + size)[:, None] >> np.arange(levels + 1)).ravel()
+    asker = np.repeat(np.arange(len(queries)), levels + 1)
+    lo, hi = node_start[path], node_start[path + 1]
+    nonempty = lo < hi
+    asker, lo, hi = asker[nonempty], lo[nonempty], hi[nonempty]
+    query_x, query_y = x[queries][asker], y[queries][asker]
+    start = lo.copy()
+    active = np.arange(len(lo))
+    while len(active):
+        low, high = lo[active], hi[active]
+        mid = (low + high) // 2
+        right = entry_x[mid] + (query_y[active] - entry_y[mid]) * entry_slope[mid] <= query_x[active]
+        low = np.where(right, mid + 1, low)
+        high = np.where(right, high, mid)
+        lo[active], hi[active] = low, high
+        active = active[low < high]
+
+    # De los candidatos de cada consulta (contiguos), el de mayor x a su
+    # altura
+    found = np.flatnonzero(lo > start)
+    asker, candidate = asker[found], lo[found] - 1
+    position = entry_x[candidate] + (query_y[found] - entry_y[candidate]) * entry_slope[candidate]
+    result = np.full(len(queries), -1, dtype=np.int64)
+    if not len(found):
+        return result
+    group_start = np.flatnonzero(np.r_[True, asker[1:] != asker[:-1]])
+    best = np.maximum.reduceat(position, group_start)
+    group = np.cumsum(np.r_[True, asker[1:] != asker[:-1]]) - 1
+    chosen = position == best[group]
+    result[asker[chosen]] = entries[candidate[chosen]]
+    return result
+
+
+def monotone_diagonals(xy, following, kinds, order, rank):
+    """
+    Barrido que retorna las diagonales que parten el polígono en piezas
+    y-monótonas (de Berg et al., cap. 3). Las aristas del estado del
+    barrido son las que dejan el interior a su derecha; la que queda a la
+    izquierda de cada vértice se busca de antemano para todos a la vez
+    (left_edges), así que el barrido solo pone al día los ayudantes.
+    """
+    # Recta de cada arista como x = x0 + (y - y0) * slope; las horizontales
+    # se toman en su extremo izquierdo
+    start_x, start_y = xy[:, 0], xy[:, 1]
+    end_x, end_y = start_x[following], start_y[following]
+    rise = end_y - start_y
+    flat = rise == 0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        slope = np.where(flat, 0.0, (end_x - start_x) / np.where(flat, 1.0, rise))
+    base_x = np.where(flat, np.minimum(start_x, end_x), start_x)
+
+    status_edges = np.flatnonzero(np.isin(kinds, (START, SPLIT, REGULAR_LEFT)))
+    queries = np.flatnonzero(np.isin(kinds, (REGULAR_RIGHT, SPLIT, MERGE)))
+    left = np.full(len(xy), -1, dtype=np.int64)
+    left[queries] = left_edges(xy, base_x, slope, rank, order, following, status_edges, queries)
+    if (left[queries] < 0).any():
+        raise ValueError("Polígono no simple: vértice sin contorno a su izquierda")
+
+    left = left.tolist()
+    kinds = kinds.tolist()
+    prev_of = [0] * len(xy)
+    for vertex, after in enumerate(following.tolist()):
+        prev_of[after] = vertex
+    helper = {}  # Arista del estado -> su ayudante
+    diagonals = []
+
+    for vertex in order.tolist():
+        kind = kinds[vertex]
+
+        if kind == REGULAR_LEFT:
+            # El interior queda a la derecha: la arista siguiente reemplaza a la anterior
+            previous = helper.pop(prev_of[vertex])
+            if kinds[previous] == MERGE:
+                diagonals.append((vertex, previous))
+            helper[vertex] = vertex
+
+        elif kind == REGULAR_RIGHT:
+            edge = left[vertex]
+            if kinds[helper[edge]] == MERGE:
+                diagonals.append((vertex, helper[edge]))
+            helper[edge] = vertex
+
+        elif kind == START:
+            helper[vertex] = vertex
+
+        elif kind == END:
+            previous = helper.pop(prev_of[vertex])
+            if kinds[previous] == MERGE:
+                diagonals.append((vertex, previous))
+
+        elif kind == SPLIT:
+            edge = left[vertex]
+            diagonals.append((vertex, helper[edge]))
+            helper[edge] = vertex
+            helper[vertex] = vertex
+
+        else:  # MERGE
+            previous = helper.pop(prev_of[vertex])
+            if kinds[previous] == MERGE:
+                diagonals.append((vertex, previous))
+            edge = left[vertex]
+            if kinds[helper[edge]] == MERGE:
+                diagonals.append((vertex, helper[edge]))
+            helper[edge] = vertex
+
+    return diagonals
+
+
+def monotone_pieces(xy, following, ring_sizes, diagonals):
+    """
+    Recorre las caras del contorno más las diagonales y retorna las piezas
+    interiores concatenadas, cada una en sentido antihorario, junto con el
+    tamaño de cada pieza
+    """
+    count = len(xy)
+    if not diagonals:
+        # Los anillos ya están concatenados en orden
+        return np.arange(count), np.asarray(ring_sizes, dtype=np.int64)
+
+    boundary = np.column_stack([np.arange(count), following])
+    edges = np.concatenate([boundary, np.asarray(diagonals, dtype=np.int64)])
+    half_edges = make_half_edges(edges)
+    successor = face_successors(xy, half_edges)
+    order, cycle_of, starts = order_cycles(successor)
+
+    # Las semiaristas del contorno en sentido contrario pertenecen al exterior
+    exterior = np.zeros(len(half_edges), dtype=bool)
+    exterior[1:2 * count:2] = True
+    interior_cycles = np.bincount(cycle_of, weights=exterior, minlength=len(starts)) == 0
+    sizes = np.diff(np.append(starts, len(order)))
+    keep = np.repeat(interior_cycles, sizes)
+    return half_edges[order[keep], 0], sizes[interior_cycles]
+
+
+def _split_quads(xy, quads):
+    """
+    Parte cuadriláteros simples (Q, 4) antihorarios por la diagonal que deja
+    ambos triángulos con orientación positiva
+    """
+    a, b, c, d = (xy[quads[:, i]] for i in range(4))
+
+    def orientation(p, q, r):
+        return (q[:, 0] - p[:, 0]) * (r[:, 1] - p[:, 1]) - (q[:, 1] - p[:, 1]) * (r[:, 0] - p[:, 0])
+
+    use_ac = (orientation(a, b, c) > 0) & (orientation(a, c, d) > 0)
+    first = np.where(use_ac[:, None], quads[:, [0, 1, 2]], quads[:, [0, 1, 3]])
+    second = np.where(use_ac[:, None], quads[:, [0, 2, 3]], quads[:, [1, 2, 3]])
+    return np.concatenate([first, second])
+
+
+def triangulate_monotone(xy, rank, vertices, sizes):
+    """
+    Triangula piezas y-monótonas concatenadas (vértices antihorarios) con el
+    algoritmo de la pila, lineal en el tamaño de cada pieza. La mezcla de las
+    dos cadenas por altura se hace en bloque para todas las piezas.
+    """
+    vertices = np.asarray(vertices, dtype=np.int64)
+    sizes = np.asarray(sizes, dtype=np.int64)
+    if not len(sizes):
+        return np.zeros((0, 3), dtype=np.int64)
+    starts = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+    piece = np.repeat(np.arange(len(sizes)), sizes)
+
+    # Vértices de cada pieza de arriba hacia abajo
+    by_height = np.lexsort((rank[vertices], piece))
+    top = by_height[starts]
+    bottom = by_height[starts + sizes - 1]
+
+    # Cadena izquierda (1): antihorario desde el vértice superior hasta el
+    # inferior; derecha (2): el resto; los extremos no tienen cadena (0)
+    position = np.arange(len(vertices))
+    offset = (position - top[piece]) % sizes[piece]
+    bottom_offset = ((bottom - top) % sizes)[piece]
+    chain = np.where(offset < bottom_offset, 1, 2)
+    chain[(offset == 0) | (offset == bottom_offset)] = 0
+
+    sequence = vertices[by_height].tolist()
+    chains = chain[by_height].tolist()
+    x = xy[:, 0].tolist()
+    y = xy[:, 1].tolist()
+    triangles = []
+    for start, size in zip(starts.tolist(), sizes.tolist()):
+        if size < 3:
+            continue
+        stack = [start, start + 1]
+        for j in range(start + 2, start + size - 1):
+            vertex, side = sequence[j], chains[j]
+            if side != chains[stack[-1]]:
+                # Cadena opuesta: abanico con toda la pila
+                for k in range(len(stack) - 1):
+                    triangles.append((vertex, sequence[stack[k]], sequence[stack[k + 1]]))
+                stack = [j - 1, j]
+            else:
+                last = stack.pop()
+                vx, vy = x[vertex], y[vertex]
+                while stack:
+                    a, b = sequence[last], sequence[stack[-1]]
+                    cross = (x[a] - vx) * (y[b] - vy) - (y[a] - vy) * (x[b] - vx)
+                    # La diagonal queda dentro si el giro va hacia el interior
+                    if (cross < 0) if side == 1 else (cross > 0):
+                        triangles.append((vertex, a, b))
+                        last = stack.pop()
+                    else:
+                        break
+                stack.append(last)
+                stack.append(j)
+
+        vertex = sequence[start + size - 1]
+        for k in range(len(stack) - 1):
+            triangles.append((vertex, sequence[stack[k]], sequence[stack[k + 1]]))
+    return np.asarray(triangles, dtype=np.int64).reshape(-1, 3)
+
+
+def triangulate_polygon(points, outer, holes=()):
+    """
+    Triangula el polígono con contorno `outer` (antihorario) y agujeros
+    `holes` (horarios), dados como índices de `points`. Retorna triángulos
+    (K, 3) antihorarios con índices de `points`.
+    """
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    rings = [np.asarray(outer, dtype=np.int64)] + [np.asarray(hole, dtype=np.int64) for hole in holes]
+    rings = [ring for ring in rings if len(ring) >= 3]
+    if not rings:
+        return np.zeros((0, 3), dtype=np.int64)
+
+    global_index = np.concatenate(rings)
+    xy = points[global_index]
+    following, preceding = _ring_links(rings)
+
+    kinds, rank, order = classify_vertices(xy, following, preceding)
+    diagonals = monotone_diagonals(xy, following, kinds, order, rank)
+    vertices, sizes = monotone_pieces(xy, following, [len(ring) for ring in rings], diagonals)
+
+    # Triángulos y cuadriláteros (la mayoría de las piezas) van en bloque
+    owner = np.repeat(sizes, sizes)
+    large = sizes > 4
+    triangles = np.concatenate([
+        vertices[owner == 3].reshape(-1, 3),
+        _split_quads(xy, vertices[owner == 4].reshape(-1, 4)),
+        triangulate_monotone(xy, rank, vertices[np.repeat(large, sizes)], sizes[large]),
+    ])
+    if not len(triangles):
+        return np.zeros((0, 3), dtype=np.int64)
+
+    # Orientación antihoraria y sin triángulos degenerados
+    a, b, c = xy[triangles[:, 0]], xy[triangles[:, 1]], xy[triangles[:, 2]]
+    cross = (b[:, 0] - a[:, 0]) * (c[:, 1] - a[:, 1]) - (b[:, 1] - a[:, 1]) * (c[:, 0] - a[:, 0])
+    triangles[cross < 0] = triangles[cross < 0][:, ::-1]
+    triangles = triangles[cross != 0]
+    return global_index[triangles]
+
+
+def triangulate_regions(points, regions):
+    """
+    Triángulos de un conjunto de regiones (profiles.Region) concatenados
+    """
+    parts = [triangulate_polygon(points, region.outer, region.holes) for region in regions]
+    if not parts:
+        return np.zeros((0, 3), dtype=np.int64)
+    return np.concatenate(parts)
@@ -6,5 +6,8 @@ También puede exponer clases específicas para facilitar las importaciones.
 from .components import Button, InputBox, UIComponent
 from .menus import Submenu, UIManager
 from .cad_ui import CADUserInterface
+from .overlay import UIOverlay
+from .hud import PerformanceHUD
+from .fonts import get_font
 
-__all__ = ['Button', 'InputBox', 'UIComponent', 'Submenu', 'UIManager', 'CADUserInterface']
+__all__ = ['Button', 'InputBox', 'UIComponent', 'Submenu', 'UIManager', 'CADUserInterface', 'UIOverlay', 'PerformanceHUD', 'get_font']
@@ -15,6 +15,7 @@ class CADUserInterface:
 
         # Crear submenu de extrusión
         self.extrude_submenu = Submenu(10, 50, 200, 100)
+        self.ui_manager.add_submenu(self.extrude_submenu)
         self.extrude_input = InputBox(20, 70, 180, 30, "")
         self.extrude_submenu.add_component(self.extrude_input)
 
@@ -40,4 +41,10 @@ class CADUserInterface:
         return self.ui_manager.handle_event(event)
 
     def draw(self, screen):
-        self.ui_manager.draw(screen)
\ No newline at end of file
+        self.ui_manager.draw(screen)
+
+    def collect_dirty_rects(self):
+        return self.ui_manager.collect_dirty_rects()
+
+    def redraw_region(self, surface, rect):
+        self.ui_manager.redraw_region(surface, rect)
@@ -1,11 +1,18 @@
 #ui/components
 import pygame
+from collections import OrderedDict
+from .fonts import get_font
 
 class UIComponent:
     def __init__(self, x, y, width, height):
         self.rect = pygame.Rect(x, y, width, height)
         #self.active = False
         self.visible = True
+        # Indica que el componente cambió y debe volver a dibujarse
+        self.dirty = True
+
+    def mark_dirty(self):
+        self.dirty = True
 
     def draw(self, surface):
         pass
@@ -18,7 +25,7 @@ class Button(UIComponent):
         super().__init__(x, y, width, height)
         self.text = text
         self.callback = callback
-        self.font = pygame.font.Font(None, 32)
+        self.font = get_font(None, 32)
         self.colors = {
             'normal': (100, 100, 100),
             'hover': (150, 150, 150),
@@ -26,6 +33,17 @@ class Button(UIComponent):
         }
         self.state = 'normal'  # Inicializar el estado
         self.submenu = None
+        # Texto ya rasterizado y la clave (texto, color) que lo generó: el
+        # estado solo cambia el fondo
+        self._label_key = None
+        self._label_surface = None
+
+    def get_label(self):
+        key = (self.text, self.colors['text'])
+        if key != self._label_key:
+            self._label_surface = self.font.render(self.text, True, self.colors['text'])
+            self._label_key = key
+        return self._label_surface
 
 
     def draw(self, surface):
@@ -37,7 +55,7 @@ class Button(UIComponent):
         pygame.draw.rect(surface, color, self.rect)
 
         # Dibujar el texto
-        text_surface = self.font.render(self.text, True, self.colors['text'])
+        text_surface = self.get_label()
         text_rect = text_surface.get_rect(center=self.rect.center)
         surface.blit(text_surface, text_rect)
 
@@ -49,7 +67,10 @@ class Button(UIComponent):
             return False
 
         if event.type == pygame.MOUSEMOTION:
-            self.state = 'hover' if self.rect.collidepoint(event.pos) else 'normal'
+            state = 'hover' if self.rect.collidepoint(event.pos) else 'normal'
+            if state != self.state:
+                self.state = state
+                self.mark_dirty()
 
         elif event.type == pygame.MOUSEBUTTONDOWN:
             if event.button == 1 and self.rect.collidepoint(event.pos):
@@ -58,10 +79,14 @@ class Button(UIComponent):
         return False
 
 class InputBox(UIComponent):
+    # Máximo de textos rasterizados que se guardan (p. ej. al borrar y reescribir)
+    TEXT_CACHE_SIZE = 32
+
     def __init__(self, x, y, width, height, text=''):
         super().__init__(x, y, width, height)
         self.text = text
-        self.font = pygame.font.Font(None, 24)
+        self.font = get_font(None, 24)
+        self._text_cache = OrderedDict()
 
         self.colors = {
             'inactive': (100, 100, 100),
@@ -70,12 +95,27 @@ class InputBox(UIComponent):
         }
         self.active = False
 
+    def get_text_surface(self):
+        key = (self.text, self.colors['text'])
+        text_surface = self._text_cache.get(key)
+        if text_surface is None:
+            text_surface = self.font.render(self.text, True, self.colors['text'])
+            self._text_cache[key] = text_surface
+            if len(self._text_cache) > self.TEXT_CACHE_SIZE:
+                self._text_cache.popitem(last=False)
+        else:
+            self._text_cache.move_to_end(key)
+        return text_surface
+
     def handle_event(self, event):
         if not self.visible:
             return False
 
         if event.type == pygame.MOUSEBUTTONDOWN:
-            self.active = self.rect.collidepoint(event.pos)
+            active = self.rect.collidepoint(event.pos)
+            if active != self.active:
+                self.active = active
+                self.mark_dirty()
             return self.active
 
         if event.type == pygame.KEYDOWN and self.active:
@@ -85,6 +125,7 @@ class InputBox(UIComponent):
                 self.text = self.text[:-1]
             else:
                 self.text += event.unicode
+            self.mark_dirty()
             return True
         return False
 
@@ -95,6 +136,6 @@ class InputBox(UIComponent):
         color = self.colors['active'] if self.active else self.colors['inactive']
         pygame.draw.rect(surface, color, self.rect)
 
-        text_surface = self.font.render(self.text, True, self.colors['text'])
+        text_surface = self.get_text_surface()
         text_rect = text_surface.get_rect(center=self.rect.center)
         surface.blit(text_surface, text_rect)
\ No newline at end of file
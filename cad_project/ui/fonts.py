@@ -0,0 +1,21 @@
+#ui/fonts
+import pygame
+
+# Registro compartido de fuentes, una instancia por (face, size)
+_fonts = {}
+
+
+def get_font(face=None, size=32):
+    """
+    Retorna la fuente compartida para (face, size), creándola si no existe
+    """
+    key = (face, size)
+    font = _fonts.get(key)
+    if font is None:
+        font = pygame.font.Font(face, size)
+        _fonts[key] = font
+    return font
+
+
+def clear_fonts():
+    _fonts.clear()
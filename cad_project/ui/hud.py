@@ -0,0 +1,112 @@
+#ui/hud
+import time
+import pygame
+from OpenGL.GL import *
+from .fonts import get_font
+
+
+class PerformanceHUD:
+    """
+    Panel de rendimiento en la esquina superior derecha: FPS, percentiles
+    del tiempo por cuadro, tamaño de la geometría y llamadas a OpenGL. El
+    texto se rasteriza y se sube a una textura pequeña como mucho cada
+    `refresh_ms`; el resto de cuadros solo dibuja el quad.
+    """
+
+    LINE_HEIGHT = 18
+    PADDING = 6
+
+    def __init__(self, display_size, width=330, lines=5, refresh_ms=250):
+        self.display = display_size
+        self.width = width
+        self.height = lines * self.LINE_HEIGHT + 2 * self.PADDING
+        self.refresh_ms = refresh_ms
+        self.surface = pygame.Surface((self.width, self.height), pygame.SRCALPHA)
+        self.texture = None
+        self.lines = []
+        self._last_refresh = None
+
+    def due(self):
+        """
+        Si ya pasó `refresh_ms` desde la última actualización
+        """
+        return (self._last_refresh is None
+                or (time.perf_counter() - self._last_refresh) * 1000 >= self.refresh_ms)
+
+    def update(self, lines):
+        """
+        Cambia el texto del panel; solo se rasteriza y sube si es otro
+        """
+        self._last_refresh = time.perf_counter()
+        if lines == self.lines and self.texture is not None:
+            return
+        self.lines = list(lines)
+
+        font = get_font(None, 20)
+        self.surface.fill((0, 0, 0, 170))
+        for row, text in enumerate(self.lines):
+            label = font.render(text, True, (230, 230, 230))
+            self.surface.blit(label, (self.PADDING, self.PADDING + row * self.LINE_HEIGHT))
+        data = pygame.image.tostring(self.surface, 'RGBA')
+
+        if self.texture is None:
+            self.texture = glGenTextures(1)
+            glBindTexture(GL_TEXTURE_2D, self.texture)
+            glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_NEAREST)
+            glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_NEAREST)
+        else:
+            glBindTexture(GL_TEXTURE_2D, self.texture)
+        glPixelStorei(GL_UNPACK_ALIGNMENT, 1)
+        glTexImage2D(GL_TEXTURE_2D, 0, GL_RGBA, self.width, self.height, 0,
+                     GL_RGBA, GL_UNSIGNED_BYTE, data)
+        glBindTexture(GL_TEXTURE_2D, 0)
+
+    def draw(self):
+        """
+        Dibuja el panel sobre la escena con su propia proyección ortográfica
+        """
+        if self.texture is None:
+            return
+        x = self.display[0] - self.width - 10
+        y = 10
+
+        glMatrixMode(GL_PROJECTION)
+        glPushMatrix()
+        glLoadIdentity()
+        glOrtho(0, self.display[0], self.display[1], 0, -1, 1)
+        glMatrixMode(GL_MODELVIEW)
+        glPushMatrix()
+        glLoadIdentity()
+
+        glPushAttrib(GL_ENABLE_BIT)
+        glDisable(GL_DEPTH_TEST)
+        glDisable(GL_LIGHTING)
+        glEnable(GL_TEXTURE_2D)
+        glEnable(GL_BLEND)
+        glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
+        glBindTexture(GL_TEXTURE_2D, self.texture)
+        glColor4f(1, 1, 1, 1)
+
+        glBegin(GL_QUADS)
+        glTexCoord2f(0, 0)
+        glVertex2f(x, y)
+        glTexCoord2f(1, 0)
+        glVertex2f(x + self.width, y)
+        glTexCoord2f(1, 1)
+        glVertex2f(x + self.width, y + self.height)
+        glTexCoord2f(0, 1)
+        glVertex2f(x, y + self.height)
+        glEnd()
+
+        glBindTexture(GL_TEXTURE_2D, 0)
+        glPopAttrib()
+
+        glMatrixMode(GL_PROJECTION)
+        glPopMatrix()
+        glMatrixMode(GL_MODELVIEW)
+        glPopMatrix()
+
+    def release(self):
+        if self.texture is not None:
+            glDeleteTextures([self.texture])
+            self.texture = None
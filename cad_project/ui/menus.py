@@ -6,12 +6,39 @@ class Submenu:
     def __init__(self, x, y, width, height):
         self.rect = pygame.Rect(x, y, width, height)
         self.components = []
-        self.visible = False
+        self._visible = False
+        self.dirty = True
         self.background_color = (80, 80, 80)
 
+    @property
+    def visible(self):
+        return self._visible
+
+    @visible.setter
+    def visible(self, value):
+        # Mostrar u ocultar el submenu invalida todo su rectángulo
+        if value != self._visible:
+            self._visible = value
+            self.dirty = True
+
     def add_component(self, component):
         self.components.append(component)
 
+    def collect_dirty_rects(self):
+        """
+        Retorna los rectángulos que cambiaron y limpia las marcas
+        """
+        rects = []
+        if self.dirty:
+            rects.append(self.rect.copy())
+            self.dirty = False
+        for component in self.components:
+            if component.dirty:
+                if self.visible:
+                    rects.append(component.rect.copy())
+                component.dirty = False
+        return rects
+
     def draw(self, surface):
         if not self.visible:
             return
@@ -31,20 +58,48 @@ class Submenu:
 
 class UIManager:
     def __init__(self, width, height):
-        self.surface = pygame.Surface((width, height), pygame.SRCALPHA)
+        self.rect = pygame.Rect(0, 0, width, height)
         self.components = []
+        self.submenus = []
         self.active_submenu = None
 
     def add_component(self, component):
         self.components.append(component)
 
+    def add_submenu(self, submenu):
+        # Los submenus registrados participan en el seguimiento de cambios
+        self.submenus.append(submenu)
+
     def draw(self, screen):
-        self.surface.fill((0, 0, 0, 0))
+        # Dibuja directamente sobre la superficie destino, sin intermedia
         for component in self.components:
-            component.draw(self.surface)
+            component.draw(screen)
         if self.active_submenu:
-            self.active_submenu.draw(self.surface)
-        screen.blit(self.surface, (0, 0))
+            self.active_submenu.draw(screen)
+
+    def collect_dirty_rects(self):
+        """
+        Retorna los rectángulos de pantalla que cambiaron desde la última
+        llamada, recortados al tamaño de la UI
+        """
+        rects = []
+        for component in self.components:
+            if component.dirty:
+                rects.append(component.rect.copy())
+                component.dirty = False
+        for submenu in self.submenus:
+            rects.extend(submenu.collect_dirty_rects())
+        return [rect.clip(self.rect) for rect in rects if rect.colliderect(self.rect)]
+
+    def redraw_region(self, surface, rect):
+        """
+        Limpia y vuelve a dibujar solo la región `rect` de `surface`
+        """
+        previous_clip = surface.get_clip()
+        surface.set_clip(rect)
+        surface.fill((0, 0, 0, 0), rect)
+        self.draw(surface)
+        surface.set_clip(previous_clip)
 
     def handle_event(self, event):
         if self.active_submenu and self.active_submenu.handle_event(event):
@@ -0,0 +1,97 @@
+#ui/overlay
+import pygame
+from OpenGL.GL import *
+
+
+class UIOverlay:
+    """
+    Mantiene la UI en una textura de OpenGL. Solo se redibujan y suben
+    (glTexSubImage2D) los rectángulos que los componentes marcan como
+    modificados; el resto de cuadros solo dibuja un quad texturizado.
+    """
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.surface = pygame.Surface((width, height), pygame.SRCALPHA)
+        self.texture = None
+        self.uploaded_bytes = 0  # Bytes subidos en la última actualización
+
+    def _create_texture(self, ui):
+        self.texture = glGenTextures(1)
+        glBindTexture(GL_TEXTURE_2D, self.texture)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_NEAREST)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_NEAREST)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_S, GL_CLAMP_TO_EDGE)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_T, GL_CLAMP_TO_EDGE)
+
+        # Primera vez: dibujar toda la UI y subirla completa
+        ui.collect_dirty_rects()
+        self.surface.fill((0, 0, 0, 0))
+        ui.draw(self.surface)
+        data = pygame.image.tostring(self.surface, 'RGBA')
+        glPixelStorei(GL_UNPACK_ALIGNMENT, 1)
+        glTexImage2D(GL_TEXTURE_2D, 0, GL_RGBA, self.width, self.height, 0,
+                     GL_RGBA, GL_UNSIGNED_BYTE, data)
+        self.uploaded_bytes = len(data)
+
+    def update(self, ui):
+        """
+        Sube a la textura solo las regiones de la UI que cambiaron
+        """
+        if self.texture is None:
+            self._create_texture(ui)
+            return
+
+        self.uploaded_bytes = 0
+        rects = ui.collect_dirty_rects()
+        if not rects:
+            return
+
+        glBindTexture(GL_TEXTURE_2D, self.texture)
+        glPixelStorei(GL_UNPACK_ALIGNMENT, 1)
+        for rect in rects:
+            if rect.width == 0 or rect.height == 0:
+                continue
+            ui.redraw_region(self.surface, rect)
+            data = pygame.image.tostring(self.surface.subsurface(rect), 'RGBA')
+            # Las filas de la superficie y de la textura van de arriba a abajo
+            glTexSubImage2D(GL_TEXTURE_2D, 0, rect.x, rect.y, rect.width, rect.height,
+                            GL_RGBA, GL_UNSIGNED_BYTE, data)
+            self.uploaded_bytes += len(data)
+
+    def draw(self):
+        """
+        Dibuja la textura como un quad a pantalla completa. Requiere una
+        proyección ortográfica (0, width, height, 0).
+        """
+        if self.texture is None:
+            return
+
+        glDisable(GL_DEPTH_TEST)
+        glEnable(GL_TEXTURE_2D)
+        glEnable(GL_BLEND)
+        glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
+        glBindTexture(GL_TEXTURE_2D, self.texture)
+        glColor4f(1, 1, 1, 1)
+
+        glBegin(GL_QUADS)
+        glTexCoord2f(0, 0)
+        glVertex2f(0, 0)
+        glTexCoord2f(1, 0)
+        glVertex2f(self.width, 0)
+        glTexCoord2f(1, 1)
+        glVertex2f(self.width, self.height)
+        glTexCoord2f(0, 1)
+        glVertex2f(0, self.height)
+        glEnd()
+
+        glBindTexture(GL_TEXTURE_2D, 0)
+        glDisable(GL_BLEND)
+        glDisable(GL_TEXTURE_2D)
+        glEnable(GL_DEPTH_TEST)
+
+    def release(self):
+        if self.texture is not None:
+            glDeleteTextures([self.texture])
+            self.texture = None
@@ -0,0 +1,89 @@
+# workplane.py
+"""
+Planos de trabajo de los sketches: origen, normal y ejes del plano, con
+las conversiones entre coordenadas del sketch (2D) y de mundo (3D)
+"""
+import numpy as np
+
+PARALLEL_EPSILON = 1e-6  # |dirección · normal| por debajo: rayo paralelo al plano
+
+
+def _normalized(vector):
+    vector = np.asarray(vector, dtype=np.float64).reshape(3)
+    length = np.linalg.norm(vector)
+    if length == 0:
+        raise ValueError("Vector nulo")
+    return vector / length
+
+
+class Workplane:
+    """
+    Plano con origen, normal y ejes ortonormales (x_axis, y_axis) que dan
+    las coordenadas 2D del sketch: el punto (u, v) del sketch está en
+    origin + u * x_axis + v * y_axis. Si no se da `x_axis` se toma el eje
+    de mundo menos alineado con la normal proyectado sobre el plano. El
+    plano por defecto es z = 0 con los ejes de mundo.
+    """
+
+    def __init__(self, origin=(0.0, 0.0, 0.0), normal=(0.0, 0.0, 1.0), x_axis=None):
+        self.origin = np.asarray(origin, dtype=np.float64).reshape(3).copy()
+        self.normal = _normalized(normal)
+        if x_axis is None:
+            x_axis = np.identity(3)[int(np.argmin(np.abs(self.normal)))]
+        x_axis = np.asarray(x_axis, dtype=np.float64).reshape(3)
+        self.x_axis = _normalized(x_axis - (x_axis @ self.normal) * self.normal)
+        self.y_axis = np.cross(self.normal, self.x_axis)
+
+        # Sketch -> mundo: columnas x_axis, y_axis, normal y origen
+        self.matrix = np.identity(4)
+        self.matrix[:3, 0] = self.x_axis
+        self.matrix[:3, 1] = self.y_axis
+        self.matrix[:3, 2] = self.normal
+        self.matrix[:3, 3] = self.origin
+        self.is_identity = np.array_equal(self.matrix, np.identity(4))
+
+    @classmethod
+    def xy(cls, offset=0.0):
+        return cls((0.0, 0.0, offset), (0.0, 0.0, 1.0), (1.0, 0.0, 0.0))
+
+    @classmethod
+    def xz(cls, offset=0.0):
+        # Normal hacia -y para que el eje v del sketch sea +z
+        return cls((0.0, offset, 0.0), (0.0, -1.0, 0.0), (1.0, 0.0, 0.0))
+
+    @classmethod
+    def yz(cls, offset=0.0):
+        return cls((offset, 0.0, 0.0), (1.0, 0.0, 0.0), (0.0, 1.0, 0.0))
+
+    def __repr__(self):
+        return (f"Workplane(origin={self.origin.tolist()}, normal={self.normal.tolist()}, "
+                f"x_axis={self.x_axis.tolist()})")
+
+    def to_world(self, points, height=0.0):
+        """
+        Puntos del sketch (N, 2) a coordenadas de mundo (N, 3), a
+        `height` sobre el plano
+        """
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        return (self.origin + points[:, :1] * self.x_axis + points[:, 1:] * self.y_axis
+                + height * self.normal)
+
+    def to_local(self, points):
+        """
+        Proyección de puntos de mundo (N, 3) a coordenadas del sketch (N, 2)
+        """
+        relative = np.asarray(points, dtype=np.float64).reshape(-1, 3) - self.origin
+        return np.column_stack([relative @ self.x_axis, relative @ self.y_axis])
+
+    def intersect(self, origins, directions):
+        """
+        Corta los rayos (N, 3) con el plano. Retorna (t, puntos del sketch
+        (N, 2)); los rayos paralelos quedan en NaN.
+        """
+        origins = np.asarray(origins, dtype=np.float64).reshape(-1, 3)
+        directions = np.asarray(directions, dtype=np.float64).reshape(-1, 3)
+        facing = directions @ self.normal
+        t = np.full(len(origins), np.nan)
+        valid = np.abs(facing) > PARALLEL_EPSILON
+        t[valid] = ((self.origin - origins[valid]) @ self.normal) / facing[valid]
+        return t, self.to_local(origins + t[:, None] * directions)